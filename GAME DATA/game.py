@@ -1,14 +1,31 @@
 import sys
 import math
 import random
-import os
+import logging
 import pygame
 
-from scripts.utils import load_image, load_pngs, Animation
+from scripts.utils import flip_image
+from scripts.assets import AssetManager
 from scripts.entities import Player, Enemy
 from scripts.tilemap import Tilemap
+from scripts.mapformat import (
+    MAP_EXTENSION,
+    MapStream,
+    compile_map,
+    find_map,
+    load_map,
+)
 from scripts.clouds import Clouds
-from scripts.particle import Particle
+from scripts.particle import ParticleSystem
+from scripts.world import EntityWorld, WorldEnemy
+from scripts.ai import AIScheduler
+from scripts.broadphase import SpatialHash
+from scripts.projectiles import ProjectileSystem
+from scripts.emitters import EmitterSystem
+from scripts.hud import Hud
+from scripts.ui import Button, Label, MenuScreen, Panel, Slider
+from scripts.presenter import WINDOW_SIZE, create_presenter
+from scripts.timestep import RENDER_FPS, FixedTimestep
 
 """
 Main game module that integrates various components like menu, gameplay
@@ -17,6 +34,50 @@ Utilizes pygame for rendering and managing game state, including entities,
 tilemaps, and interactions.
 """
 
+logger = logging.getLogger(__name__)
+
+# Background image of each level.
+LEVEL_BACKGROUNDS = ("background.png", "background2.png", "background3.png")
+
+# Files the game needs, decoded in parallel at startup. The (kind, path)
+# pairs are described in AssetManager.preload.
+GAME_ASSETS = (
+    [
+        ("image_alpha", "bg.png"),
+        ("image", "entities/player.png"),
+        ("image", "weapon1.png"),
+        ("image", "fireball.png"),
+    ]
+    + [
+        ("pngs", path)
+        for path in (
+            "tiles/decor",
+            "tiles/grass",
+            "tiles/sky",
+            "tiles/large_decor",
+            "tiles/stone",
+            "clouds",
+            "entities/enemy/idle",
+            "entities/enemy/run",
+            "entities/player/idle",
+            "entities/player/run",
+            "entities/player/jump",
+            "entities/player/attack",
+            "entities/player/attack2",
+            "entities/player/attack3",
+            "entities/player/wall_slide",
+            "entities/player/hit",
+            "particles/leaf",
+            "particles/drop",
+            "particles/particle",
+        )
+    ]
+    + [
+        ("sound", "data/sfx/" + name + ".wav")
+        for name in ("click", "jump", "dash", "hit", "shoot", "ambience")
+    ]
+)
+
 
 class Menu:
     """
@@ -25,61 +86,56 @@ class Menu:
     adjusting settings, or exiting the game.
     """
 
-    def __init__(self):
+    def __init__(self, asset_manager=None):
         """
         Initializes the game's main menu, setting up the pygame window,
         loading fonts, setting up button colors,
         and loading background images and sounds.
+
+        Parameters:
+            asset_manager (AssetManager, optional): The cache to take assets
+            from. Defaults to the shared AssetManager.
         """
         pygame.init()
         pygame.display.set_caption("JUMPY")
         self.screen = pygame.display.set_mode((1920, 1080))
         self.clock = pygame.time.Clock()
+        self.asset_manager = asset_manager or AssetManager.shared()
 
-        self.font_custom = pygame.font.Font(None, 70)
+        self.font_custom = self.asset_manager.font(None, 70)
         self.white = (255, 255, 255)
         self.button_color = (155, 155, 155)
         self.hover_color = (130, 130, 130)
         self.quit_button_color = (255, 0, 0)
         self.quit_button_hover_color = (200, 0, 0)
-        self.button_sound = pygame.mixer.Sound("data/sfx/click.wav")
+        self.button_sound = self.asset_manager.sound("data/sfx/click.wav")
         self.button_sound.set_volume(0.2)
-        pygame.mixer.music.load("data/music.wav")
-        self.bg_image = pygame.image.load(
-            os.path.join("data", "pngs", "bg.png")
-        ).convert_alpha()
+        self.asset_manager.load_music("data/music.wav")
+        self.bg_image = self.asset_manager.image("bg.png", alpha=True)
 
-    def draw_text(self, text, font, color, x, y):
+    def button(self, text, y, action, color=None, hover_color=None):
         """
-        Draws specified text on the screen at the given position.
-
-        Parameters:
-            text (str): The text to display.
-            font (pygame.font.Font): The font used for the text.
-            color (tuple): The color of the text.
-            x (int): The x position of the text.
-            y (int): The y position of the text.
-        """
-        text_surface = font.render(text, True, color)
-        text_rect = text_surface.get_rect()
-        text_rect.center = (x, y)
-        self.screen.blit(text_surface, text_rect)
-
-    def draw_button(self, text, rect, color):
-        """
-        Draws a button with the specified text and color.
+        Creates a menu button centered horizontally.
 
         Parameters:
             text (str): The text displayed on the button.
-            rect (pygame.Rect): The rectangle defining the button's position
-            and size.
-            color (tuple): The color of the button.
+            y (int): The top of the button.
+            action: Returned by the screen when the button is clicked.
+            color (tuple, optional): The color of the button. Defaults to
+            the menu's button color.
+            hover_color (tuple, optional): The color under the mouse.
+            Defaults to the menu's hover color.
+
+        Returns:
+            Button: The button.
         """
-        # Vykreslení zaobleného obdélníku tlačítka
-        pygame.draw.rect(self.screen, color, rect, border_radius=20)
-        # Vykreslení textu na tlačítko
-        self.draw_text(
-            text, self.font_custom, self.white, rect.centerx, rect.centery
+        return Button(
+            text,
+            pygame.Rect(1920 // 2 - 300 // 2, y, 300, 90),
+            self.font_custom,
+            action,
+            color or self.button_color,
+            hover_color or self.hover_color,
         )
 
     def level_selection(self):
@@ -88,72 +144,24 @@ class Menu:
         game level.
 
         Returns:
-        int: The number of the selected level.
+        int: The number of the selected level, or None if the player went
+        back with Escape.
         """
-        self.screen.blit(self.bg_image, (0, 0))
-        button_width = 300
-        button_height = 90
-
-        level_1_button = pygame.Rect(
-            1920 // 2 - button_width // 2, 400, button_width, button_height
-        )
-        level_2_button = pygame.Rect(
-            1920 // 2 - button_width // 2, 500, button_width, button_height
-        )
-        level_3_button = pygame.Rect(
-            1920 // 2 - button_width // 2, 600, button_width, button_height
+        screen = MenuScreen(
+            self.screen,
+            self.bg_image,
+            [
+                self.button("Level 1", 400, 1),
+                self.button("Level 2", 500, 2),
+                self.button("Level 3", 600, 3),
+            ],
+            self.on_escape,
         )
-
-        running = True
-        while running:
-            mx, my = pygame.mouse.get_pos()
-
-            self.draw_button(
-                "Level 1",
-                level_1_button,
-                (
-                    self.hover_color
-                    if level_1_button.collidepoint((mx, my))
-                    else self.button_color
-                ),
-            )
-            self.draw_button(
-                "Level 2",
-                level_2_button,
-                (
-                    self.hover_color
-                    if level_2_button.collidepoint((mx, my))
-                    else self.button_color
-                ),
-            )
-            self.draw_button(
-                "Level 3",
-                level_3_button,
-                (
-                    self.hover_color
-                    if level_3_button.collidepoint((mx, my))
-                    else self.button_color
-                ),
-            )
-
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-                if event.type == pygame.MOUSEBUTTONDOWN:
-                    if level_1_button.collidepoint((mx, my)):
-                        self.button_sound.play()
-                        return 1
-                    elif level_2_button.collidepoint((mx, my)):
-                        self.button_sound.play()
-                        return 2
-                    elif level_3_button.collidepoint((mx, my)):
-                        self.button_sound.play()
-                        return 3
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_ESCAPE:
-                        menu.run()
-            pygame.display.update()
+        level = screen.run()
+        if level == "back":
+            return None
+        self.button_sound.play()
+        return level
 
     def run(self):
         """
@@ -161,79 +169,56 @@ class Menu:
         and transitioning to other game states like
         tutorial, settings, or starting the game.
         """
-        button_width = 300
-        button_height = 90
-
+        screen = MenuScreen(
+            self.screen,
+            self.bg_image,
+            [
+                Label("Jumpy", self.font_custom, (1920 // 2, 300)),
+                self.button("Play", 400, "play"),
+                self.button("Tutorial", 500, "tutorial"),
+                self.button("Settings", 600, "settings"),
+                self.button(
+                    "Quit Game",
+                    700,
+                    "quit",
+                    self.quit_button_color,
+                    self.quit_button_hover_color,
+                ),
+            ],
+        )
         while True:
-            self.screen.blit(self.bg_image, (0, 0))
-            self.draw_text(
-                "Jumpy", self.font_custom, self.white, 1920 // 2, 300
-            )
-            mx, my = pygame.mouse.get_pos()
-
-            play_button = pygame.Rect(
-                1920 // 2 - button_width // 2, 400, button_width, button_height
-            )
-            tutorial_button = pygame.Rect(
-                1920 // 2 - button_width // 2, 500, button_width, button_height
-            )
-            settings_button = pygame.Rect(
-                1920 // 2 - button_width // 2, 600, button_width, button_height
-            )
-            quit_button = pygame.Rect(
-                1920 // 2 - button_width // 2, 700, button_width, button_height
-            )
-
-            play_hovered = play_button.collidepoint((mx, my))
-            tutorial_hovered = tutorial_button.collidepoint((mx, my))
-            settings_hovered = settings_button.collidepoint((mx, my))
-            quit_hovered = quit_button.collidepoint((mx, my))
+            action = screen.run()
+            if action == "play":
+                self.button_sound.play()
+                selected_level = self.level_selection()
+                if selected_level is not None:
+                    game = Game(
+                        start_level=selected_level - 1,
+                        asset_manager=self.asset_manager,
+                    )
+                    game.run()
+                self.state = "level_selection"
+            elif action == "quit":
+                pygame.quit()
+                sys.exit()
+            elif action == "tutorial":
+                self.show_tutorial()
+            elif action == "settings":
+                self.show_settings()
+
+    def on_escape(self, event):
+        """
+        Closes a menu screen when Escape is pressed.
 
-            self.draw_button(
-                "Play",
-                play_button,
-                self.hover_color if play_hovered else self.button_color,
-            )
-            self.draw_button(
-                "Tutorial",
-                tutorial_button,
-                self.hover_color if tutorial_hovered else self.button_color,
-            )
-            self.draw_button(
-                "Settings",
-                settings_button,
-                self.hover_color if settings_hovered else self.button_color,
-            )
-            self.draw_button(
-                "Quit Game",
-                quit_button,
-                (
-                    self.quit_button_hover_color
-                    if quit_hovered
-                    else self.quit_button_color
-                ),
-            )
+        Parameters:
+            event (pygame.event.Event): The event.
 
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-                if event.type == pygame.MOUSEBUTTONDOWN:
-                    if play_button.collidepoint((mx, my)):
-                        self.button_sound.play()
-                        selected_level = self.level_selection()
-                        if selected_level is not None:
-                            game = Game(start_level=selected_level - 1)
-                            game.run()
-                        self.state = "level_selection"
-                    elif quit_button.collidepoint((mx, my)):
-                        pygame.quit()
-                        sys.exit()
-                    elif tutorial_button.collidepoint((mx, my)):
-                        self.show_tutorial()
-                    elif settings_button.collidepoint((mx, my)):
-                        self.show_settings()
-            pygame.display.update()
+        Returns:
+            str or None: "back" for Escape, None otherwise.
+        """
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+            return "back"
+        return None
 
     def show_tutorial(self):
         """
@@ -242,10 +227,7 @@ class Menu:
         The tutorial screen features a grey background with text instructions,
         enhanced by a brown border around the text area.
         """
-        self.screen.blit(self.bg_image, (0, 0))
         self.button_sound.play()
-        button_width = 300
-        button_height = 90
         tutorial_text = [
             "",
             "TUTORIAL:",
@@ -255,7 +237,7 @@ class Menu:
             "X/(L-Shift) - Attack",
             "ESC - Exit",
         ]
-        tutorial_font = pygame.font.Font(None, 40)
+        tutorial_font = self.asset_manager.font(None, 40)
         tutorial_height = len(tutorial_text) * 40
         tutorial_width = max(
             [tutorial_font.size(line)[0] for line in tutorial_text]
@@ -269,44 +251,21 @@ class Menu:
         background_color = (128, 128, 128)
         border_color = (139, 69, 19)
 
-        back_button = pygame.Rect(
-            1920 // 2 - button_width // 2, 800, button_width, button_height
-        )
-
-        running = True
-        while running:
-            for event in pygame.event.get():
-                if event.type == pygame.MOUSEBUTTONDOWN:
-                    mx, my = pygame.mouse.get_pos()
-                    if back_button.collidepoint((mx, my)):
-                        self.button_sound.play()
-                        running = False
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_ESCAPE:
-                        self.button_sound.play()
-                        running = False
-
-            pygame.draw.rect(self.screen, border_color, tutorial_rect)
-            inner_rect = tutorial_rect.inflate(-20, -20)
-            pygame.draw.rect(self.screen, background_color, inner_rect)
-
-            mx, my = pygame.mouse.get_pos()
-            back_hovered = back_button.collidepoint((mx, my))
-            self.draw_button(
-                "Back",
-                back_button,
-                self.hover_color if back_hovered else self.button_color,
-            )
-
-            for i, line in enumerate(tutorial_text):
-                self.draw_text(
+        widgets = [Panel(tutorial_rect, background_color, border_color)]
+        for i, line in enumerate(tutorial_text):
+            widgets.append(
+                Label(
                     line,
                     tutorial_font,
-                    self.white,
-                    1920 // 2,
-                    1080 // 2 - tutorial_height // 2 + i * 40 + 10,
+                    (
+                        1920 // 2,
+                        1080 // 2 - tutorial_height // 2 + i * 40 + 10,
+                    ),
                 )
-            pygame.display.update()
+            )
+        widgets.append(self.button("Back", 800, "back"))
+        MenuScreen(self.screen, self.bg_image, widgets, self.on_escape).run()
+        self.button_sound.play()
 
     def adjust_sfx_volume(self, volume):
         """
@@ -327,141 +286,42 @@ class Menu:
           settings such as sound volume.
         """
         self.button_sound.play()
-        pygame.mixer.music.load("data/music.wav")
+        self.asset_manager.load_music("data/music.wav")
         pygame.mixer.music.play(loops=-1)
-        self.jump = pygame.mixer.Sound("data/sfx/jump.wav")
-        self.dash = pygame.mixer.Sound("data/sfx/dash.wav")
-        self.hit = pygame.mixer.Sound("data/sfx/hit.wav")
-        self.shoot = pygame.mixer.Sound("data/sfx/shoot.wav")
-        self.ambience = pygame.mixer.Sound("data/sfx/ambience.wav")
-
-        button_width, button_height = 300, 90
-        volume_slider_width, volume_slider_height = 200, 20
-        sfx_slider_width, sfx_slider_height = 200, 20
-        volume_slider_x = 1920 // 2 - volume_slider_width // 2
-        sfx_slider_x = 1920 // 2 - sfx_slider_width // 2
-        volume_slider_y, sfx_slider_y = 400, 600
-
+        self.jump = self.asset_manager.sound("data/sfx/jump.wav")
+        self.dash = self.asset_manager.sound("data/sfx/dash.wav")
+        self.hit = self.asset_manager.sound("data/sfx/hit.wav")
+        self.shoot = self.asset_manager.sound("data/sfx/shoot.wav")
+        self.ambience = self.asset_manager.sound("data/sfx/ambience.wav")
+
+        slider_width, slider_height = 200, 20
+        slider_x = 1920 // 2 - slider_width // 2
         music_volume, sfx_volume = 0.5, 0.5
-        is_dragging_music, is_dragging_sfx = False, False
-
-        hover_color = (130, 130, 130)
-        volume_slider_rect = pygame.Rect(
-            volume_slider_x,
-            volume_slider_y,
-            volume_slider_width,
-            volume_slider_height,
-        )
-        sfx_slider_rect = pygame.Rect(
-            sfx_slider_x, sfx_slider_y, sfx_slider_width, sfx_slider_height
-        )
-
-        running = True
-        while running:
-            self.screen.blit(self.bg_image, (0, 0))
 
-            pygame.draw.rect(
-                self.screen,
-                self.button_color,
-                (
-                    volume_slider_x,
-                    volume_slider_y,
-                    volume_slider_width,
-                    volume_slider_height,
-                ),
-            )
-            pygame.draw.rect(
-                self.screen,
-                self.white,
-                (
-                    volume_slider_x + music_volume * volume_slider_width - 5,
-                    volume_slider_y - 5,
-                    10,
-                    volume_slider_height + 10,
-                ),
-            )
-            self.draw_text(
-                "Music Volume", self.font_custom, self.white, 1920 // 2, 300
-            )
-
-            pygame.draw.rect(
-                self.screen,
-                self.button_color,
-                (
-                    sfx_slider_x,
-                    sfx_slider_y,
-                    sfx_slider_width,
-                    sfx_slider_height,
+        MenuScreen(
+            self.screen,
+            self.bg_image,
+            [
+                Label("Music Volume", self.font_custom, (1920 // 2, 300)),
+                Slider(
+                    (slider_x, 400, slider_width, slider_height),
+                    music_volume,
+                    pygame.mixer.music.set_volume,
+                    self.button_color,
                 ),
-            )
-            pygame.draw.rect(
-                self.screen,
-                self.white,
-                (
-                    sfx_slider_x + sfx_volume * sfx_slider_width - 5,
-                    sfx_slider_y - 5,
-                    10,
-                    sfx_slider_height + 10,
+                Label("SFX Volume", self.font_custom, (1920 // 2, 500)),
+                Slider(
+                    (slider_x, 600, slider_width, slider_height),
+                    sfx_volume,
+                    self.adjust_sfx_volume,
+                    self.button_color,
                 ),
-            )
-            self.draw_text(
-                "SFX Volume", self.font_custom, self.white, 1920 // 2, 500
-            )
-
-            mx, my = pygame.mouse.get_pos()
-            back_button_rect = pygame.Rect(
-                1920 // 2 - button_width // 2, 800, button_width, button_height
-            )
-            is_hovering_back = back_button_rect.collidepoint((mx, my))
-
-            back_button_color = (
-                hover_color if is_hovering_back else self.button_color
-            )
-            self.draw_button("Back", back_button_rect, back_button_color)
-
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-                elif event.type == pygame.MOUSEBUTTONDOWN:
-                    if back_button_rect.collidepoint(event.pos):
-                        self.button_sound.play()
-                        pygame.mixer.music.stop()
-                        running = False
-                    elif volume_slider_rect.collidepoint(event.pos):
-                        is_dragging_music = True
-                    elif sfx_slider_rect.collidepoint(event.pos):
-                        is_dragging_sfx = True
-                elif event.type == pygame.MOUSEBUTTONUP:
-                    is_dragging_music = False
-                    is_dragging_sfx = False
-                elif event.type == pygame.MOUSEMOTION:
-                    if is_dragging_music:
-                        mouse_x, _ = event.pos
-                        music_volume = max(
-                            0,
-                            min(
-                                1,
-                                (mouse_x - volume_slider_x)
-                                / volume_slider_width,
-                            ),
-                        )
-                        pygame.mixer.music.set_volume(music_volume)
-                    if is_dragging_sfx:
-                        mouse_x, _ = event.pos
-                        sfx_volume = max(
-                            0,
-                            min(
-                                1, (mouse_x - sfx_slider_x) / sfx_slider_width
-                            ),
-                        )
-                        self.adjust_sfx_volume(sfx_volume)
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_ESCAPE:
-                        self.button_sound.play()
-                        pygame.mixer.music.stop()
-                        running = False
-            pygame.display.update()
+                self.button("Back", 800, "back"),
+            ],
+            self.on_escape,
+        ).run()
+        self.button_sound.play()
+        pygame.mixer.music.stop()
 
 
 class Game:
@@ -471,82 +331,125 @@ class Game:
     and managing the game loop, including rendering and updating game states.
     """
 
-    def __init__(self, start_level=0):
+    def __init__(
+        self,
+        start_level=0,
+        stream_maps=False,
+        batch_enemies=False,
+        asset_manager=None,
+        present="integer",
+        max_fps=RENDER_FPS,
+        headless=False,
+    ):
         """
         Initializes the game, setting up the display, loading assets,
         and preparing the game environment.
+
+        Parameters:
+            start_level (int, optional): The level to start on. Defaults
+            to 0.
+            stream_maps (bool, optional): Whether to stream compiled maps
+            chunk by chunk around the player instead of loading them whole.
+            Meant for very large levels. Defaults to False.
+            batch_enemies (bool, optional): Whether to keep the enemies in
+            an EntityWorld and move them all with batched NumPy
+            operations. Meant for levels with hundreds of enemies.
+            Defaults to False.
+            asset_manager (AssetManager, optional): The cache to take assets
+            from. Defaults to the shared AssetManager.
+            present (str, optional): How the game view is scaled to the
+            window: "integer", "stretch" or "sdl", see scripts.presenter.
+            Defaults to "integer".
+            max_fps (int, optional): Cap of the rendered frames per second,
+            0 for none. The game itself always runs at SIM_FPS steps per
+            second. Defaults to RENDER_FPS.
+            headless (bool, optional): Whether the game is only simulated,
+            see scripts.headless. The window is then only as large as the
+            display and no music is played. Defaults to False.
         """
-        self.bg_image = pygame.image.load(
-            os.path.join("data", "pngs", "bg.png")
-        ).convert_alpha()
-        self.font_custom = pygame.font.Font(None, 70)
+        self.asset_manager = assets = asset_manager or AssetManager.shared()
+        self.font_custom = assets.font(None, 70)
         self.white = (255, 255, 255)
         self.button_color = (155, 155, 155)
         self.hover_color = (130, 130, 130)
         pygame.init()
         pygame.display.set_caption("JUMPY")
-        self.screen = pygame.display.set_mode((1920, 1080))
         self.display = pygame.Surface((640, 360))
+        self.headless = headless
+        self.presenter = create_presenter(
+            present,
+            self.display.get_size(),
+            self.display.get_size() if headless else WINDOW_SIZE,
+        )
+        self.screen = self.presenter.screen
         self.clock = pygame.time.Clock()
+        self.timestep = FixedTimestep()
+        self.max_fps = max_fps
         self.movement = [False, False]
-        self.button_sound = pygame.mixer.Sound("data/sfx/click.wav")
-        self.button_sound.set_volume(0.2)
 
+        # Sprity se berou z atlasu, pokud je aktuální
+        assets.use_atlas()
+        # Soubory se dekódují paralelně, mezitím běží načítací obrazovka
+        assets.preload(
+            GAME_ASSETS
+            + [
+                ("level_image", LEVEL_BACKGROUNDS[level])
+                for level in {0, start_level}
+                if level < len(LEVEL_BACKGROUNDS)
+            ],
+            progress=self.loading_screen,
+        )
+        self.bg_image = assets.image("bg.png", alpha=True)
+        self.button_sound = assets.sound("data/sfx/click.wav")
+        self.button_sound.set_volume(0.2)
         self.assets = {
-            "decor": load_pngs("tiles/decor"),
-            "grass": load_pngs("tiles/grass"),
-            "sky": load_pngs("tiles/sky"),
-            "large_decor": load_pngs("tiles/large_decor"),
-            "stone": load_pngs("tiles/stone"),
-            "player": load_image("entities/player.png"),
-            "background": load_image("background.png"),
-            "background2": load_image("background2.png"),
-            "background3": load_image("background3.png"),
-            "clouds": load_pngs("clouds"),
-            "enemy/idle": Animation(
-                load_pngs("entities/enemy/idle"), img_dur=6
-            ),
-            "enemy/run": Animation(load_pngs("entities/enemy/run"), img_dur=4),
-            "player/idle": Animation(
-                load_pngs("entities/player/idle"), img_dur=6
-            ),
-            "player/run": Animation(
-                load_pngs("entities/player/run"), img_dur=4
+            "decor": assets.pngs("tiles/decor"),
+            "grass": assets.pngs("tiles/grass"),
+            "sky": assets.pngs("tiles/sky"),
+            "large_decor": assets.pngs("tiles/large_decor"),
+            "stone": assets.pngs("tiles/stone"),
+            "player": assets.image("entities/player.png"),
+            "clouds": assets.pngs("clouds"),
+            "enemy/idle": assets.animation("entities/enemy/idle", img_dur=6),
+            "enemy/run": assets.animation("entities/enemy/run", img_dur=4),
+            "player/idle": assets.animation("entities/player/idle", img_dur=6),
+            "player/run": assets.animation("entities/player/run", img_dur=4),
+            "player/jump": assets.animation("entities/player/jump"),
+            "player/attack": assets.animation(
+                "entities/player/attack", img_dur=1
             ),
-            "player/jump": Animation(load_pngs("entities/player/jump")),
-            "player/attack": Animation(
-                load_pngs("entities/player/attack"), img_dur=1
+            "player/attack2": assets.animation(
+                "entities/player/attack2", img_dur=1
             ),
-            "player/attack2": Animation(
-                load_pngs("entities/player/attack2"), img_dur=1
+            "player/attack3": assets.animation(
+                "entities/player/attack3", img_dur=1
             ),
-            "player/attack3": Animation(
-                load_pngs("entities/player/attack3"), img_dur=1
+            "player/wall_slide": assets.animation(
+                "entities/player/wall_slide"
             ),
-            "player/wall_slide": Animation(
-                load_pngs("entities/player/wall_slide")
+            "particle/leaf": assets.animation(
+                "particles/leaf", img_dur=20, loop=False
             ),
-            "particle/leaf": Animation(
-                load_pngs("particles/leaf"), img_dur=20, loop=False
+            "particle/drop": assets.animation(
+                "particles/drop", img_dur=5, loop=True
             ),
-            "particle/drop": Animation(
-                load_pngs("particles/drop"), img_dur=5, loop=True
-            ),
-            "particle/particle": Animation(
-                load_pngs("particles/particle"), img_dur=6, loop=False
-            ),
-            "weapon1": load_image("weapon1.png"),
-            "fireball": load_image("fireball.png"),
-            "player/hit": Animation(
-                load_pngs("entities/player/hit"), img_dur=5
+            "particle/particle": assets.animation(
+                "particles/particle", img_dur=6, loop=False
             ),
+            "weapon1": assets.image("weapon1.png"),
+            "fireball": assets.image("fireball.png"),
+            "player/hit": assets.animation("entities/player/hit", img_dur=5),
         }
+        self.assets["weapon1/flipped"] = assets.get(
+            ("flipped", "weapon1.png"),
+            lambda: flip_image(self.assets["weapon1"]),
+        )
         self.sfx = {
-            "jump": pygame.mixer.Sound("data/sfx/jump.wav"),
-            "dash": pygame.mixer.Sound("data/sfx/dash.wav"),
-            "hit": pygame.mixer.Sound("data/sfx/hit.wav"),
-            "shoot": pygame.mixer.Sound("data/sfx/shoot.wav"),
-            "ambience": pygame.mixer.Sound("data/sfx/ambience.wav"),
+            "jump": assets.sound("data/sfx/jump.wav"),
+            "dash": assets.sound("data/sfx/dash.wav"),
+            "hit": assets.sound("data/sfx/hit.wav"),
+            "shoot": assets.sound("data/sfx/shoot.wav"),
+            "ambience": assets.sound("data/sfx/ambience.wav"),
         }
 
         self.sfx["ambience"].set_volume(0.4)
@@ -555,12 +458,23 @@ class Game:
         self.sfx["dash"].set_volume(0.3)
         self.sfx["jump"].set_volume(0.4)
 
-        pygame.mixer.music.load("data/music.wav")
-        pygame.mixer.music.play(loops=-1)
-
+        if not headless:
+            assets.load_music("data/music.wav")
+            pygame.mixer.music.play(loops=-1)
+
+        self.stream_maps = stream_maps
+        self.batch_enemies = batch_enemies
+        self.world = None
+        self.ai = AIScheduler()
+        self.broadphase = SpatialHash()
+        self.projectiles = ProjectileSystem()
+        self.particles = ParticleSystem(self)
+        self.emitters = EmitterSystem(self.particles)
         self.clouds = Clouds(self.assets["clouds"], count=16)
         self.player = Player(self, (50, 50), (8, 15))
         self.tilemap = Tilemap(self, tile_size=16)
+        self.background = None
+        self.background_path = None
         self.level = 0
         self.load_level(self.level)
         self.fireball_hits = 0
@@ -574,6 +488,41 @@ class Game:
         self.exit_button_hover_color = (200, 0, 0)
         self.hover_color = (130, 130, 130)
 
+        # HUD je navržený pro okno 1920x1080, vrstva může být menší
+        scale = self.presenter.overlay_scale
+        self.hud = Hud(assets.font(None, round(72 * scale)))
+        self.hud.add(
+            lambda: f"Kills: {self.enemies_killed}/{self.total_enemies}",
+            (round(1880 * scale), round(10 * scale)),
+        )
+        self.hud.add(
+            lambda: f"Lives: {self.lifes}/2",
+            (round(1880 * scale), round(80 * scale)),
+        )
+        self.hud.add(
+            lambda: f"LEVEL: {self.level + 1}",
+            (round(230 * scale), round(10 * scale)),
+        )
+
+    def loading_screen(self, done, total):
+        """
+        Draws the loading screen with a progress bar while assets load.
+
+        Parameters:
+            done (int): Number of files loaded so far.
+            total (int): Number of files to load.
+        """
+        # Okno musí dál zpracovávat události, jinak vypadá zamrzlé
+        pygame.event.pump()
+        self.screen.fill((0, 0, 0))
+        self.draw_text("Loading", self.font_custom, self.white, 1920 // 2, 460)
+        bar = pygame.Rect(1920 // 2 - 300, 520, 600, 30)
+        pygame.draw.rect(self.screen, self.button_color, bar, border_radius=15)
+        if done:
+            bar.width = bar.width * done // total
+            pygame.draw.rect(self.screen, self.white, bar, border_radius=15)
+        self.presenter.flip()
+
     def draw_text(self, text, font, color, x, y):
         """
         Draws specified text on the screen at the given position.
@@ -621,7 +570,7 @@ class Game:
                     pygame.quit()
                     sys.exit()
                 elif event.type == pygame.MOUSEBUTTONDOWN:
-                    mx, my = pygame.mouse.get_pos()
+                    mx, my = self.presenter.mouse_pos()
                     if resume_button.collidepoint((mx, my)):
                         self.button_sound.play()
                         pygame.mixer.music.unpause()
@@ -630,7 +579,7 @@ class Game:
                         self.button_sound.play()
                         return "exit"
 
-            mx, my = pygame.mouse.get_pos()
+            mx, my = self.presenter.mouse_pos()
 
             button_width, button_height = 300, 90
             resume_button = pygame.Rect(
@@ -680,7 +629,7 @@ class Game:
                 exit_button.centery,
             )
 
-            pygame.display.flip()
+            self.presenter.flip()
             self.clock.tick(60)
 
     def game_over_screen(self):
@@ -695,7 +644,7 @@ class Game:
                 "GAME OVER", self.font_custom, self.white, 1920 // 2, 400
             )
 
-            mx, my = pygame.mouse.get_pos()
+            mx, my = self.presenter.mouse_pos()
 
             button_width, button_height = 300, 90
             back_button = pygame.Rect(
@@ -740,9 +689,38 @@ class Game:
                     if back_button.collidepoint((mx, my)):
                         self.button_sound.play()
                         return
-            pygame.display.flip()
+            self.presenter.flip()
             self.clock.tick(60)
 
+    def release_level_assets(self):
+        """
+        Releases the assets held for the current level, so the asset
+        manager may evict them.
+        """
+        if self.background_path is not None:
+            self.asset_manager.release_image(self.background_path)
+        self.background = None
+        self.background_path = None
+
+    def add_enemy(self, pos):
+        """
+        Adds an enemy to the current level, into the entity world when the
+        enemies are batched.
+
+        Parameters:
+            pos (list): The position of the enemy.
+
+        Returns:
+            Enemy: The new enemy.
+        """
+        if self.world is not None:
+            enemy = WorldEnemy(self, self.world, pos, (8, 11))
+        else:
+            enemy = Enemy(self, pos, (8, 11))
+        self.enem.append(enemy)
+        self.total_enemies = len(self.enem)
+        return enemy
+
     def load_level(self, map_id):
         """
         Loads a game level based on the specified map ID, setting up the
@@ -751,10 +729,26 @@ class Game:
         Parameters:
             map_id (int): The identifier for the map to load.
         """
-        self.tilemap.load("data/maps/" + str(map_id) + ".json")
+        base_path = "data/maps/" + str(map_id)
+        path = find_map(base_path)
+        if self.stream_maps:
+            if not path.endswith(MAP_EXTENSION):
+                # Streamovat jde jen přeložená mapa, zastaralá se přeloží
+                path = compile_map(base_path)
+            MapStream(self.tilemap, path)
+        else:
+            load_map(self.tilemap, path)
+        self.release_level_assets()
+        if map_id < len(LEVEL_BACKGROUNDS):
+            self.background_path = LEVEL_BACKGROUNDS[map_id]
+            self.background = self.asset_manager.acquire_image(
+                self.background_path
+            )
+        self.tilemap.build_hazard_index()
+        self.tilemap.merge_solid_rects()
         self.enem = []
 
-        self.leaf_spawnerss = []
+        self.emitters.clear()
         for tree in self.tilemap.extract(
             [
                 ("large_decor", 1),
@@ -769,11 +763,16 @@ class Game:
             ],
             keep=True,
         ):
-            self.leaf_spawnerss.append(
-                pygame.Rect(1 + tree["pos"][0], 4 + tree["pos"][1], 30, 10)
+            rect = pygame.Rect(1 + tree["pos"][0], 4 + tree["pos"][1], 30, 10)
+            # Průměrný počet listů za snímek odpovídá ploše koruny
+            self.emitters.add(
+                rect,
+                "leaf",
+                rect.width * rect.height / 19999,
+                velocity=(-0.1, 0.2),
+                frames=(0, 15),
             )
 
-        self.drop_spawnerss = []
         for rock in self.tilemap.extract(
             [
                 ("large_decor", 4),
@@ -783,11 +782,18 @@ class Game:
             ],
             keep=True,
         ):
-            self.drop_spawnerss.append(
-                pygame.Rect(1 + rock["pos"][0], 4 + rock["pos"][1], 30, 10)
+            rect = pygame.Rect(1 + rock["pos"][0], 4 + rock["pos"][1], 30, 10)
+            self.emitters.add(
+                rect,
+                "drop",
+                rect.width * rect.height / 19999,
+                velocity=(0, 1),
             )
 
         self.enem = []
+        self.ai.reset()
+        if self.batch_enemies:
+            self.world = EntityWorld()
         for spawners in self.tilemap.extract(
             [("spawners", 0), ("spawners", 1)]
         ):
@@ -795,221 +801,322 @@ class Game:
                 self.player.pos = spawners["pos"]
                 self.player.air_time = 0
             else:
-                self.enem.append(Enemy(self, spawners["pos"], (8, 11)))
-                self.total_enemies = len(self.enem)
+                self.add_enemy(spawners["pos"])
                 self.enemies_killed = 0
-        print(f"Total enemies loaded for level {map_id}: {len(self.enem)}")
+        logger.info(
+            "Total enemies loaded for level %d: %d", map_id, len(self.enem)
+        )
+        self.tilemap.update_stream(self.player.pos)
 
-        self.fireball = []
-        self.particles = []
+        self.projectiles.clear()
+        self.particles.clear()
 
         self.scroll = [0, 0]
         self.dead = 0
 
-    def run(self):
+        # Po načtení úrovně se nic neinterpoluje
+        self.last_scroll = tuple(self.scroll)
+        self.last_pos = {}
+        self.visible_enemies = list(self.enem)
+        self.player_visible = True
+
+    def remember_state(self):
         """
-        Main game loop, handling events, updating game states, rendering the
-        game world, and managing transitions.
+        Keeps the camera and entity positions of the current step, so the
+        next frames can be interpolated from them.
         """
-        self.sfx["ambience"].play(-1)
-        pygame.mixer.music.play(loops=-1)
-        while True:
+        self.last_scroll = tuple(self.scroll)
+        if self.world is not None:
+            self.last_pos = dict(
+                zip(self.world.entities, self.world.positions())
+            )
+        else:
+            self.last_pos = {
+                entity: (entity.pos[0], entity.pos[1]) for entity in self.enem
+            }
+        self.last_pos[self.player] = (self.player.pos[0], self.player.pos[1])
 
-            if self.level == 0:
-                self.display.blit(self.assets["background"], (0, 0))
-            elif self.level == 1:
-                self.display.blit(self.assets["background2"], (0, 0))
-            elif self.level == 2:
-                self.display.blit(self.assets["background3"], (0, 0))
-
-            if not len(self.enem):
-                if self.level < 2:
-                    self.level += 1
-                    self.total_enemies = len(self.enem)
-                    self.load_level(self.level)
-                else:
-                    pygame.mixer.music.stop()
-                    self.game_over_screen()
-                    break
-
-            if self.dead:
-                self.dead += 1
-                if self.dead > 40:
-                    self.load_level(self.level)
-
-            self.scroll[0] += (
-                self.player.rect().centerx
-                - self.display.get_width() / 2
-                - self.scroll[0]
-            ) / 30
-            self.scroll[1] += (
-                self.player.rect().centery
-                - self.display.get_height() / 2
-                - self.scroll[1]
-            ) / 30
-            render_scroll = (int(self.scroll[0]), int(self.scroll[1]))
-
-            for rect in self.leaf_spawnerss:
-                if random.random() * 19999 < rect.width * rect.height:
-                    pos = (
-                        rect.x + random.random() * rect.width,
-                        rect.y + random.random() * rect.height,
-                    )
-                    self.particles.append(
-                        Particle(
-                            self,
-                            "leaf",
-                            pos,
-                            velocity=[-0.1, 0.2],
-                            frame=random.randint(0, 15),
-                        )
-                    )
+    def lerp_offset(self, entity, offset, alpha):
+        """
+        Gets the camera offset that draws an entity between its previous and
+        its current position.
 
-            for rect in self.drop_spawnerss:
-                if random.random() * 19999 < rect.width * rect.height:
-                    pos = (
-                        rect.x + random.random() * rect.width,
-                        rect.y + random.random() * rect.height,
-                    )
-                    self.particles.append(
-                        Particle(self, "drop", pos, velocity=[0, 1])
-                    )
-            self.clouds.update()
+        Parameters:
+            entity (PhysicsEntity): The entity.
+            offset (tuple): The camera offset.
+            alpha (float): The interpolation factor, see
+            FixedTimestep.alpha.
+
+        Returns:
+            tuple: The offset to render the entity with.
+        """
+        last = self.last_pos.get(entity)
+        if last is None or alpha >= 1:
+            return offset
+        return (
+            offset[0] + (entity.pos[0] - last[0]) * (1 - alpha),
+            offset[1] + (entity.pos[1] - last[1]) * (1 - alpha),
+        )
 
-            self.clouds.render(self.display, offset=render_scroll)
+    def handle_events(self):
+        """
+        Handles the input events since the last step.
 
-            self.tilemap.render(self.display, offset=render_scroll)
+        Returns:
+            bool: False if the player left to the main menu.
+        """
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                sys.exit()
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    pygame.mixer.music.pause()
+                    action = self.ingame_menu()
+                    if action == "exit":
+                        self.release_level_assets()
+                        return False
+                    # Čas strávený v menu se nedohání
+                    self.clock.tick()
+                    self.timestep.reset()
+                if event.key == pygame.K_LEFT or event.key == pygame.K_a:
+                    self.movement[0] = True
+                if event.key == pygame.K_RIGHT or event.key == pygame.K_d:
+                    self.movement[1] = True
+                if event.key == pygame.K_UP or event.key == pygame.K_SPACE:
+                    if self.player.jump():
+                        self.sfx["jump"].play()
+                if event.key == pygame.K_x or event.key == pygame.K_LSHIFT:
+                    self.player.dash()
+            if event.type == pygame.KEYUP:
+                if event.key == pygame.K_LEFT or event.key == pygame.K_a:
+                    self.movement[0] = False
+                if event.key == pygame.K_RIGHT or event.key == pygame.K_d:
+                    self.movement[1] = False
+        return True
+
+    def step(self):
+        """
+        Advances the game by one fixed step: handles the input, the level
+        transitions, the camera and every entity. Nothing is drawn.
 
-            for enemy in self.enem.copy():
-                kill = enemy.update(self.tilemap, (0, 0))
-                enemy.render(self.display, offset=render_scroll)
+        Returns:
+            bool: False once the game is over or the player left to the main
+            menu.
+        """
+        # Umírající částice a projektily se vykreslily, až teď se odeberou
+        self.projectiles.sweep()
+        self.particles.sweep()
+
+        if not self.handle_events():
+            return False
+        if self.dead == 1:
+            self.lifes = 2
+            self.fireball_hits = 0
+
+        self.remember_state()
+
+        if not len(self.enem):
+            if self.level < 2:
+                self.level += 1
+                self.total_enemies = len(self.enem)
+                self.load_level(self.level)
+            else:
+                pygame.mixer.music.stop()
+                self.game_over_screen()
+                self.release_level_assets()
+                return False
+
+        if self.dead:
+            self.dead += 1
+            if self.dead > 40:
+                self.load_level(self.level)
+
+        self.scroll[0] += (
+            self.player.rect().centerx
+            - self.display.get_width() / 2
+            - self.scroll[0]
+        ) / 30
+        self.scroll[1] += (
+            self.player.rect().centery
+            - self.display.get_height() / 2
+            - self.scroll[1]
+        ) / 30
+        render_scroll = (int(self.scroll[0]), int(self.scroll[1]))
+        focus = (
+            self.player.rect().center,
+            (
+                self.scroll[0] + self.display.get_width() / 2,
+                self.scroll[1] + self.display.get_height() / 2,
+            ),
+        )
+        self.tilemap.update_stream(*focus)
+
+        self.emitters.update(
+            pygame.Rect(render_scroll, self.display.get_size())
+        )
+        self.clouds.update()
+
+        # Broadphase se každý krok sestaví znovu
+        self.broadphase.clear()
+        self.broadphase.insert(self.player, self.player.rect(), "player")
+
+        # Zabití nepřátelé se vykreslí ještě v tomto kroku
+        self.visible_enemies = []
+        if self.world is not None:
+            # Všichni nepřátelé se posunou najednou
+            enemies = list(self.world.entities)
+            positions = self.world.positions()
+            resident = [self.tilemap.is_resident(pos) for pos in positions]
+            frames = [
+                frames if active else 0
+                for frames, active in zip(
+                    self.ai.schedule(enemies, *focus, positions=positions),
+                    resident,
+                )
+            ]
+            kills = self.world.update(
+                self.tilemap, frames, abs(self.player.dashing) >= 20
+            )
+            rects = self.world.rects()
+            for enemy, active, kill in zip(enemies, resident, kills):
+                if active:
+                    self.visible_enemies.append(enemy)
                 if kill:
+                    self.world.remove(enemy)
+                    self.ai.forget(enemy)
                     self.enem.remove(enemy)
                     self.enemies_killed += 1
-
-            if not self.dead:
-                self.player.update(
-                    self.tilemap, (self.movement[1] - self.movement[0], 0)
-                )
-                self.player.render(self.display, offset=render_scroll)
-
-            for fireball in self.fireball.copy():
-                fireball[0][0] += fireball[1]
-                fireball[2] += 1
-                img = self.assets["fireball"]
-                self.display.blit(
-                    img,
-                    (
-                        fireball[0][0]
-                        - img.get_width() / 2
-                        - render_scroll[0],
-                        fireball[0][1]
-                        - img.get_height() / 2
-                        - render_scroll[1],
-                    ),
-                )
-                if self.tilemap.solid_check(fireball[0]):
-                    self.fireball.remove(fireball)
-                elif fireball[2] > 360:
-                    self.fireball.remove(fireball)
-                if abs(self.player.dashing) < 50:
-                    if self.player.rect().collidepoint(fireball[0]):
-                        self.fireball.remove(fireball)
-                        self.fireball_hits += 1
-                        self.lifes -= 1
-                        self.sfx["hit"].play()
-                        self.player.set_action("hit")
-
-                        if self.fireball_hits >= 2:
-                            self.dead = True
-                            self.lifes = 2
-                            self.fireball_hits = 0
-                            for i in range(30):
-                                angle = random.random() * 3.14 * 2
-                                speed = random.random() * 5
-                                self.particles.append(
-                                    Particle(
-                                        self,
-                                        "particle",
-                                        self.player.rect().center,
-                                        velocity=[
-                                            math.cos(angle + 3.14)
-                                            * speed
-                                            * 0.5,
-                                            math.sin(angle + 3.14)
-                                            * speed
-                                            * 0.5,
-                                        ],
-                                        frame=random.randint(0, 7),
-                                    )
-                                )
-
-            for particle in self.particles.copy():
-                kill = particle.update()
-                particle.render(self.display, offset=render_scroll)
-                if particle.type == "leaf" or "drop":
-                    particle.pos[0] += (
-                        math.sin(particle.animation.frame * 0.1) * 0.3
-                    )
+            for enemy, active, rect in zip(enemies, resident, rects):
+                if active and enemy.world is not None:
+                    self.broadphase.insert(enemy, rect, "enemy")
+        else:
+            enemies = list(self.enem)
+            for enemy, frames in zip(
+                enemies, self.ai.schedule(enemies, *focus)
+            ):
+                # Nepřátelé v nenačtených blocích stojí
+                if not self.tilemap.is_resident(enemy.pos):
+                    continue
+                # Vzdálení nepřátelé se aktualizují méně často
+                kill = frames and enemy.update(self.tilemap, (0, 0), frames)
+                self.visible_enemies.append(enemy)
                 if kill:
-                    self.particles.remove(particle)
+                    self.enem.remove(enemy)
+                    self.ai.forget(enemy)
+                    self.enemies_killed += 1
+                else:
+                    self.broadphase.insert(enemy, enemy.rect(), "enemy")
 
-            self.screen.blit(
-                pygame.transform.scale(self.display, self.screen.get_size()),
-                (0, 0),
+        self.player_visible = not self.dead
+        if self.player_visible:
+            self.player.update(
+                self.tilemap, (self.movement[1] - self.movement[0], 0)
             )
 
-            self.clock.tick(60)
+        self.projectiles.update(self.tilemap)
+        # Hráč se už posunul, zásahy se testují s jeho novou polohou
+        self.broadphase.move(self.player, self.player.rect(), "player")
+        for slot, pos in enumerate(self.projectiles.positions()):
+            self.broadphase.insert(
+                slot, SpatialHash.point_rect(pos), "projectile"
+            )
+        if abs(self.player.dashing) < 50:
+            for slot, _ in self.broadphase.pairs("projectile", "player"):
+                self.projectiles.dead[slot] = True
+                self.fireball_hits += 1
+                self.lifes -= 1
+                self.sfx["hit"].play()
+                self.player.set_action("hit")
+
+                if self.fireball_hits >= 2:
+                    self.dead = True
+                    self.lifes = 2
+                    self.fireball_hits = 0
+                    for i in range(30):
+                        angle = random.random() * 3.14 * 2
+                        speed = random.random() * 5
+                        self.particles.add(
+                            "particle",
+                            self.player.rect().center,
+                            velocity=[
+                                math.cos(angle + 3.14) * speed * 0.5,
+                                math.sin(angle + 3.14) * speed * 0.5,
+                            ],
+                            frame=random.randint(0, 7),
+                        )
 
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_ESCAPE:
-                        pygame.mixer.music.pause()
-                        action = self.ingame_menu()
-                        if action == "exit":
-                            return
-                    if event.key == pygame.K_LEFT or event.key == pygame.K_a:
-                        self.movement[0] = True
-                    if event.key == pygame.K_RIGHT or event.key == pygame.K_d:
-                        self.movement[1] = True
-                    if event.key == pygame.K_UP or event.key == pygame.K_SPACE:
-                        if self.player.jump():
-                            self.sfx["jump"].play()
-                    if event.key == pygame.K_x or event.key == pygame.K_LSHIFT:
-                        self.player.dash()
-                if event.type == pygame.KEYUP:
-                    if event.key == pygame.K_LEFT or event.key == pygame.K_a:
-                        self.movement[0] = False
-                    if event.key == pygame.K_RIGHT or event.key == pygame.K_d:
-                        self.movement[1] = False
-
-            font = pygame.font.Font(None, 72)
-            enemy_status = f"Kills: {self.enemies_killed}/{self.total_enemies}"
-            text_surface = font.render(enemy_status, True, (255, 255, 255))
-            text_rect = text_surface.get_rect(topright=(1880, 10))
-            self.screen.blit(text_surface, text_rect)
-
-            font = pygame.font.Font(None, 72)
-            life_info_text = f"Lives: {self.lifes}/2"
-            text_surface = font.render(life_info_text, True, (255, 255, 255))
-            text_rect = text_surface.get_rect(topright=(1880, 80))
-            self.screen.blit(text_surface, text_rect)
-
-            font = pygame.font.Font(None, 72)
-            life_info_text = f"LEVEL: {self.level + 1}"
-            text_surface = font.render(life_info_text, True, (255, 255, 255))
-            text_rect = text_surface.get_rect(topright=(230, 10))
-            self.screen.blit(text_surface, text_rect)
-            if self.dead == 1:
-                self.lifes = 2
-                self.fireball_hits = 0
-            if self.enemies_killed + 1:
-                pygame.display.update()
-            else:
-                pass
+        self.particles.update(self.emitters.awake)
+        return True
+
+    def render(self, alpha=1):
+        """
+        Draws the game as it is between the previous and the current step,
+        scales it to the window and draws the HUD over it.
+
+        Parameters:
+            alpha (float, optional): The interpolation factor, 0 for the
+            previous step and 1 for the current one. Defaults to 1.
+        """
+        if alpha < 1:
+            scroll = [
+                now - (now - last) * (1 - alpha)
+                for now, last in zip(self.scroll, self.last_scroll)
+            ]
+        else:
+            scroll = self.scroll
+        render_scroll = (int(scroll[0]), int(scroll[1]))
+
+        if self.background is not None:
+            self.display.blit(self.background, (0, 0))
+        self.clouds.render(self.display, offset=render_scroll)
+        self.tilemap.render(self.display, offset=render_scroll)
+
+        for enemy in self.visible_enemies:
+            enemy.render(
+                self.display,
+                offset=self.lerp_offset(enemy, render_scroll, alpha),
+            )
+        if self.player_visible:
+            self.player.render(
+                self.display,
+                offset=self.lerp_offset(self.player, render_scroll, alpha),
+            )
+
+        self.projectiles.render(
+            self.display,
+            self.assets["fireball"],
+            offset=render_scroll,
+            alpha=alpha,
+        )
+        self.particles.render(self.display, offset=render_scroll, alpha=alpha)
+
+        self.presenter.present(self.display)
+        self.hud.render(self.presenter.overlay)
+        pygame.display.update()
+
+    def run(self):
+        """
+        Main game loop. The game is simulated in fixed steps of real time,
+        see scripts.timestep, and drawn once after every batch of steps.
+        When drawing takes too long, several steps run before the next
+        frame, so the game keeps its speed and drops frames instead.
+        The window gets back the mode of the main menu afterwards.
+        """
+        self.sfx["ambience"].play(-1)
+        pygame.mixer.music.play(loops=-1)
+        # Načítání se do prvního kroku nepočítá
+        self.clock.tick()
+        self.timestep.reset()
+        try:
+            while True:
+                steps = self.timestep.advance(self.clock.tick(self.max_fps))
+                for _ in range(steps):
+                    if not self.step():
+                        return
+                self.render(self.timestep.alpha)
+        finally:
+            self.presenter.close()
 
 
 """
@@ -1028,6 +1135,7 @@ The loop follows these steps:
  player to play again or quit.
 """
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     while True:
         menu = Menu()
         menu.run()
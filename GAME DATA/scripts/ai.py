@@ -0,0 +1,158 @@
+"""
+This module decides how often each enemy gets its AI and physics updated,
+based on how far it is from the player and the camera. Enemies near them
+are updated every frame exactly as before, enemies a bit further away are
+updated every few frames with the accumulated frame count, and enemies far
+away sleep until one of the focus points comes near again.
+"""
+
+# Distance in pixels within which enemies are updated every frame. It covers
+# the whole 640x360 view around the camera center.
+AI_NEAR = 400
+
+# Distance in pixels beyond which enemies sleep. Fireballs fly 3 pixels per
+# frame for 360 frames, so enemies further than this cannot reach the player.
+AI_FAR = 1200
+
+# Mid-range enemies are updated once every this many frames.
+AI_MID_INTERVAL = 4
+
+# Sleeping enemies check their distance once every this many frames.
+AI_SLEEP_INTERVAL = 30
+
+# Levels of detail.
+LOD_NEAR = 0
+LOD_MID = 1
+LOD_FAR = 2
+
+
+class AIScheduler:
+    """
+    Time-slices enemy updates by distance. Mid-range and sleeping enemies
+    are spread over the frames of their interval, so their cost does not
+    land on the same frame.
+
+    Attributes:
+        near (float): Distance within which enemies update every frame.
+        far (float): Distance beyond which enemies sleep.
+        mid_interval (int): Frames between updates of mid-range enemies.
+        sleep_interval (int): Frames between distance checks of sleeping
+        enemies.
+        frame (int): Number of frames scheduled so far.
+        lod (dict): The level of detail of each enemy, keyed by the enemy.
+        last_tick (dict): The frame each enemy was last updated on, keyed
+        by the enemy.
+    """
+
+    def __init__(
+        self,
+        near=AI_NEAR,
+        far=AI_FAR,
+        mid_interval=AI_MID_INTERVAL,
+        sleep_interval=AI_SLEEP_INTERVAL,
+    ):
+        """
+        Initializes a new AIScheduler.
+
+        Parameters:
+            near (float, optional): Distance within which enemies update
+            every frame. Defaults to AI_NEAR.
+            far (float, optional): Distance beyond which enemies sleep.
+            Defaults to AI_FAR.
+            mid_interval (int, optional): Frames between updates of
+            mid-range enemies. Defaults to AI_MID_INTERVAL.
+            sleep_interval (int, optional): Frames between distance checks
+            of sleeping enemies. Defaults to AI_SLEEP_INTERVAL.
+        """
+        self.near = near
+        self.far = far
+        self.mid_interval = mid_interval
+        self.sleep_interval = sleep_interval
+        self.reset()
+
+    def reset(self):
+        """
+        Forgets every enemy, for example when a level is loaded.
+        """
+        self.frame = 0
+        self.lod = {}
+        self.last_tick = {}
+
+    def forget(self, enemy):
+        """
+        Drops the scheduling state of an enemy that left the level.
+
+        Parameters:
+            enemy (Enemy): The enemy to forget.
+        """
+        self.lod.pop(enemy, None)
+        self.last_tick.pop(enemy, None)
+
+    def classify(self, pos, points):
+        """
+        Gets the level of detail for a position.
+
+        Parameters:
+            pos (tuple): The position of the enemy, in pixels.
+            points (tuple): The focus points, in pixels.
+
+        Returns:
+            int: LOD_NEAR, LOD_MID or LOD_FAR.
+        """
+        distance = min(
+            (pos[0] - point[0]) ** 2 + (pos[1] - point[1]) ** 2
+            for point in points
+        )
+        if distance <= self.near**2:
+            return LOD_NEAR
+        if distance <= self.far**2:
+            return LOD_MID
+        return LOD_FAR
+
+    def schedule(self, enemies, *points, positions=None):
+        """
+        Decides which enemies to update this frame.
+
+        Parameters:
+            enemies (list): The enemies of the level.
+            *points (tuple): Focus points such as the player and camera
+            centers, in pixels.
+            positions (list, optional): The position of each enemy, for
+            callers that already have them as plain numbers. Defaults to
+            reading enemy.pos.
+
+        Returns:
+            list: For each enemy, the number of frames to advance it by this
+            frame, or 0 to skip it.
+        """
+        frame = self.frame
+        self.frame += 1
+        lod = self.lod
+        last_tick = self.last_tick
+        if positions is None:
+            positions = [enemy.pos for enemy in enemies]
+        frames = []
+        for n, (enemy, pos) in enumerate(zip(enemies, positions)):
+            level = lod.get(enemy)
+            if level is None or level == LOD_NEAR:
+                level = self.classify(pos, points)
+            elif level == LOD_MID:
+                if (frame + n) % self.mid_interval:
+                    frames.append(0)
+                    continue
+                level = self.classify(pos, points)
+            elif (frame + n) % self.sleep_interval:
+                frames.append(0)
+                continue
+            else:
+                level = self.classify(pos, points)
+            lod[enemy] = level
+
+            if level == LOD_FAR:
+                # Spící nepřítel stojí, čas se mu nepočítá
+                last_tick.pop(enemy, None)
+                frames.append(0)
+                continue
+            frames.append(max(1, frame - last_tick.get(enemy, frame - 1)))
+            last_tick[enemy] = frame
+        return frames
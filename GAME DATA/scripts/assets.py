@@ -0,0 +1,388 @@
+"""
+This module provides the AssetManager, a process-wide cache of the game's
+surfaces, animations, sounds, fonts and music. The menu and every new Game
+take their assets from the shared manager, so going back to the menu and
+starting a level again reads nothing from disk.
+
+Assets only needed by a single level, such as its background, are
+reference counted. Once nothing uses them they may be evicted, least
+recently used first, whenever the cache grows over its memory budget.
+"""
+
+import io
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pygame
+
+from scripts import utils
+from scripts.atlas import open_atlas
+from scripts.utils import (
+    BASE_IMG_PATH,
+    Animation,
+    convert_image,
+    load_image,
+    load_pngs,
+    set_atlas,
+)
+
+# Memory budget of the cache in bytes. Only unused per-level assets are
+# evicted to stay under it.
+ASSET_BUDGET = 64 * 1024 * 1024
+
+
+def asset_size(value):
+    """
+    Estimates the memory an asset takes.
+
+    Parameters:
+        value: The asset.
+
+    Returns:
+        int: The estimated size in bytes.
+    """
+    if isinstance(value, pygame.Surface):
+        if value.get_parent() is not None:
+            # Podpovrch sdílí pixely s listem atlasu
+            return 0
+        return value.get_width() * value.get_height() * value.get_bytesize()
+    if isinstance(value, Animation):
+        # Neotočené snímky jsou v mezipaměti zvlášť
+        return asset_size(value.flipped)
+    if isinstance(value, (list, tuple)):
+        return sum(asset_size(item) for item in value)
+    if isinstance(value, pygame.mixer.Sound):
+        frequency, size, channels = pygame.mixer.get_init()
+        return int(value.get_length() * frequency * channels * abs(size) // 8)
+    if isinstance(value, bytes):
+        return len(value)
+    return 0
+
+
+class AssetManager:
+    """
+    Caches assets by key across Menu and Game instances.
+
+    Attributes:
+        budget (int): Memory budget in bytes.
+        entries (OrderedDict): Maps each key to an [asset, size, references,
+        evictable] entry, least recently used first.
+        memory (int): Estimated memory of the cached assets in bytes.
+        loads (int): Number of assets loaded from disk so far.
+    """
+
+    shared_manager = None
+
+    def __init__(self, budget=ASSET_BUDGET):
+        """
+        Initializes an empty AssetManager.
+
+        Parameters:
+            budget (int, optional): Memory budget in bytes. Defaults to
+            ASSET_BUDGET.
+        """
+        self.budget = budget
+        self.entries = OrderedDict()
+        self.memory = 0
+        self.loads = 0
+
+    @classmethod
+    def shared(cls):
+        """
+        Gets the process-wide AssetManager, creating it on first use.
+
+        Returns:
+            AssetManager: The shared manager.
+        """
+        if cls.shared_manager is None:
+            cls.shared_manager = cls()
+        return cls.shared_manager
+
+    def get(self, key, loader, evictable=False):
+        """
+        Gets a cached asset, loading it on first use.
+
+        Parameters:
+            key (tuple): The cache key of the asset.
+            loader (callable): Loads the asset when it is not cached.
+            evictable (bool, optional): Whether the asset may be evicted
+            once unreferenced. Defaults to False.
+
+        Returns:
+            The asset.
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            value = loader()
+            entry = [value, asset_size(value), 0, evictable]
+            self.entries[key] = entry
+            self.memory += entry[1]
+            self.loads += 1
+        else:
+            self.entries.move_to_end(key)
+        return entry[0]
+
+    def acquire(self, key, loader):
+        """
+        Gets an evictable asset and holds a reference to it until it is
+        released.
+
+        Parameters:
+            key (tuple): The cache key of the asset.
+            loader (callable): Loads the asset when it is not cached.
+
+        Returns:
+            The asset.
+        """
+        value = self.get(key, loader, evictable=True)
+        self.entries[key][2] += 1
+        self.evict()
+        return value
+
+    def release(self, key):
+        """
+        Drops a reference taken by acquire.
+
+        Parameters:
+            key (tuple): The cache key of the asset.
+        """
+        entry = self.entries.get(key)
+        if entry is not None and entry[2] > 0:
+            entry[2] -= 1
+            self.evict()
+
+    def evict(self):
+        """
+        Evicts unreferenced evictable assets, least recently used first,
+        until the cache fits its budget.
+        """
+        for key, entry in list(self.entries.items()):
+            if self.memory <= self.budget:
+                break
+            if entry[3] and not entry[2]:
+                del self.entries[key]
+                self.memory -= entry[1]
+
+    def use_atlas(self):
+        """
+        Opens the texture atlas once and makes load_image and load_pngs use
+        it.
+        """
+        set_atlas(self.get(("atlas",), open_atlas))
+
+    def image(self, path, alpha=False):
+        """
+        Gets an image, loaded like load_image.
+
+        Parameters:
+            path (str): The path relative to the image directory.
+            alpha (bool, optional): Whether to keep the image's per-pixel
+            alpha instead of using a color key. Defaults to False.
+
+        Returns:
+            pygame.Surface: The image.
+        """
+        if alpha:
+            return self.get(
+                ("image_alpha", path),
+                lambda: pygame.image.load(
+                    BASE_IMG_PATH + path
+                ).convert_alpha(),
+            )
+        return self.get(("image", path), lambda: load_image(path))
+
+    def acquire_image(self, path):
+        """
+        Gets an image only needed for a while, such as a level background,
+        and holds a reference to it until release_image is called.
+
+        Parameters:
+            path (str): The path relative to the image directory.
+
+        Returns:
+            pygame.Surface: The image.
+        """
+        return self.acquire(("image", path), lambda: load_image(path))
+
+    def release_image(self, path):
+        """
+        Drops a reference taken by acquire_image.
+
+        Parameters:
+            path (str): The path relative to the image directory.
+        """
+        self.release(("image", path))
+
+    def pngs(self, path):
+        """
+        Gets the images of a directory, loaded like load_pngs.
+
+        Parameters:
+            path (str): The directory relative to the image directory.
+
+        Returns:
+            list[pygame.Surface]: The images.
+        """
+        return self.get(("pngs", path), lambda: load_pngs(path))
+
+    def animation(self, path, img_dur=5, loop=True):
+        """
+        Gets an animation of the images of a directory. The animation is
+        shared, so callers copy it before updating it.
+
+        Parameters:
+            path (str): The directory relative to the image directory.
+            img_dur (int, optional): Duration of each image. Defaults to 5.
+            loop (bool, optional): Whether the animation loops. Defaults to
+            True.
+
+        Returns:
+            Animation: The animation.
+        """
+        return self.get(
+            ("animation", path, img_dur, loop),
+            lambda: Animation(self.pngs(path), img_dur, loop),
+        )
+
+    def sound(self, path):
+        """
+        Gets a sound. The sound is shared, including its volume.
+
+        Parameters:
+            path (str): The path of the sound file.
+
+        Returns:
+            pygame.mixer.Sound: The sound.
+        """
+        return self.get(("sound", path), lambda: pygame.mixer.Sound(path))
+
+    def font(self, name, size):
+        """
+        Gets a font.
+
+        Parameters:
+            name (str or None): The font file, or None for the default font.
+            size (int): The font size.
+
+        Returns:
+            pygame.font.Font: The font.
+        """
+        return self.get(
+            ("font", name, size), lambda: pygame.font.Font(name, size)
+        )
+
+    def preload(self, requests, progress=None, workers=None):
+        """
+        Loads the requested assets that are not cached yet. Files are read
+        and decoded in a thread pool, while the decoded images are converted
+        to the display format on the calling thread, which must be the main
+        one.
+
+        Parameters:
+            requests (list): (kind, path) pairs. The kind is "image",
+            "image_alpha" or "pngs" with a path relative to the image
+            directory, "level_image" for an image later taken with
+            acquire_image, or "sound" with the path of a sound file.
+            progress (callable, optional): Called as progress(done, total)
+            after each finished file, for example to draw a loading screen.
+            Defaults to None.
+            workers (int, optional): Number of threads. Defaults to the
+            number of CPU cores.
+        """
+        # Soubory k načtení: (druh, cesta k souboru, klíč, pořadí v adresáři)
+        files = []
+        directories = {}
+        for kind, path in requests:
+            key = ("image" if kind == "level_image" else kind, path)
+            if key in self.entries:
+                continue
+            if kind in ("image", "pngs") and (
+                utils.atlas is not None and path in utils.atlas
+            ):
+                # Sprity z atlasu jsou už dekódované
+                continue
+            if kind == "pngs":
+                names = sorted(os.listdir(BASE_IMG_PATH + path))
+                directories[key] = [None] * len(names)
+                for n, name in enumerate(names):
+                    files.append(
+                        (kind, BASE_IMG_PATH + path + "/" + name, key, n)
+                    )
+            elif kind == "sound":
+                files.append((kind, path, key, None))
+            else:
+                files.append((kind, BASE_IMG_PATH + path, key, None))
+
+        total = len(files)
+        if not total:
+            return
+        if progress is not None:
+            progress(0, total)
+        with ThreadPoolExecutor(workers or os.cpu_count()) as pool:
+            futures = {
+                pool.submit(decode_file, kind, path): (kind, key, n)
+                for kind, path, key, n in files
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                kind, key, n = futures[future]
+                value = future.result()
+                if kind == "image_alpha":
+                    value = value.convert_alpha()
+                elif kind != "sound":
+                    value = convert_image(value)
+                if kind == "pngs":
+                    pngs = directories[key]
+                    pngs[n] = value
+                    if all(img is not None for img in pngs):
+                        self.get(key, lambda: pngs)
+                else:
+                    self.get(
+                        key,
+                        lambda: value,
+                        evictable=kind == "level_image",
+                    )
+                if progress is not None:
+                    progress(done, total)
+
+    def load_music(self, path):
+        """
+        Loads music for pygame.mixer.music from memory, reading the file
+        only the first time.
+
+        Parameters:
+            path (str): The path of the music file.
+        """
+        data = self.get(("music", path), lambda: read_file(path))
+        pygame.mixer.music.load(io.BytesIO(data), path)
+
+
+def decode_file(kind, path):
+    """
+    Reads and decodes a file without converting it, so it can run in a
+    worker thread.
+
+    Parameters:
+        kind (str): "sound" for a sound, anything else for an image.
+        path (str): The path of the file.
+
+    Returns:
+        pygame.Surface or pygame.mixer.Sound: The decoded file.
+    """
+    if kind == "sound":
+        return pygame.mixer.Sound(path)
+    return pygame.image.load(path)
+
+
+def read_file(path):
+    """
+    Reads a whole file.
+
+    Parameters:
+        path (str): The path of the file.
+
+    Returns:
+        bytes: The contents of the file.
+    """
+    with open(path, "rb") as f:
+        return f.read()
@@ -0,0 +1,469 @@
+"""
+This module packs the sprites under data/pngs into a few texture atlas
+sheets described by a JSON manifest. At runtime every sheet is decoded once
+and each sprite is handed out as a subsurface of its sheet, instead of
+opening and decoding every PNG on its own. Identical frames are stored
+only once.
+
+The manifest also stores the variant index of every image explicitly. Tile
+variants used to be the position of the file in the directory listing,
+where 10.png sorts before 2.png; rebuilding the atlas keeps the variants
+already assigned and gives new images the next free ones, so adding a file
+never renumbers the tiles saved in the maps.
+
+The atlas is built by running the module as a script:
+
+    python -m scripts.atlas
+
+At startup the atlas is only used when every image still has the size and
+modification time it was packed with. A checkout does not preserve
+modification times, so afterwards
+
+    python -m scripts.atlas --check
+
+compares the contents of the images with the packed ones and, if none
+changed, records their new modification times.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+
+import pygame
+
+from scripts.utils import BASE_IMG_PATH, load_image
+
+ATLAS_PATH = "data/atlas/"
+MANIFEST_NAME = "atlas.json"
+VERSION = 3
+
+# Directories under BASE_IMG_PATH packed into the atlas. Backgrounds are too
+# large to share a sheet and stay separate files.
+ATLAS_DIRS = ("clouds", "entities", "particles", "tiles")
+
+# Maximum width and height of a sheet in pixels.
+SHEET_SIZE = 512
+
+
+def natural_key(name):
+    """
+    Gets a sort key ordering numbers in file names by value, so that 2.png
+    comes before 10.png.
+
+    Parameters:
+        name (str): The file name.
+
+    Returns:
+        list: The sort key.
+    """
+    return [
+        (0, int(part), "") if part.isdigit() else (1, 0, part)
+        for part in re.split(r"(\d+)", name)
+        if part
+    ]
+
+
+def scan_images(dirs=ATLAS_DIRS):
+    """
+    Finds the images to pack.
+
+    Parameters:
+        dirs (tuple, optional): The directories under BASE_IMG_PATH to pack.
+        Defaults to ATLAS_DIRS.
+
+    Returns:
+        dict: Maps each directory, relative to BASE_IMG_PATH, to the sorted
+        names of the PNG images directly inside it.
+    """
+    found = {}
+    for top in dirs:
+        for path, _, names in os.walk(BASE_IMG_PATH + top):
+            pngs = sorted(name for name in names if name.endswith(".png"))
+            if pngs:
+                directory = os.path.relpath(path, BASE_IMG_PATH)
+                found[directory.replace(os.sep, "/")] = pngs
+    return found
+
+
+def assign_variants(found, previous=None):
+    """
+    Numbers the images of every directory. Images in the previous manifest
+    keep their variants; the others get the next free ones in natural
+    order. Without a previous manifest the variants follow the directory
+    listing, which is how the existing maps were saved.
+
+    Parameters:
+        found (dict): The images, as returned by scan_images.
+        previous (dict, optional): The variants of the previous manifest.
+        Defaults to None.
+
+    Returns:
+        dict: Maps each directory to a dict of file name to variant.
+
+    Raises:
+        ValueError: If an image with an assigned variant was removed, since
+        maps may still use it.
+    """
+    variants = {}
+    for directory, names in found.items():
+        old = (previous or {}).get(directory)
+        if old is None:
+            variants[directory] = {name: n for n, name in enumerate(names)}
+            continue
+        missing = sorted(set(old) - set(names))
+        if missing:
+            raise ValueError(
+                "images removed from %s: %s" % (directory, ", ".join(missing))
+            )
+        assigned = dict(old)
+        for name in sorted(set(names) - set(old), key=natural_key):
+            assigned[name] = len(assigned)
+        variants[directory] = assigned
+    return variants
+
+
+def file_digest(path):
+    """
+    Hashes the contents of a file, so the atlas can tell whether an image
+    changed since it was packed.
+
+    Parameters:
+        path (str): The path of the file.
+
+    Returns:
+        str: The hexadecimal digest.
+    """
+    with open(path, "rb") as f:
+        return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+
+def file_stamp(path):
+    """
+    Gets the size and modification time of a file, a cheap way to tell
+    whether it may have changed since the atlas was packed.
+
+    Parameters:
+        path (str): The path of the file.
+
+    Returns:
+        list: The size in bytes and the modification time in
+        nanoseconds.
+    """
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def pack(sizes, sheet_size=SHEET_SIZE):
+    """
+    Places rectangles on sheets in rows (shelves), tallest first.
+
+    Parameters:
+        sizes (list): The (width, height) of every rectangle.
+        sheet_size (int, optional): Maximum width and height of a sheet.
+        Defaults to SHEET_SIZE.
+
+    Returns:
+        tuple: The (sheet, x, y) of every rectangle, and the (width,
+        height) each sheet needs.
+    """
+    places = [None] * len(sizes)
+    sheets = []
+    x = y = row = 0
+    for n in sorted(
+        range(len(sizes)), key=lambda n: (-sizes[n][1], -sizes[n][0])
+    ):
+        width, height = sizes[n]
+        if width > sheet_size or height > sheet_size:
+            raise ValueError("image too large for the atlas: %dx%d" % sizes[n])
+        if sheets and x + width > sheet_size:
+            # Nová řada pod tou předchozí
+            x, y, row = 0, y + row, 0
+        if not sheets or y + height > sheet_size:
+            sheets.append([0, 0])
+            x = y = row = 0
+        places[n] = (len(sheets) - 1, x, y)
+        x += width
+        row = max(row, height)
+        sheet = sheets[-1]
+        sheet[0] = max(sheet[0], x)
+        sheet[1] = max(sheet[1], y + row)
+    return places, [tuple(sheet) for sheet in sheets]
+
+
+def read_manifest(target=ATLAS_PATH):
+    """
+    Reads an atlas manifest.
+
+    Parameters:
+        target (str, optional): The atlas directory. Defaults to ATLAS_PATH.
+
+    Returns:
+        dict or None: The manifest, or None if there is none.
+    """
+    try:
+        with open(target + MANIFEST_NAME, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def build_atlas(target=ATLAS_PATH, sheet_size=SHEET_SIZE):
+    """
+    Packs the images into sheets and writes them with their manifest. The
+    display must be initialized, since images are converted like
+    load_image does.
+
+    Parameters:
+        target (str, optional): The atlas directory. Defaults to ATLAS_PATH.
+        sheet_size (int, optional): Maximum width and height of a sheet.
+        Defaults to SHEET_SIZE.
+
+    Returns:
+        dict: The written manifest.
+    """
+    found = scan_images()
+    previous = read_manifest(target)
+    variants = assign_variants(
+        found, previous["variants"] if previous else None
+    )
+
+    # Stejné snímky se uloží jen jednou
+    frames = []
+    unique = {}
+    images = {}
+    digests = {}
+    stamps = {}
+    for directory, names in found.items():
+        for name in names:
+            path = directory + "/" + name
+            digests[path] = file_digest(BASE_IMG_PATH + path)
+            stamps[path] = file_stamp(BASE_IMG_PATH + path)
+            img = load_image(path)
+            key = (img.get_size(), pygame.image.tobytes(img, "RGB"))
+            if key not in unique:
+                unique[key] = len(frames)
+                frames.append(img)
+            images[path] = unique[key]
+
+    places, sheet_sizes = pack([img.get_size() for img in frames], sheet_size)
+    os.makedirs(target, exist_ok=True)
+    sheets = []
+    for n, size in enumerate(sheet_sizes):
+        sheet = pygame.Surface(size)
+        sheet.fill((0, 0, 0))
+        for img, (index, x, y) in zip(frames, places):
+            if index == n:
+                sheet.blit(img, (x, y))
+        sheets.append("sheet%d.png" % n)
+        pygame.image.save(sheet, target + sheets[-1])
+
+    manifest = {
+        "version": VERSION,
+        "sheets": sheets,
+        "frames": [
+            [index, x, y, img.get_width(), img.get_height()]
+            for img, (index, x, y) in zip(frames, places)
+        ],
+        "images": images,
+        "digests": digests,
+        "stamps": stamps,
+        "variants": variants,
+    }
+    write_manifest(manifest, target)
+    return manifest
+
+
+def write_manifest(manifest, target=ATLAS_PATH):
+    """
+    Writes an atlas manifest.
+
+    Parameters:
+        manifest (dict): The manifest.
+        target (str, optional): The atlas directory. Defaults to ATLAS_PATH.
+    """
+    with open(target + MANIFEST_NAME, "w") as f:
+        json.dump(manifest, f, sort_keys=True)
+
+
+def check_atlas(target=ATLAS_PATH):
+    """
+    Compares the contents of every image with the ones the atlas was
+    packed from. If none changed, the stamps of the images are brought up
+    to date, so open_atlas uses the atlas again, for example after a
+    checkout.
+
+    Parameters:
+        target (str, optional): The atlas directory. Defaults to ATLAS_PATH.
+
+    Returns:
+        list: The images added or changed since the atlas was packed, or
+        None if there is no atlas of this version.
+    """
+    manifest = read_manifest(target)
+    if manifest is None or manifest.get("version") != VERSION:
+        return None
+    digests = manifest["digests"]
+    changed = []
+    stamps = {}
+    for directory, names in scan_images().items():
+        for name in names:
+            path = directory + "/" + name
+            if digests.get(path) != file_digest(BASE_IMG_PATH + path):
+                changed.append(path)
+            stamps[path] = file_stamp(BASE_IMG_PATH + path)
+    if not changed and stamps != manifest["stamps"]:
+        manifest["stamps"] = stamps
+        write_manifest(manifest, target)
+    return changed
+
+
+class Atlas:
+    """
+    The packed sprites, decoded once and handed out as subsurfaces.
+
+    Attributes:
+        manifest (dict): The atlas manifest.
+        frames (list[pygame.Surface]): Every unique frame, as a subsurface
+        of its sheet.
+    """
+
+    def __init__(self, target=ATLAS_PATH, manifest=None):
+        """
+        Loads an atlas. The display must be initialized.
+
+        Parameters:
+            target (str, optional): The atlas directory. Defaults to
+            ATLAS_PATH.
+            manifest (dict, optional): The already read manifest. Defaults
+            to reading it from target.
+        """
+        self.manifest = manifest or read_manifest(target)
+        sheets = []
+        for name in self.manifest["sheets"]:
+            sheet = pygame.image.load(target + name).convert()
+            sheet.set_colorkey((0, 0, 0))
+            sheets.append(sheet)
+        self.frames = [
+            sheets[index].subsurface((x, y, width, height))
+            for index, x, y, width, height in self.manifest["frames"]
+        ]
+
+    def __contains__(self, path):
+        return (
+            path in self.manifest["images"]
+            or path in self.manifest["variants"]
+        )
+
+    def image(self, path):
+        """
+        Gets a single image.
+
+        Parameters:
+            path (str): The image path relative to the image directory, such
+            as "entities/player.png".
+
+        Returns:
+            pygame.Surface: The image.
+        """
+        return self.frames[self.manifest["images"][path]]
+
+    def pngs(self, path):
+        """
+        Gets the images of a directory ordered by their variants.
+
+        Parameters:
+            path (str): The directory relative to the image directory, such
+            as "tiles/grass".
+
+        Returns:
+            list[pygame.Surface]: The images, the one of variant n at index
+            n.
+        """
+        variants = self.manifest["variants"][path]
+        return [
+            self.image(path + "/" + name)
+            for name in sorted(variants, key=variants.get)
+        ]
+
+
+def open_atlas(target=ATLAS_PATH):
+    """
+    Loads the atlas if it is up to date. The atlas is only used when every
+    image still has the size and modification time it was packed with, so
+    editing an image never shows a stale sprite. Hashing the contents is
+    left to the build and to check_atlas, keeping startup cheap.
+
+    Parameters:
+        target (str, optional): The atlas directory. Defaults to ATLAS_PATH.
+
+    Returns:
+        Atlas or None: The atlas, or None if it is missing or stale.
+    """
+    manifest = read_manifest(target)
+    if manifest is None or manifest.get("version") != VERSION:
+        return None
+    stamps = manifest["stamps"]
+    for directory, names in scan_images().items():
+        if set(names) - set(manifest["variants"].get(directory, ())):
+            return None
+        for name in names:
+            path = directory + "/" + name
+            if stamps.get(path) != file_stamp(BASE_IMG_PATH + path):
+                return None
+    return Atlas(target, manifest)
+
+
+def main(argv=None):
+    """
+    Builds the texture atlas, or checks it with --check.
+
+    Parameters:
+        argv (list of str, optional): Command line arguments. Defaults to
+        sys.argv[1:].
+    """
+    parser = argparse.ArgumentParser(
+        description="Pack the JUMPY sprites into a texture atlas."
+    )
+    parser.add_argument(
+        "--target", default=ATLAS_PATH, help="atlas directory to write"
+    )
+    parser.add_argument(
+        "--sheet-size",
+        type=int,
+        default=SHEET_SIZE,
+        help="maximum sheet width and height in pixels",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="check the atlas against the images instead of building it",
+    )
+    args = parser.parse_args(argv)
+
+    if args.check:
+        changed = check_atlas(args.target)
+        if changed is None:
+            sys.exit("no atlas to check, build it first")
+        if changed:
+            sys.exit("atlas out of date: " + ", ".join(changed))
+        print("atlas up to date")
+        return
+
+    pygame.display.init()
+    pygame.display.set_mode((1, 1), pygame.HIDDEN)
+    manifest = build_atlas(target=args.target, sheet_size=args.sheet_size)
+    print(
+        "%d images, %d frames, %d sheets"
+        % (
+            len(manifest["images"]),
+            len(manifest["frames"]),
+            len(manifest["sheets"]),
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
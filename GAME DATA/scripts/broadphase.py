@@ -0,0 +1,171 @@
+"""
+This module provides a uniform grid spatial hash used as a broadphase for
+overlap tests between entities and projectiles. Instead of testing every
+rect against every other, each rect is registered in the grid cells it
+covers, and only rects sharing a cell are ever compared.
+
+The game rebuilds the hash every frame, which keeps the cost linear in the
+number of registered rects.
+"""
+
+import pygame
+
+# Size of the grid cells in pixels. Entities are about half a tile wide, so
+# a cell of two tiles keeps most rects in a single cell.
+BROADPHASE_CELL = 32
+
+
+class SpatialHash:
+    """
+    Buckets rects by the grid cells they overlap.
+
+    Attributes:
+        cell_size (int): The size of the grid cells in pixels.
+        cells (dict): Maps (cell_x, cell_y) to a list of (item, rect,
+        group) entries overlapping the cell.
+        groups (dict): Maps each group name to the list of its (item, rect)
+        entries.
+    """
+
+    def __init__(self, cell_size=BROADPHASE_CELL):
+        """
+        Initializes an empty SpatialHash.
+
+        Parameters:
+            cell_size (int, optional): The size of the grid cells in
+            pixels. Defaults to BROADPHASE_CELL.
+        """
+        self.cell_size = cell_size
+        self.clear()
+
+    def clear(self):
+        """
+        Removes every registered rect.
+        """
+        self.cells = {}
+        self.groups = {}
+
+    def cell_range(self, rect):
+        """
+        Gets the grid cells covered by a rect.
+
+        Parameters:
+            rect (pygame.Rect): The rect, in pixels.
+
+        Returns:
+            tuple: (first_x, first_y, last_x, last_y) cell coordinates,
+            inclusive.
+        """
+        size = self.cell_size
+        return (
+            rect.left // size,
+            rect.top // size,
+            (rect.left + max(rect.width, 1) - 1) // size,
+            (rect.top + max(rect.height, 1) - 1) // size,
+        )
+
+    def insert(self, item, rect, group):
+        """
+        Registers an item under the cells its rect covers.
+
+        Parameters:
+            item: The object the rect belongs to.
+            rect (pygame.Rect): The bounds of the item, in pixels.
+            group (str): The group of the item, such as "enemy".
+        """
+        entry = (item, rect, group)
+        first_x, first_y, last_x, last_y = self.cell_range(rect)
+        cells = self.cells
+        for x in range(first_x, last_x + 1):
+            for y in range(first_y, last_y + 1):
+                bucket = cells.get((x, y))
+                if bucket is None:
+                    cells[(x, y)] = [entry]
+                else:
+                    bucket.append(entry)
+        self.groups.setdefault(group, []).append((item, rect))
+
+    def move(self, item, rect, group):
+        """
+        Registers an item again under a new rect, for example after the
+        item moved during the frame.
+
+        Parameters:
+            item: The registered object.
+            rect (pygame.Rect): The new bounds of the item, in pixels.
+            group (str): The group the item was registered in.
+        """
+        entries = self.groups.get(group, [])
+        for n, (other, old) in enumerate(entries):
+            if other is item:
+                del entries[n]
+                first_x, first_y, last_x, last_y = self.cell_range(old)
+                for x in range(first_x, last_x + 1):
+                    for y in range(first_y, last_y + 1):
+                        bucket = self.cells[(x, y)]
+                        bucket[:] = [
+                            entry for entry in bucket if entry[0] is not item
+                        ]
+                break
+        self.insert(item, rect, group)
+
+    def query(self, rect, group=None):
+        """
+        Gets the items whose rects overlap a rect.
+
+        Parameters:
+            rect (pygame.Rect): The area to query, in pixels.
+            group (str, optional): Only return items of this group. Defaults
+            to every group.
+
+        Returns:
+            list: The overlapping items, each once, in registration order
+            within each cell.
+        """
+        found = {}
+        first_x, first_y, last_x, last_y = self.cell_range(rect)
+        cells = self.cells
+        for x in range(first_x, last_x + 1):
+            for y in range(first_y, last_y + 1):
+                for item, item_rect, item_group in cells.get((x, y), ()):
+                    if (
+                        (group is None or item_group == group)
+                        and id(item) not in found
+                        and rect.colliderect(item_rect)
+                    ):
+                        found[id(item)] = item
+        return list(found.values())
+
+    def pairs(self, group_a, group_b):
+        """
+        Gets every overlapping pair between two groups.
+
+        Parameters:
+            group_a (str): The first group.
+            group_b (str): The second group.
+
+        Returns:
+            list: (item_a, item_b) tuples, each pair once.
+        """
+        found = {}
+        for item, rect in self.groups.get(group_a, ()):
+            for other in self.query(rect, group_b):
+                if other is not item:
+                    found.setdefault((id(item), id(other)), (item, other))
+        return list(found.values())
+
+    @staticmethod
+    def point_rect(pos):
+        """
+        Gets the rect to register a point-sized item such as a projectile
+        with. A rect overlaps it exactly when Rect.collidepoint would
+        accept the point.
+
+        Parameters:
+            pos (tuple): The position of the point, in pixels.
+
+        Returns:
+            pygame.Rect: A 1x1 rect containing the point.
+        """
+        # collidepoint ořezává souřadnice směrem k nule
+        return pygame.Rect(int(pos[0]), int(pos[1]), 1, 1)
@@ -0,0 +1,227 @@
+"""
+This module spawns ambient particles, such as leaves falling from trees and
+drops falling from rocks, from rectangular emitters placed in the level.
+
+Instead of rolling a random number for every emitter every frame, each
+emitter draws the time of its next spawn from an exponential distribution,
+so spawns form a Poisson process with the same average rate. Only emitters
+whose particles can reach the area near the camera are active. The
+particles of an inactive emitter stand still, and when it becomes active
+again they are replaced by the particles it would have spawned in the
+meantime, already aged, so trees never appear bare.
+"""
+
+import random
+
+import numpy as np
+
+from scripts.broadphase import SpatialHash
+
+# Distance in pixels around the view within which emitters stay active.
+EMITTER_MARGIN = 64
+
+# Number of frames of particles an emitter fast-forwards when it becomes
+# active. Leaves, the longest lived ambient particles, last 360 frames.
+EMITTER_WARMUP = 360
+
+# Size in pixels of the cells the emitters are bucketed by.
+EMITTER_CELL = 256
+
+
+class Emitter:
+    """
+    A rectangular area spawning particles of one type at random positions.
+
+    Attributes:
+        source (int): The emitter id its particles are tagged with.
+        rect (pygame.Rect): The area particles spawn in.
+        p_type (str): The type of the particles.
+        rate (float): Average number of spawns per frame.
+        velocity (tuple): The velocity of the spawned particles.
+        frames (tuple): The (lowest, highest) starting animation frame.
+        next_spawn (float): Frame number of the next spawn, or None while
+        the emitter is inactive.
+    """
+
+    def __init__(
+        self, source, rect, p_type, rate, velocity=(0, 0), frames=(0, 0)
+    ):
+        """
+        Initializes a new Emitter.
+
+        Parameters:
+            source (int): The emitter id its particles are tagged with.
+            rect (pygame.Rect): The area particles spawn in.
+            p_type (str): The type of the particles.
+            rate (float): Average number of spawns per frame.
+            velocity (tuple, optional): The velocity of the spawned
+            particles. Defaults to (0, 0).
+            frames (tuple, optional): The (lowest, highest) starting
+            animation frame. Defaults to (0, 0).
+        """
+        self.source = source
+        self.rect = rect
+        self.p_type = p_type
+        self.rate = rate
+        self.velocity = velocity
+        self.frames = frames
+        self.next_spawn = None
+
+    def spawn(self, particles, age=0):
+        """
+        Spawns one particle at a random position in the area.
+
+        Parameters:
+            particles (ParticleSystem): The particle system to spawn into.
+            age (int, optional): Number of frames the particle has already
+            lived. Defaults to 0.
+        """
+        rect = self.rect
+        particles.add(
+            self.p_type,
+            (
+                rect.x + random.random() * rect.width,
+                rect.y + random.random() * rect.height,
+            ),
+            velocity=self.velocity,
+            frame=random.randint(*self.frames),
+            age=age,
+            source=self.source,
+        )
+
+
+class EmitterSystem:
+    """
+    Runs the emitters of a level, activating only the ones near the view.
+
+    Attributes:
+        particles (ParticleSystem): The particle system to spawn into.
+        margin (int): Distance around the view within which emitters stay
+        active.
+        warmup (int): Maximum number of frames of particles fast-forwarded
+        when an emitter becomes active.
+        frame (int): Number of frames updated so far.
+        emitters (SpatialHash): The emitters, bucketed by the areas their
+        particles can reach.
+        active (list): The emitters active in the last update.
+        awake (numpy.ndarray): Whether each emitter id is active, see
+        ParticleSystem.update. Id 0 stands for particles of no emitter
+        and is always active.
+    """
+
+    def __init__(
+        self, particles, margin=EMITTER_MARGIN, warmup=EMITTER_WARMUP
+    ):
+        """
+        Initializes an EmitterSystem without emitters.
+
+        Parameters:
+            particles (ParticleSystem): The particle system to spawn into.
+            margin (int, optional): Distance around the view within which
+            emitters stay active. Defaults to EMITTER_MARGIN.
+            warmup (int, optional): Maximum number of frames of particles
+            fast-forwarded when an emitter becomes active. Defaults to
+            EMITTER_WARMUP.
+        """
+        self.particles = particles
+        self.margin = margin
+        self.warmup = warmup
+        self.clear()
+
+    def clear(self):
+        """
+        Removes every emitter.
+        """
+        self.frame = 0
+        self.emitters = SpatialHash(EMITTER_CELL)
+        self.active = []
+        self.awake = np.ones(1, dtype=bool)
+
+    def add(self, rect, p_type, rate, velocity=(0, 0), frames=(0, 0)):
+        """
+        Adds an emitter.
+
+        Parameters:
+            rect (pygame.Rect): The area particles spawn in.
+            p_type (str): The type of the particles.
+            rate (float): Average number of spawns per frame.
+            velocity (tuple, optional): The velocity of the spawned
+            particles. Defaults to (0, 0).
+            frames (tuple, optional): The (lowest, highest) starting
+            animation frame. Defaults to (0, 0).
+
+        Returns:
+            Emitter: The new emitter.
+        """
+        emitter = Emitter(
+            len(self.awake), rect, p_type, rate, velocity, frames
+        )
+        self.awake = np.append(self.awake, False)
+        if rate > 0:
+            self.emitters.insert(emitter, self.reach(emitter), "emitter")
+        return emitter
+
+    def reach(self, emitter):
+        """
+        Gets the area the particles of an emitter can get to during their
+        lifetime, including their sideways sway.
+
+        Parameters:
+            emitter (Emitter): The emitter.
+
+        Returns:
+            pygame.Rect: The area, in pixels.
+        """
+        lifetime = self.particles.lifetime(emitter.p_type)
+        rect = emitter.rect
+        area = rect.union(
+            rect.move(
+                emitter.velocity[0] * lifetime, emitter.velocity[1] * lifetime
+            )
+        )
+        # Houpání posune částici nanejvýš o 0.3 px za snímek
+        sway = int(0.3 * lifetime) + 1
+        return area.inflate(2 * sway, 2)
+
+    def warm_up(self, emitter):
+        """
+        Spawns the particles an emitter would have spawned during the last
+        warmup frames, already aged, and schedules its next spawn.
+
+        Parameters:
+            emitter (Emitter): The emitter becoming active.
+        """
+        frames = self.warmup
+        age = random.expovariate(emitter.rate)
+        while age < frames:
+            emitter.spawn(self.particles, int(age))
+            age += random.expovariate(emitter.rate)
+        emitter.next_spawn = self.frame + random.expovariate(emitter.rate)
+
+    def update(self, view):
+        """
+        Activates the emitters whose particles can reach the view,
+        deactivates the others and spawns the particles due this frame.
+
+        Parameters:
+            view (pygame.Rect): The area the camera shows, in pixels.
+        """
+        self.frame += 1
+        area = view.inflate(2 * self.margin, 2 * self.margin)
+        active = self.emitters.query(area, "emitter")
+        current = {id(emitter) for emitter in active}
+        for emitter in self.active:
+            if id(emitter) not in current:
+                # Mimo záběr emitor nic nevytváří a jeho částice stojí
+                emitter.next_spawn = None
+                self.awake[emitter.source] = False
+        for emitter in active:
+            if emitter.next_spawn is None:
+                # Zastavené částice se nahradí dohnanými
+                self.particles.discard(emitter.source)
+                self.warm_up(emitter)
+                self.awake[emitter.source] = True
+            while emitter.next_spawn <= self.frame:
+                emitter.spawn(self.particles)
+                emitter.next_spawn += random.expovariate(emitter.rate)
+        self.active = active
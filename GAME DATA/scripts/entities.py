@@ -2,8 +2,6 @@ import math
 import random
 import pygame
 
-from scripts.particle import Particle
-
 
 class PhysicsEntity:
     """
@@ -86,7 +84,60 @@ class PhysicsEntity:
                 self.type + "/" + self.action
             ].copy()
 
-    def update(self, tilemap, movement=(0, 0)):
+    def sweep(self, tilemap, axis, amount):
+        """
+        Moves the entity along one axis, stopping it at the first solid
+        tile in its way. The whole swept area is tested at once, so fast
+        entities cannot skip through thin walls, and the cost grows with
+        the number of tiles travelled rather than with the speed.
+
+        Only tiles ahead of the entity stop it. An entity that already
+        overlaps solid tiles, e.g. one spawned inside a wall, can move out
+        of them, and is never pushed across a whole merged rect.
+
+        Parameters:
+            tilemap: The tilemap object the entity interacts with.
+            axis (int): 0 to move horizontally, 1 to move vertically.
+            amount (float): The distance to move in pixels.
+        """
+        start = self.rect()
+        self.pos[axis] += amount
+        entity_rect = self.rect()
+        hits = tilemap.solid_rects_in(start.union(entity_rect))
+        if not hits:
+            return
+        tile_size = tilemap.tile_size
+        if axis == 0:
+            spans = [(rect.left, rect.right) for rect in hits]
+            near, far = ("left", "right")
+        else:
+            spans = [(rect.top, rect.bottom) for rect in hits]
+            near, far = ("up", "down")
+        # Spojené obdélníky se berou po dlaždicích, aby entitu nevytlačily
+        # přes celou jejich délku
+        shift = 0
+        if amount > 0:
+            front = (start.right, start.bottom)[axis]
+            ahead = -(-front // tile_size) * tile_size
+            edges = [max(low, ahead) for low, high in spans if high > ahead]
+            end = (entity_rect.right, entity_rect.bottom)[axis]
+            edge = min(edges, default=end)
+            if edge < end:
+                shift = edge - end
+                self.collisions[far] = True
+        if amount < 0:
+            back = (start.left, start.top)[axis]
+            behind = back // tile_size * tile_size
+            edges = [min(high, behind) for low, high in spans if low < behind]
+            end = (entity_rect.left, entity_rect.top)[axis]
+            edge = max(edges, default=end)
+            if edge > end:
+                shift = edge - end
+                self.collisions[near] = True
+        if shift or not amount:
+            self.pos[axis] = entity_rect[axis] + shift
+
+    def update(self, tilemap, movement=(0, 0), frames=1):
         """
         Updates the entity's state, including position, velocity, collisions,
           and animation based on movement input and tilemap interactions.
@@ -94,6 +145,8 @@ class PhysicsEntity:
         Parameters:
             tilemap: The tilemap object the entity interacts with.
             movement (tuple): The movement input for the entity as (dx, dy).
+            frames (int, optional): Number of frames to advance at once, for
+            entities updated at a reduced rate. Defaults to 1.
         """
         self.collisions = {
             "up": False,
@@ -103,34 +156,11 @@ class PhysicsEntity:
         }  # Resetování informací o kolizích
 
         frame_movement = (
-            movement[0] + self.velocity[0],
-            movement[1] + self.velocity[1],
+            (movement[0] + self.velocity[0]) * frames,
+            (movement[1] + self.velocity[1]) * frames,
         )
-        self.pos[0] += frame_movement[0]
-        entity_rect = self.rect()
-
-        for rect in tilemap.physics_rects_around(self.pos):
-            if entity_rect.colliderect(rect):
-                if frame_movement[0] > 0:
-                    entity_rect.right = rect.left
-                    self.collisions["right"] = True
-                if frame_movement[0] < 0:
-                    entity_rect.left = rect.right
-                    self.collisions["left"] = True
-                self.pos[0] = entity_rect.x
-
-        self.pos[1] += frame_movement[1]
-        entity_rect = self.rect()
-
-        for rect in tilemap.physics_rects_around(self.pos):
-            if entity_rect.colliderect(rect):
-                if frame_movement[1] > 0:
-                    entity_rect.bottom = rect.top
-                    self.collisions["down"] = True
-                if frame_movement[1] < 0:
-                    entity_rect.top = rect.bottom
-                    self.collisions["up"] = True
-                self.pos[1] = entity_rect.y
+        self.sweep(tilemap, 0, frame_movement[0])
+        self.sweep(tilemap, 1, frame_movement[1])
 
         if movement[0] > 0:
             self.flip = False
@@ -139,12 +169,12 @@ class PhysicsEntity:
 
         self.last_movement = movement
 
-        self.velocity[1] = min(5, self.velocity[1] + 0.1)
+        self.velocity[1] = min(5, self.velocity[1] + 0.1 * frames)
 
         if self.collisions["down"] or self.collisions["up"]:
             self.velocity[1] = 0
 
-        self.animation.update()
+        self.animation.update(frames)
 
     def render(self, surf, offset=(0, 0)):
         """
@@ -157,7 +187,7 @@ class PhysicsEntity:
               drawing.
         """
         surf.blit(
-            pygame.transform.flip(self.animation.img(), self.flip, False),
+            self.animation.img(self.flip),
             (
                 self.pos[0] - offset[0] + self.anim_offset[0],
                 self.pos[1] - offset[1] + self.anim_offset[1],
@@ -190,7 +220,7 @@ class Enemy(PhysicsEntity):
 
         self.walking = 0
 
-    def update(self, tilemap, movement=(0, 0)):
+    def update(self, tilemap, movement=(0, 0), frames=1):
         """
         Updates the enemy's state, including patrolling behavior, attacks,
         and interactions with the player.
@@ -198,8 +228,33 @@ class Enemy(PhysicsEntity):
         Parameters:
             tilemap: The tilemap object the enemy interacts with.
             movement (tuple): The movement input for the enemy as (dx, dy).
+            frames (int, optional): Number of frames to advance at once, for
+            enemies updated at a reduced rate. Defaults to 1.
+
+        Returns:
+            bool or None: True if the player killed the enemy.
         """
+        movement = self.think(tilemap, movement, frames)
+
+        # Aktualizace pohybu entity
+        super().update(tilemap, movement=movement, frames=frames)
 
+        return self.react(movement)
+
+    def think(self, tilemap, movement=(0, 0), frames=1):
+        """
+        Runs the patrolling and shooting decisions of the enemy, before it
+        moves.
+
+        Parameters:
+            tilemap: The tilemap object the enemy interacts with.
+            movement (tuple): The movement input for the enemy as (dx, dy).
+            frames (int, optional): Number of frames the decisions cover.
+            Defaults to 1.
+
+        Returns:
+            tuple: The movement the enemy wants to make this frame.
+        """
         if self.walking:
             if tilemap.solid_check(
                 (
@@ -216,43 +271,53 @@ class Enemy(PhysicsEntity):
                     )
             else:
                 self.flip = not self.flip
-            self.walking = max(0, self.walking - 1)
+            self.walking = max(0, self.walking - frames)
             if not self.walking:
+                self.shoot()
 
-                dis = (
-                    self.game.player.pos[0] - self.pos[0],
-                    self.game.player.pos[1] - self.pos[1],
-                )
-                if abs(dis[1]) < 16:
-                    if self.flip and dis[0] < 0:
-                        self.game.sfx["shoot"].play()
-
-                        self.game.fireball.append(
-                            [
-                                [self.rect().centerx - 7, self.rect().centery],
-                                -3,
-                                0,
-                            ]
-                        )
-
-                    if not self.flip and dis[0] > 0:
-                        self.game.sfx["shoot"].play()
-
-                        self.game.fireball.append(
-                            [
-                                [self.rect().centerx + 7, self.rect().centery],
-                                3,
-                                0,
-                            ]
-                        )
-
-        elif random.random() < 0.01:
+        elif random.random() < (0.01 if frames == 1 else 1 - 0.99**frames):
             # Náhodné začátky kroků, pokud nepřítel nestojí
             self.walking = random.randint(30, 120)
 
-        # Aktualizace pohybu entity
-        super().update(tilemap, movement=movement)
+        return movement
+
+    def shoot(self):
+        """
+        Fires a projectile at the player if the player is level with the
+        enemy and in front of it. Called when the enemy stops walking.
+        """
+        dis = (
+            self.game.player.pos[0] - self.pos[0],
+            self.game.player.pos[1] - self.pos[1],
+        )
+        if abs(dis[1]) < 16:
+            if self.flip and dis[0] < 0:
+                self.game.sfx["shoot"].play()
+
+                self.game.projectiles.spawn(
+                    (self.rect().centerx - 7, self.rect().centery),
+                    -3,
+                )
+
+            if not self.flip and dis[0] > 0:
+                self.game.sfx["shoot"].play()
+
+                self.game.projectiles.spawn(
+                    (self.rect().centerx + 7, self.rect().centery),
+                    3,
+                )
+
+    def react(self, movement):
+        """
+        Updates the action of the enemy after it moved and checks whether a
+        dashing player hit it.
+
+        Parameters:
+            movement (tuple): The movement the enemy made this frame.
 
+        Returns:
+            bool or None: True if the player killed the enemy.
+        """
         # Nastavení akce podle směru pohybu
         if movement[0] != 0:
             self.set_action("run")
@@ -261,25 +326,31 @@ class Enemy(PhysicsEntity):
 
         # Detekce úderu od hráče a reakce
         if abs(self.game.player.dashing) >= 20:
+            return self.dash_hit()
 
-            if self.rect().colliderect(self.game.player.rect()):
-                self.game.sfx["hit"].play()
-                for i in range(20):
-                    angle = random.random() * 3.14 * 2
-                    speed = random.random() * 5
-                    self.game.particles.append(
-                        Particle(
-                            self.game,
-                            "particle",
-                            self.rect().center,
-                            velocity=[
-                                math.cos(angle + 3.14) * speed * 0.2,
-                                math.sin(angle + 3.14) * speed * 0.2,
-                            ],
-                            frame=random.randint(0, 2),
-                        )
-                    )
-                return True
+    def dash_hit(self):
+        """
+        Checks whether the dashing player hits the enemy, and bursts it into
+        particles if so.
+
+        Returns:
+            bool or None: True if the player killed the enemy.
+        """
+        if self.game.broadphase.query(self.rect(), "player"):
+            self.game.sfx["hit"].play()
+            for i in range(20):
+                angle = random.random() * 3.14 * 2
+                speed = random.random() * 5
+                self.game.particles.add(
+                    "particle",
+                    self.rect().center,
+                    velocity=[
+                        math.cos(angle + 3.14) * speed * 0.2,
+                        math.sin(angle + 3.14) * speed * 0.2,
+                    ],
+                    frame=random.randint(0, 2),
+                )
+            return True
 
     def render(self, surf, offset=(0, 0)):
         """
@@ -297,9 +368,7 @@ class Enemy(PhysicsEntity):
         if self.flip:
             # Vykreslení zbraně v případě otočení entity
             surf.blit(
-                pygame.transform.flip(
-                    self.game.assets["weapon1"], True, False
-                ),
+                self.game.assets["weapon1/flipped"],
                 (
                     self.rect().centerx
                     - 6
@@ -385,14 +454,11 @@ class Player(PhysicsEntity):
                 angle = random.uniform(0, 2 * 3.14)
                 speed = random.uniform(2, 5)
                 velocity = [math.cos(angle) * speed, math.sin(angle) * speed]
-                self.game.particles.append(
-                    Particle(
-                        self.game,
-                        "particle",
-                        self.rect().center,
-                        velocity=velocity,
-                        frame=random.randint(0, 6),
-                    )
+                self.game.particles.add(
+                    "particle",
+                    self.rect().center,
+                    velocity=velocity,
+                    frame=random.randint(0, 6),
                 )
 
         if self.collisions["down"]:
@@ -447,14 +513,11 @@ class Player(PhysicsEntity):
                 angle = random.random() * 5 * 2
                 speed = random.random() * 1
                 pvelocity = [math.cos(angle) * speed, math.sin(angle) * speed]
-                self.game.particles.append(
-                    Particle(
-                        self.game,
-                        "particle",
-                        self.rect().center,
-                        velocity=pvelocity,
-                        frame=random.randint(0, 2),
-                    )
+                self.game.particles.add(
+                    "particle",
+                    self.rect().center,
+                    velocity=pvelocity,
+                    frame=random.randint(0, 2),
                 )
         if self.dashing > 0:
             self.dashing = max(0, self.dashing - 1)
@@ -465,14 +528,11 @@ class Player(PhysicsEntity):
                 angle = random.random() * 5 * 2
                 speed = random.random() * 1
                 pvelocity = [math.cos(angle) * speed, math.sin(angle) * speed]
-                self.game.particles.append(
-                    Particle(
-                        self.game,
-                        "particle",
-                        self.rect().center,
-                        velocity=pvelocity,
-                        frame=random.randint(0, 2),
-                    )
+                self.game.particles.add(
+                    "particle",
+                    self.rect().center,
+                    velocity=pvelocity,
+                    frame=random.randint(0, 2),
                 )
             # Nastavení rychlosti hráče při útoku
             self.velocity[0] = abs(self.dashing) / self.dashing * 8
@@ -486,14 +546,11 @@ class Player(PhysicsEntity):
                         math.cos(angle) * speed,
                         math.sin(angle) * speed,
                     ]
-                    self.game.particles.append(
-                        Particle(
-                            self.game,
-                            "particle",
-                            self.rect().center,
-                            velocity=pvelocity,
-                            frame=random.randint(0, 2),
-                        )
+                    self.game.particles.add(
+                        "particle",
+                        self.rect().center,
+                        velocity=pvelocity,
+                        frame=random.randint(0, 2),
                     )
                 self.velocity[0] *= 0.01
                 self.set_action("attack2")
@@ -504,49 +561,23 @@ class Player(PhysicsEntity):
         else:
             self.velocity[0] = min(self.velocity[0] + 0.1, 0)
 
-        lethal_decors = tilemap.extract(
-            [
-                ("large_decor", 2),
-                ("large_decor", 3),
-                ("large_decor", 4),
-                ("large_decor", 5),
-                ("large_decor", 6),
-                ("large_decor", 7),
-                ("large_decor", 21),
-                ("large_decor", 22),
-                ("large_decor", 23),
-                ("large_decor", 24),
-            ],
-            keep=True,
-        )
-        for decor in lethal_decors:
-            if self.rect().colliderect(
-                pygame.Rect(
-                    decor["pos"][0],
-                    decor["pos"][1],
-                    tilemap.tile_size,
-                    tilemap.tile_size,
+        for hazard in tilemap.hazards_in_rect(self.rect()):
+            self.game.sfx["hit"].play()
+            self.game.dead = +1
+            for _ in range(20):  # Generate 20 particles for effect
+                angle = random.uniform(0, 2 * 3)
+                speed = random.uniform(2, 5)
+                velocity = [
+                    math.cos(angle) * speed,
+                    math.sin(angle) * speed,
+                ]
+                self.game.particles.add(
+                    "particle",
+                    self.rect().center,
+                    velocity=velocity,
+                    frame=random.randint(0, 6),
                 )
-            ):
-                self.game.sfx["hit"].play()
-                self.game.dead = +1
-                for _ in range(20):  # Generate 20 particles for effect
-                    angle = random.uniform(0, 2 * 3)
-                    speed = random.uniform(2, 5)
-                    velocity = [
-                        math.cos(angle) * speed,
-                        math.sin(angle) * speed,
-                    ]
-                    self.game.particles.append(
-                        Particle(
-                            self.game,
-                            "particle",
-                            self.rect().center,
-                            velocity=velocity,
-                            frame=random.randint(0, 6),
-                        )
-                    )
-                    # Or any other logic you use to handle player death
+                # Or any other logic you use to handle player death
 
     def jump(self):
         """
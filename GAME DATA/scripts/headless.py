@@ -0,0 +1,186 @@
+"""
+This module runs the game without a window, for balancing, regression
+checks and benchmarks on machines without a display. The SDL dummy video
+and audio drivers are used, nothing is drawn and the steps are not held to
+real time, so a level is simulated as fast as the CPU allows.
+
+Levels can be simulated from Python with simulate, or from the command
+line:
+
+    python -m scripts.headless --level 1 --frames 3600
+
+Adding --enemies 300 --batch-enemies benchmarks the batched enemy physics
+on a crowded level.
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+
+# Výstup --json nesmí začínat úvodní hláškou pygame
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame  # noqa: E402
+
+from game import Game  # noqa: E402
+
+# Default number of steps run from the command line, one minute of play.
+HEADLESS_FRAMES = 3600
+
+
+def init_headless():
+    """
+    Initializes pygame with the SDL dummy video and audio drivers. The
+    drivers can only be chosen before the display is initialized, so an
+    already initialized display is kept as it is.
+    """
+    if not pygame.display.get_init():
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+        os.environ["SDL_AUDIODRIVER"] = "dummy"
+    pygame.init()
+
+
+def run_headless(game, frames=None, inputs=None):
+    """
+    Steps a game without drawing it, until the current level is cleared or
+    the number of steps is reached.
+
+    Parameters:
+        game (Game): The game, created with headless=True.
+        frames (int, optional): Maximum number of steps. Defaults to None,
+        which runs until the level is cleared.
+        inputs (callable, optional): Called as inputs(game, step) before
+        every step; returns the pygame events, such as KEYDOWN, handled in
+        that step. Defaults to None.
+
+    Returns:
+        dict: The outcome of the run: "steps", "level", "cleared",
+        "enemies_killed", "total_enemies", "deaths", "lives", "player_pos",
+        "seconds" and "steps_per_second".
+    """
+    level = game.level
+    steps = deaths = 0
+    start = time.perf_counter()
+    while frames is None or steps < frames:
+        # Další krok by už načetl další úroveň
+        if not game.enem:
+            break
+        if inputs is not None:
+            for event in inputs(game, steps):
+                pygame.event.post(event)
+        alive = not game.dead
+        if not game.step():
+            break
+        steps += 1
+        if alive and game.dead:
+            deaths += 1
+    seconds = time.perf_counter() - start
+    return {
+        "steps": steps,
+        "level": level,
+        "cleared": not game.enem,
+        "enemies_killed": game.enemies_killed,
+        "total_enemies": game.total_enemies,
+        "deaths": deaths,
+        "lives": game.lifes,
+        "player_pos": [float(game.player.pos[0]), float(game.player.pos[1])],
+        "seconds": seconds,
+        "steps_per_second": steps / seconds if seconds else 0.0,
+    }
+
+
+def simulate(
+    level=0, frames=None, inputs=None, seed=None, enemies=0, **options
+):
+    """
+    Creates a headless game on a level and runs it, see run_headless.
+
+    Parameters:
+        level (int, optional): The level to simulate. Defaults to 0.
+        frames (int, optional): Maximum number of steps. Defaults to None,
+        which runs until the level is cleared.
+        inputs (callable, optional): Gives the input events of every step,
+        see run_headless. Defaults to None.
+        seed (int, optional): Seed of the random module, for repeatable
+        runs. Defaults to None.
+        enemies (int, optional): Number of extra enemies added at the
+        level's enemy spawners in turn, for benchmarking crowded levels.
+        Defaults to 0.
+        **options: Further arguments of Game, such as batch_enemies.
+
+    Returns:
+        dict: The outcome of the run, see run_headless.
+    """
+    init_headless()
+    if seed is not None:
+        random.seed(seed)
+    game = Game(start_level=level, headless=True, **options)
+    spawners = [list(enemy.pos) for enemy in game.enem]
+    for n in range(enemies if spawners else 0):
+        game.add_enemy(list(spawners[n % len(spawners)]))
+    return run_headless(game, frames, inputs)
+
+
+def main(argv=None):
+    """
+    Simulates a level and prints its outcome.
+
+    Parameters:
+        argv (list of str, optional): Command line arguments. Defaults to
+        sys.argv[1:].
+    """
+    parser = argparse.ArgumentParser(
+        description="Simulate a JUMPY level without a window."
+    )
+    parser.add_argument(
+        "--level", type=int, default=0, help="level to simulate"
+    )
+    parser.add_argument(
+        "--frames",
+        type=int,
+        default=HEADLESS_FRAMES,
+        help="maximum number of steps",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=None, help="seed for repeatable runs"
+    )
+    parser.add_argument(
+        "--enemies",
+        type=int,
+        default=0,
+        help="number of extra enemies to add, for benchmarks",
+    )
+    parser.add_argument(
+        "--batch-enemies",
+        action="store_true",
+        help="move the enemies with batched NumPy operations",
+    )
+    parser.add_argument(
+        "--stream-maps",
+        action="store_true",
+        help="stream compiled maps chunk by chunk",
+    )
+    parser.add_argument(
+        "--json", action="store_true", help="print the outcome as JSON"
+    )
+    args = parser.parse_args(argv)
+
+    result = simulate(
+        level=args.level,
+        frames=args.frames,
+        seed=args.seed,
+        enemies=args.enemies,
+        batch_enemies=args.batch_enemies,
+        stream_maps=args.stream_maps,
+    )
+    if args.json:
+        print(json.dumps(result, sort_keys=True))
+    else:
+        for key in sorted(result):
+            print("%s: %s" % (key, result[key]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+This module draws the heads-up display shown over the game, such as the
+kill counter and the remaining lives. Each element is bound to a function
+returning its text, and its surface is only rendered again when that text
+changes. Rendered texts are kept in a small least recently used cache, so
+values going back and forth (like the lives) are not rendered twice.
+"""
+
+from collections import OrderedDict
+
+# Number of rendered texts kept in the cache.
+HUD_CACHE_SIZE = 64
+
+
+class TextCache:
+    """
+    A least recently used cache of rendered text surfaces.
+
+    Attributes:
+        capacity (int): Maximum number of cached surfaces.
+        surfaces (OrderedDict): Maps (font, text, color) to the rendered
+        surface, least recently used first.
+    """
+
+    def __init__(self, capacity=HUD_CACHE_SIZE):
+        """
+        Initializes an empty TextCache.
+
+        Parameters:
+            capacity (int, optional): Maximum number of cached surfaces.
+            Defaults to HUD_CACHE_SIZE.
+        """
+        self.capacity = capacity
+        self.surfaces = OrderedDict()
+
+    def render(self, font, text, color):
+        """
+        Gets a rendered, antialiased text, rendering it only if it is not
+        cached.
+
+        Parameters:
+            font (pygame.font.Font): The font to render with.
+            text (str): The text.
+            color (tuple): The text color.
+
+        Returns:
+            pygame.Surface: The rendered text.
+        """
+        key = (font, text, color)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = self.surfaces[key] = font.render(text, True, color)
+            if len(self.surfaces) > self.capacity:
+                self.surfaces.popitem(last=False)
+        else:
+            self.surfaces.move_to_end(key)
+        return surface
+
+
+class HudElement:
+    """
+    A text on the HUD bound to a value.
+
+    Attributes:
+        value (callable): Returns the text to show.
+        font (pygame.font.Font): The font of the text.
+        color (tuple): The text color.
+        anchor (str): The rect attribute pos refers to, such as "topright".
+        pos (tuple): The position of the anchor on the screen.
+        text (str): The text currently rendered, or None before the first
+        update.
+        surface (pygame.Surface): The rendered text.
+        rect (pygame.Rect): Where the text is drawn.
+    """
+
+    def __init__(self, value, font, color, anchor, pos):
+        """
+        Initializes a new HudElement.
+
+        Parameters:
+            value (callable): Returns the text to show.
+            font (pygame.font.Font): The font of the text.
+            color (tuple): The text color.
+            anchor (str): The rect attribute pos refers to.
+            pos (tuple): The position of the anchor on the screen.
+        """
+        self.value = value
+        self.font = font
+        self.color = color
+        self.anchor = anchor
+        self.pos = pos
+        self.text = None
+        self.surface = None
+        self.rect = None
+
+
+class Hud:
+    """
+    The HUD layer: its fonts, elements and rendered texts.
+
+    Attributes:
+        font (pygame.font.Font): The default font of the elements.
+        cache (TextCache): The rendered texts.
+        elements (list[HudElement]): The elements, in drawing order.
+    """
+
+    def __init__(self, font, cache_size=HUD_CACHE_SIZE):
+        """
+        Initializes a HUD without elements.
+
+        Parameters:
+            font (pygame.font.Font): The default font of the elements.
+            cache_size (int, optional): Number of rendered texts kept.
+            Defaults to HUD_CACHE_SIZE.
+        """
+        self.font = font
+        self.cache = TextCache(cache_size)
+        self.elements = []
+
+    def add(
+        self,
+        value,
+        pos,
+        anchor="topright",
+        color=(255, 255, 255),
+        font=None,
+    ):
+        """
+        Adds a text element.
+
+        Parameters:
+            value (callable): Returns the text to show.
+            pos (tuple): The position of the anchor on the screen.
+            anchor (str, optional): The rect attribute pos refers to.
+            Defaults to "topright".
+            color (tuple, optional): The text color. Defaults to white.
+            font (pygame.font.Font, optional): The font. Defaults to the
+            HUD's font.
+
+        Returns:
+            HudElement: The new element.
+        """
+        element = HudElement(value, font or self.font, color, anchor, pos)
+        self.elements.append(element)
+        return element
+
+    def update(self):
+        """
+        Renders again the elements whose text changed.
+        """
+        for element in self.elements:
+            text = element.value()
+            if text != element.text:
+                element.text = text
+                element.surface = self.cache.render(
+                    element.font, text, element.color
+                )
+                element.rect = element.surface.get_rect(
+                    **{element.anchor: element.pos}
+                )
+
+    def render(self, surf):
+        """
+        Updates the elements and draws all of them with one blits call.
+
+        Parameters:
+            surf (pygame.Surface): The surface to draw on.
+        """
+        self.update()
+        surf.blits(
+            [(element.surface, element.rect) for element in self.elements],
+            doreturn=False,
+        )
@@ -0,0 +1,785 @@
+"""
+This module implements the compiled binary map format used alongside the
+JSON maps in data/maps. A compiled map stores every tile type name once, the
+grid tiles as the same packed 16-bit chunk arrays the Tilemap uses in memory
+plus the order they were placed in, the offgrid tiles as fixed-size records
+grouped by chunk, and an index of every tile by (type, variant). Uncompressed
+maps are read through mmap, and their chunk arrays are handed to the Tilemap
+without copying them.
+
+Compiled maps can also be streamed: a MapStream keeps only the chunks around
+the player resident and looks everything else up in the mapped file.
+
+The module can also be run as a script to convert maps in either direction:
+
+    python -m scripts.mapformat data/maps/0.json data/maps/0.jmap
+"""
+
+import argparse
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from collections import OrderedDict
+
+from scripts.tilemap import (
+    CHUNK_MASK,
+    CHUNK_SHIFT,
+    CHUNK_SIZE,
+    Tilemap,
+)
+
+MAP_EXTENSION = ".jmap"
+MAGIC = b"JMAP"
+VERSION = 4
+
+# Header flag: everything after the header is zlib compressed.
+FLAG_ZLIB = 1
+
+# magic, version, flags, tile size, chunk size, uncompressed body size,
+# digest of the JSON map the map was compiled from
+HEADER = struct.Struct("<4sHHHHI16s")
+DIGEST_SIZE = 16
+# offgrid tile count, grid tile count, chunk count, (type, variant) pair count
+COUNTS = struct.Struct("<IIII")
+# chunk x, chunk y, grid tile count, offgrid tile count, body offset
+CHUNK_ENTRY = struct.Struct("<iiIII")
+# type id, variant, record count, body offset
+PAIR_ENTRY = struct.Struct("<HHII")
+# map order, type id, variant, x, y
+OFFGRID_RECORD = struct.Struct("<IHHdd")
+# kind, map order, x, y (grid cell or pixels)
+INDEX_RECORD = struct.Struct("<BxxxIdd")
+
+# Index record kinds. Deleted records are only written into the private copy
+# of a streamed map.
+KIND_GRID = 0
+KIND_OFFGRID = 1
+KIND_DELETED = 2
+
+CELLS = CHUNK_SIZE * CHUNK_SIZE
+ARRAY_BYTES = 2 * CELLS
+# Bytes of a chunk's grid data: type ids, variants and map orders.
+CHUNK_BYTES = 2 * ARRAY_BYTES + 4 * CELLS
+LITTLE_ENDIAN = sys.byteorder == "little"
+
+# Default streaming radius around each focus point, in chunks.
+STREAM_RADIUS = 2
+# Default number of unpinned chunks a MapStream keeps resident.
+STREAM_BUDGET = 64
+
+
+def source_digest(path):
+    """
+    Hashes a JSON map, so a compiled map can tell whether it was compiled
+    from the current version of it.
+
+    Parameters:
+        path (str): The file path of the JSON map.
+
+    Returns:
+        bytes: The DIGEST_SIZE bytes long digest of the file contents.
+    """
+    with open(path, "rb") as f:
+        return hashlib.blake2b(f.read(), digest_size=DIGEST_SIZE).digest()
+
+
+def write_map(tilemap, path, compress=False, source=None):
+    """
+    Saves a tilemap in the compiled binary format.
+
+    Parameters:
+        tilemap (Tilemap): The tilemap to save.
+        path (str): The file path to save the map to.
+        compress (bool, optional): Whether to zlib compress the map. A
+        compressed map is smaller but has to be decompressed into memory
+        when loaded. Defaults to False.
+        source (str, optional): The JSON map the tilemap was loaded from.
+        Its digest is stored, so find_map can tell when the compiled map
+        is out of date. Defaults to None.
+    """
+    type_names = list(tilemap.type_names)
+    type_ids = dict(tilemap.type_ids)
+
+    # Offgrid dlaždice se ukládají po blocích, pořadí v mapě se zachová
+    orders = {handle: n for n, handle in enumerate(sorted(tilemap.offgrid))}
+    chunks = {key: (chunk, []) for key, chunk in tilemap.chunks.items()}
+    for handle, order in orders.items():
+        tile = tilemap.offgrid[handle]
+        if tile["type"] not in type_ids:
+            type_ids[tile["type"]] = len(type_names)
+            type_names.append(tile["type"])
+        key = tilemap.offgrid_bucket(tile["pos"])
+        chunks.setdefault(key, (None, []))[1].append((order, tile))
+    for _, offgrid in chunks.values():
+        offgrid.sort(key=lambda record: record[0])
+
+    # Pořadí dlaždic v mřížce se přečísluje od nuly
+    cells = [
+        cell
+        for grid, _ in tilemap.tile_index.values()
+        for cell in grid.items()
+    ]
+    cells.sort(key=lambda cell: cell[1])
+    grid_orders = {loc: n for n, (loc, _) in enumerate(cells)}
+
+    pairs = {}
+    for (tile_type, variant), (grid, offgrid) in tilemap.tile_index.items():
+        records = [(KIND_GRID, grid_orders[loc], *loc) for loc in grid]
+        records += [
+            (KIND_OFFGRID, orders[handle], *tilemap.offgrid[handle]["pos"])
+            for handle in offgrid
+        ]
+        if records:
+            pairs[(type_ids[tile_type], variant)] = records
+
+    body = bytearray(struct.pack("<H", len(type_names) - 1))
+    for name in type_names[1:]:
+        encoded = name.encode("utf-8")
+        body += struct.pack("<B", len(encoded)) + encoded
+    body += COUNTS.pack(len(orders), len(grid_orders), len(chunks), len(pairs))
+    body += bytes(-len(body) % 8)
+    chunk_table = len(body)
+    body += bytes(CHUNK_ENTRY.size * len(chunks))
+    pair_table = len(body)
+    body += bytes(PAIR_ENTRY.size * len(pairs))
+    body += bytes(-len(body) % 8)
+
+    # Tabulka bloků je seřazená, aby se v ní dalo hledat půlením
+    for n, key in enumerate(sorted(chunks)):
+        chunk, offgrid = chunks[key]
+        CHUNK_ENTRY.pack_into(
+            body,
+            chunk_table + n * CHUNK_ENTRY.size,
+            key[0],
+            key[1],
+            chunk.count if chunk is not None else 0,
+            len(offgrid),
+            len(body),
+        )
+        if chunk is None:
+            body += bytes(CHUNK_BYTES)
+        else:
+            cell_orders = array("I", bytes(4 * CELLS))
+            for i, tid in enumerate(chunk.types):
+                if tid:
+                    cell_orders[i] = grid_orders[
+                        (
+                            (key[0] << CHUNK_SHIFT) | (i & CHUNK_MASK),
+                            (key[1] << CHUNK_SHIFT) | (i >> CHUNK_SHIFT),
+                        )
+                    ]
+            for cells in (
+                array("H", chunk.types),
+                array("H", chunk.variants),
+                cell_orders,
+            ):
+                if not LITTLE_ENDIAN:
+                    cells.byteswap()
+                body += cells.tobytes()
+        for order, tile in offgrid:
+            body += OFFGRID_RECORD.pack(
+                order,
+                type_ids[tile["type"]],
+                tile["variant"],
+                tile["pos"][0],
+                tile["pos"][1],
+            )
+
+    for n, pair in enumerate(sorted(pairs)):
+        PAIR_ENTRY.pack_into(
+            body,
+            pair_table + n * PAIR_ENTRY.size,
+            pair[0],
+            pair[1],
+            len(pairs[pair]),
+            len(body),
+        )
+        for record in pairs[pair]:
+            body += INDEX_RECORD.pack(*record)
+
+    digest = bytes(DIGEST_SIZE) if source is None else source_digest(source)
+    flags = 0
+    size = len(body)
+    if compress:
+        flags |= FLAG_ZLIB
+        body = zlib.compress(body, 9)
+    with open(path, "wb") as f:
+        f.write(
+            HEADER.pack(
+                MAGIC,
+                VERSION,
+                flags,
+                tilemap.tile_size,
+                CHUNK_SIZE,
+                size,
+                digest,
+            )
+        )
+        f.write(body)
+
+
+class CompiledMap:
+    """
+    A parsed compiled map. Only the small tables are decoded up front;
+    chunks and index records are read from the underlying buffer when asked
+    for.
+
+    The buffer is a private copy-on-write mapping of the file (or the
+    decompressed body), so the chunk arrays handed to a Tilemap can be
+    written to without touching the file.
+
+    Attributes:
+        body (memoryview): The map data following the header.
+        tile_size (int): The size of each tile in pixels.
+        type_names (list): Tile type names indexed by type id, with None at
+        id 0.
+        offgrid_count (int): Number of offgrid tiles in the map.
+        grid_count (int): Number of grid tiles in the map.
+        chunk_count (int): Number of entries in the chunk table.
+        chunk_table (int): Body offset of the chunk table.
+        pairs (dict): Maps (type, variant) to the record count and body
+        offset of its index records.
+    """
+
+    def __init__(self, path):
+        """
+        Opens a compiled map.
+
+        Parameters:
+            path (str): The file path of the map.
+
+        Raises:
+            ValueError: If the file is not a compiled map this version of
+            the game can read.
+        """
+        with open(path, "rb") as f:
+            # Soukromá kopie stránek, úpravy mapy se nezapíší do souboru
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        magic, version, flags, tile_size, chunk_size, size, _ = (
+            HEADER.unpack_from(data)
+        )
+        if magic != MAGIC:
+            raise ValueError(path + " is not a compiled map")
+        if version != VERSION or chunk_size != CHUNK_SIZE:
+            raise ValueError(path + " was compiled for another game version")
+
+        if flags & FLAG_ZLIB:
+            body = memoryview(bytearray(zlib.decompress(data[HEADER.size :])))
+        else:
+            body = memoryview(data)[HEADER.size :]
+        if len(body) != size:
+            raise ValueError(path + " is truncated")
+        self.body = body
+        self.tile_size = tile_size
+
+        (n_types,) = struct.unpack_from("<H", body)
+        pos = 2
+        self.type_names = [None]
+        for _ in range(n_types):
+            length = body[pos]
+            self.type_names.append(
+                bytes(body[pos + 1 : pos + 1 + length]).decode()
+            )
+            pos += 1 + length
+
+        (
+            self.offgrid_count,
+            self.grid_count,
+            self.chunk_count,
+            n_pairs,
+        ) = COUNTS.unpack_from(body, pos)
+        pos += COUNTS.size
+        self.chunk_table = pos + (-pos % 8)
+        pair_table = self.chunk_table + self.chunk_count * CHUNK_ENTRY.size
+        self.pairs = {}
+        for tid, variant, count, offset in PAIR_ENTRY.iter_unpack(
+            body[pair_table : pair_table + n_pairs * PAIR_ENTRY.size]
+        ):
+            self.pairs[(self.type_names[tid], variant)] = (count, offset)
+
+    def chunk_entry(self, n):
+        """
+        Reads an entry of the chunk table.
+
+        Parameters:
+            n (int): The entry number.
+
+        Returns:
+            tuple: (chunk_x, chunk_y, grid count, offgrid count, offset).
+        """
+        return CHUNK_ENTRY.unpack_from(
+            self.body, self.chunk_table + n * CHUNK_ENTRY.size
+        )
+
+    def find_chunk(self, key):
+        """
+        Binary searches the chunk table for a chunk.
+
+        Parameters:
+            key (tuple): The (chunk_x, chunk_y) coordinates of the chunk.
+
+        Returns:
+            int or None: The entry number, or None if the map has no data
+            for the chunk.
+        """
+        lo, hi = 0, self.chunk_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.chunk_entry(mid)[:2] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.chunk_count and self.chunk_entry(lo)[:2] == key:
+            return lo
+        return None
+
+    def load_chunk(self, tilemap, n):
+        """
+        Installs the grid tiles of a chunk into a tilemap whose type ids
+        match the map.
+
+        Parameters:
+            tilemap (Tilemap): The tilemap to install the chunk into.
+            n (int): The chunk table entry number.
+
+        Returns:
+            list: The offgrid records of the chunk, as (order, type id,
+            variant, x, y) tuples.
+        """
+        cx, cy, n_grid, n_offgrid, offset = self.chunk_entry(n)
+        body = self.body
+        if n_grid:
+            types = body[offset : offset + ARRAY_BYTES]
+            variants = body[offset + ARRAY_BYTES : offset + 2 * ARRAY_BYTES]
+            orders = body[offset + 2 * ARRAY_BYTES : offset + CHUNK_BYTES]
+            if LITTLE_ENDIAN:
+                types = types.cast("H")
+                variants = variants.cast("H")
+                orders = orders.cast("I")
+            else:
+                types = array("H", bytes(types))
+                variants = array("H", bytes(variants))
+                orders = array("I", bytes(orders))
+                types.byteswap()
+                variants.byteswap()
+                orders.byteswap()
+            tilemap.install_chunk((cx, cy), types, variants, n_grid, orders)
+        start = offset + CHUNK_BYTES
+        return [
+            record
+            for record in OFFGRID_RECORD.iter_unpack(
+                body[start : start + n_offgrid * OFFGRID_RECORD.size]
+            )
+            if record[1]
+        ]
+
+    def index_records(self, pair):
+        """
+        Iterates over the live index records of a (type, variant) pair.
+
+        Parameters:
+            pair (tuple): The (type, variant) pair.
+
+        Yields:
+            tuple: (record offset, kind, map order, x, y).
+        """
+        count, offset = self.pairs.get(pair, (0, 0))
+        for n in range(count):
+            record = offset + n * INDEX_RECORD.size
+            kind, order, x, y = INDEX_RECORD.unpack_from(self.body, record)
+            if kind != KIND_DELETED:
+                yield record, kind, order, x, y
+
+    def delete_record(self, record, key):
+        """
+        Deletes an indexed tile from the private copy of the map, so it
+        stays gone when its chunk is loaded later.
+
+        Parameters:
+            record (int): The body offset of the index record.
+            key (tuple): The chunk (or offgrid bucket) holding the tile.
+        """
+        kind, order, x, y = INDEX_RECORD.unpack_from(self.body, record)
+        self.body[record] = KIND_DELETED
+        n = self.find_chunk(key)
+        cx, cy, n_grid, n_offgrid, offset = self.chunk_entry(n)
+        if kind == KIND_GRID:
+            i = ((int(y) & CHUNK_MASK) << CHUNK_SHIFT) | (int(x) & CHUNK_MASK)
+            struct.pack_into("<H", self.body, offset + 2 * i, 0)
+            struct.pack_into("<H", self.body, offset + ARRAY_BYTES + 2 * i, 0)
+            CHUNK_ENTRY.pack_into(
+                self.body,
+                self.chunk_table + n * CHUNK_ENTRY.size,
+                cx,
+                cy,
+                n_grid - 1,
+                n_offgrid,
+                offset,
+            )
+        else:
+            start = offset + CHUNK_BYTES
+            for m in range(n_offgrid):
+                at = start + m * OFFGRID_RECORD.size
+                if OFFGRID_RECORD.unpack_from(self.body, at)[0] == order:
+                    # Typ 0 označuje smazanou dlaždici
+                    struct.pack_into("<H", self.body, at + 4, 0)
+                    break
+
+    def install(self, tilemap):
+        """
+        Resets a tilemap to the tile size and type ids of this map.
+
+        Parameters:
+            tilemap (Tilemap): The tilemap to reset.
+        """
+        tilemap.clear()
+        tilemap.tile_size = self.tile_size
+        tilemap.next_grid_order = self.grid_count
+        for name in self.type_names[1:]:
+            tilemap.type_id(name)
+
+
+def read_map(tilemap, path):
+    """
+    Loads a map in the compiled binary format, replacing the current state
+    of the tilemap.
+
+    Parameters:
+        tilemap (Tilemap): The tilemap to load the map into.
+        path (str): The file path to load the map from.
+
+    Raises:
+        ValueError: If the file is not a compiled map this version of the
+        game can read.
+    """
+    compiled = CompiledMap(path)
+    compiled.install(tilemap)
+    offgrid = []
+    for n in range(compiled.chunk_count):
+        offgrid.extend(compiled.load_chunk(tilemap, n))
+
+    offgrid.sort()
+    type_names = compiled.type_names
+    for order, tid, variant, x, y in offgrid:
+        tilemap.add_offgrid_tile(
+            {"type": type_names[tid], "variant": variant, "pos": [x, y]},
+            handle=order,
+        )
+
+
+class MapStream:
+    """
+    Streams the chunks of a compiled map into a Tilemap. Chunks within
+    radius of the focus points passed to update are loaded, and the least
+    recently needed chunks are evicted once more than budget of them are
+    resident. Chunks changed through the Tilemap are pinned and never
+    evicted, so edits are not lost.
+
+    Attributes:
+        tilemap (Tilemap): The tilemap the chunks are loaded into.
+        map (CompiledMap): The streamed map.
+        radius (int): Radius around each focus point, in chunks.
+        budget (int): Maximum number of unpinned resident chunks.
+        resident (OrderedDict): Resident chunk coordinates, least recently
+        needed first.
+        pinned (set): Chunks that are never evicted.
+        loading (bool): True while the stream itself adds or removes tiles.
+    """
+
+    def __init__(
+        self, tilemap, path, radius=STREAM_RADIUS, budget=STREAM_BUDGET
+    ):
+        """
+        Opens a compiled map for streaming and resets the tilemap to it. No
+        chunk is loaded until update is called.
+
+        Parameters:
+            tilemap (Tilemap): The tilemap to stream the map into.
+            path (str): The file path of the compiled map.
+            radius (int, optional): Radius around each focus point, in
+            chunks. Defaults to STREAM_RADIUS.
+            budget (int, optional): Maximum number of unpinned resident
+            chunks. Defaults to STREAM_BUDGET.
+        """
+        self.tilemap = tilemap
+        self.map = CompiledMap(path)
+        self.radius = radius
+        self.budget = max(budget, (2 * radius + 1) ** 2)
+        self.resident = OrderedDict()
+        self.pinned = set()
+        self.loading = False
+        self.map.install(tilemap)
+        tilemap.next_offgrid_handle = self.map.offgrid_count
+        tilemap.stream = self
+
+    def load(self, key):
+        """
+        Makes a chunk resident.
+
+        Parameters:
+            key (tuple): The (chunk_x, chunk_y) coordinates of the chunk.
+        """
+        self.resident[key] = None
+        n = self.map.find_chunk(key)
+        if n is None:
+            return
+        tilemap = self.tilemap
+        self.loading = True
+        for order, tid, variant, x, y in self.map.load_chunk(tilemap, n):
+            tilemap.add_offgrid_tile(
+                {
+                    "type": self.map.type_names[tid],
+                    "variant": variant,
+                    "pos": [x, y],
+                },
+                handle=order,
+            )
+        chunk_px = CHUNK_SIZE * tilemap.tile_size
+        tilemap.render_cache.invalidate_at(
+            (key[0] * chunk_px, key[1] * chunk_px)
+        )
+        self.loading = False
+
+    def unload(self, key):
+        """
+        Evicts a resident chunk, dropping its grid and offgrid tiles.
+
+        Parameters:
+            key (tuple): The (chunk_x, chunk_y) coordinates of the chunk.
+        """
+        del self.resident[key]
+        tilemap = self.tilemap
+        self.loading = True
+        tilemap.drop_chunk(key)
+        for handle in list(tilemap.offgrid_buckets.get(key, ())):
+            tilemap.remove_offgrid_tile(handle)
+        chunk_px = CHUNK_SIZE * tilemap.tile_size
+        tilemap.render_cache.invalidate_at(
+            (key[0] * chunk_px, key[1] * chunk_px)
+        )
+        self.loading = False
+
+    def touch(self, key):
+        """
+        Loads a chunk if needed and pins it, before the tilemap changes it.
+        Does nothing while the stream itself is loading or evicting.
+
+        Parameters:
+            key (tuple): The (chunk_x, chunk_y) coordinates of the chunk.
+        """
+        if self.loading:
+            return
+        if key not in self.resident:
+            self.load(key)
+        self.pinned.add(key)
+
+    def update(self, *points):
+        """
+        Loads the chunks around the focus points and evicts the least
+        recently needed ones over the budget.
+
+        Parameters:
+            *points (tuple): Focus positions in pixels, e.g. the player and
+            the camera centre.
+        """
+        chunk_px = CHUNK_SIZE * self.tilemap.tile_size
+        wanted = set()
+        for point in points:
+            cx = int(point[0] // chunk_px)
+            cy = int(point[1] // chunk_px)
+            for x in range(cx - self.radius, cx + self.radius + 1):
+                for y in range(cy - self.radius, cy + self.radius + 1):
+                    wanted.add((x, y))
+        for key in wanted:
+            if key in self.resident:
+                self.resident.move_to_end(key)
+            else:
+                self.load(key)
+
+        excess = len(self.resident) - len(self.pinned) - self.budget
+        if excess > 0:
+            for key in list(self.resident):
+                if key not in self.pinned and key not in wanted:
+                    self.unload(key)
+                    excess -= 1
+                    if not excess:
+                        break
+
+    def extract(self, id_pairs, keep=False):
+        """
+        Extracts matching tiles from the chunks that are not resident,
+        using the index stored in the map. Resident chunks are left to
+        Tilemap.extract.
+
+        Parameters:
+            id_pairs (list of tuple): The (type, variant) pairs to match.
+            keep (bool, optional): Whether to keep the matched tiles in the
+            map. Defaults to False.
+
+        Returns:
+            tuple: The matched offgrid tiles and grid tiles, as two lists of
+            (map order, tile) pairs. The tile dictionaries have pixel
+            positions.
+        """
+        tile_size = self.tilemap.tile_size
+        offgrid = []
+        grid = []
+        for pair in dict.fromkeys(id_pairs):
+            for record, kind, order, x, y in self.map.index_records(pair):
+                if kind == KIND_GRID:
+                    key = (int(x) >> CHUNK_SHIFT, int(y) >> CHUNK_SHIFT)
+                    pos = [int(x) * tile_size, int(y) * tile_size]
+                else:
+                    key = self.tilemap.offgrid_bucket((x, y))
+                    pos = [x, y]
+                if key in self.resident:
+                    continue
+                tile = {"type": pair[0], "variant": pair[1], "pos": pos}
+                if kind == KIND_GRID:
+                    grid.append((order, tile))
+                else:
+                    offgrid.append((order, tile))
+                if not keep:
+                    self.map.delete_record(record, key)
+        return offgrid, grid
+
+
+def load_map(tilemap, path):
+    """
+    Loads a map in either format, chosen by the file extension.
+
+    Parameters:
+        tilemap (Tilemap): The tilemap to load the map into.
+        path (str): The file path to load the map from.
+    """
+    if path.endswith(MAP_EXTENSION):
+        read_map(tilemap, path)
+    else:
+        tilemap.load(path)
+
+
+def save_map(tilemap, path, compress=False, source=None):
+    """
+    Saves a map in either format, chosen by the file extension.
+
+    Parameters:
+        tilemap (Tilemap): The tilemap to save.
+        path (str): The file path to save the map to.
+        compress (bool, optional): Whether to compress a compiled map.
+        Defaults to False.
+        source (str, optional): The JSON map a compiled map is made from,
+        see write_map. Defaults to None.
+    """
+    if path.endswith(MAP_EXTENSION):
+        write_map(tilemap, path, compress=compress, source=source)
+    else:
+        tilemap.save(path)
+
+
+def compiled_digest(path):
+    """
+    Reads the digest of the JSON map a compiled map was compiled from.
+
+    Parameters:
+        path (str): The file path of the compiled map.
+
+    Returns:
+        bytes or None: The digest, or None if the file is missing or is not
+        a compiled map this version of the game can read.
+    """
+    try:
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+    except FileNotFoundError:
+        return None
+    if len(header) < HEADER.size:
+        return None
+    magic, version, _, _, chunk_size, _, digest = HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION or chunk_size != CHUNK_SIZE:
+        return None
+    return digest
+
+
+def find_map(base_path):
+    """
+    Picks the file to load a map from. The compiled map is used when it
+    was compiled from the current contents of the JSON map, so editing the
+    JSON map never loads a stale compiled copy. Contents are compared
+    instead of modification times, which a checkout does not preserve.
+
+    Parameters:
+        base_path (str): The map path without extension, e.g. "data/maps/0".
+
+    Returns:
+        str: The path of the compiled or the JSON map.
+    """
+    compiled = base_path + MAP_EXTENSION
+    source = base_path + ".json"
+    digest = compiled_digest(compiled)
+    if digest is not None and (
+        not os.path.exists(source) or digest == source_digest(source)
+    ):
+        return compiled
+    return source
+
+
+def compile_map(base_path, compress=False):
+    """
+    Compiles a JSON map next to it, for example when a map is about to be
+    streamed but its compiled copy is missing or out of date. The file is
+    written under a temporary name and then renamed, so a map that is
+    still mapped by an older MapStream is never overwritten in place.
+
+    Parameters:
+        base_path (str): The map path without extension, e.g. "data/maps/0".
+        compress (bool, optional): Whether to zlib compress the map.
+        Defaults to False.
+
+    Returns:
+        str: The path of the compiled map.
+    """
+    source = base_path + ".json"
+    compiled = base_path + MAP_EXTENSION
+    tilemap = Tilemap(None)
+    tilemap.load(source)
+    write_map(tilemap, compiled + ".tmp", compress=compress, source=source)
+    os.replace(compiled + ".tmp", compiled)
+    return compiled
+
+
+def main(argv=None):
+    """
+    Converts maps between the JSON and the compiled format.
+
+    Parameters:
+        argv (list of str, optional): Command line arguments. Defaults to
+        sys.argv[1:].
+    """
+    parser = argparse.ArgumentParser(
+        description="Convert JUMPY maps between JSON and compiled format."
+    )
+    parser.add_argument("source", help="map to read (.json or .jmap)")
+    parser.add_argument("target", help="map to write (.json or .jmap)")
+    parser.add_argument(
+        "--compress",
+        action="store_true",
+        help="zlib compress the compiled map",
+    )
+    args = parser.parse_args(argv)
+
+    tilemap = Tilemap(None)
+    load_map(tilemap, args.source)
+    save_map(
+        tilemap,
+        args.target,
+        compress=args.compress,
+        source=args.source if args.source.endswith(".json") else None,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,96 +1,300 @@
-class Particle:
+"""
+This module provides the game's particles. ParticleSystem keeps all
+particles of a level in NumPy arrays so that thousands of them can be
+updated and drawn at once.
+"""
+
+import numpy as np
+
+# Maximum number of particles alive at once.
+PARTICLE_CAPACITY = 4096
+
+# Particles with looping animations (such as drops) never finish on their
+# own, so they are removed after this many frames.
+PARTICLE_MAX_AGE = 600
+
+
+class ParticleSystem:
     """
-    Represents a particle in the game, which can be used for visual effects
-    like explosions, sparks, etc.
+    Keeps every particle of the game in preallocated NumPy arrays (a
+    structure of arrays) instead of one object each. Moving, animating and
+    swaying them are array operations, dead particles are dropped by
+    compacting the arrays with a mask, and all of them are drawn with a
+    single blits call.
 
-    Each particle has a type, position, velocity, and is associated with a
-    specific animation frame. The particle's
-    behavior (e.g., movement and animation) is updated each frame, and it can
-    be rendered to the screen.
+    Each frame the particles move by their velocity, advance their
+    animation, are drawn, sway sideways and are removed one frame after a
+    non-looping animation finished. Particles with looping animations are
+    removed once they are max_age frames old. Particles spawned by an
+    emitter remember it, and stand still while it is inactive.
 
     Attributes:
-        game: The main game object which this particle is part of. This allows
-          access to game-wide resources and variables.
-        type (str): A string representing the type of the particle (e.g.,
-        'leaf', 'sparks'). This can be used to differentiate
-                    particle behaviors or rendering styles.
-        pos (list): The position of the particle in the game world as a list
-        [x, y].
-        velocity (list): The velocity of the particle as a list [vx, vy],
-          representing movement along the x and y axes.
-        animation (Animation): An Animation object representing the particle's
-          current animation state. It controls
-                               which image/frame is displayed for the particle.
-        frame (int): The initial frame of the animation to start with. Allows
-        particles of the same type to start
-                     at different animation states for variety.
+        game: The main game object, providing the particle animations.
+        capacity (int): Maximum number of particles alive at once.
+        max_age (int): Lifetime in frames of particles whose animation
+        loops.
+        count (int): Number of particles alive.
+        type_ids (dict): Maps each particle type name to its type id.
+        images (list): The animation images of every registered type, one
+        type after another.
+        image_half (numpy.ndarray): Half the width and height of each image
+        in images, rounded down.
+        type_first (numpy.ndarray): Index in images of the first image of
+        each type id.
+        pos (numpy.ndarray): Positions, shape (capacity, 2).
+        velocity (numpy.ndarray): Velocities, shape (capacity, 2).
+        kind (numpy.ndarray): Type id of each particle.
+        frame (numpy.ndarray): Animation frame counter of each particle.
+        age (numpy.ndarray): Age of each particle in frames.
+        done (numpy.ndarray): Whether the animation of each particle has
+        finished.
+        source (numpy.ndarray): Emitter id of each particle, 0 for particles
+        not spawned by an emitter.
+        dying (numpy.ndarray): Particles to remove at the end of the current
+        frame.
+        paused (numpy.ndarray): Particles skipped by the last update
+        because their emitter is inactive.
     """
 
-    def __init__(self, game, p_type, pos, velocity=[0, 0], frame=0):
+    def __init__(
+        self, game, capacity=PARTICLE_CAPACITY, max_age=PARTICLE_MAX_AGE
+    ):
         """
-        Initializes a new Particle instance with the given type, position,
-        velocity, and animation frame.
+        Initializes an empty ParticleSystem.
 
         Parameters:
-            game: The game object this particle is associated with.
-            p_type (str): The type of the particle.
-            pos (list): The starting position of the particle in the game
-              world.
-            velocity (list, optional): The initial velocity of the particle.
-              Defaults to [0, 0].
-            frame (int, optional): The initial frame of the particle's
-            animation. Defaults to 0.
+            game: The game object whose assets hold the "particle/<type>"
+            animations.
+            capacity (int, optional): Maximum number of particles alive at
+            once. Defaults to PARTICLE_CAPACITY.
+            max_age (int, optional): Lifetime in frames of particles whose
+            animation loops. Defaults to PARTICLE_MAX_AGE.
         """
         self.game = game
-        self.type = p_type
-        self.pos = list(pos)
-        self.velocity = list(velocity)
-        self.animation = self.game.assets["particle/" + p_type].copy()
-        self.animation.frame = frame
+        self.capacity = capacity
+        self.max_age = max_age
+        self.type_ids = {}
+        self.images = []
+        self.image_half = np.zeros((0, 2), dtype=np.int64)
+        self.type_first = np.zeros(0, dtype=np.int64)
+        self.type_duration = np.zeros(0, dtype=np.int64)
+        self.type_length = np.zeros(0, dtype=np.int64)
+        self.type_loop = np.zeros(0, dtype=bool)
+        self.pos = np.zeros((capacity, 2))
+        self.velocity = np.zeros((capacity, 2))
+        self.kind = np.zeros(capacity, dtype=np.int64)
+        self.frame = np.zeros(capacity, dtype=np.int64)
+        self.age = np.zeros(capacity, dtype=np.int64)
+        self.done = np.zeros(capacity, dtype=bool)
+        self.source = np.zeros(capacity, dtype=np.int64)
+        self.dying = np.zeros(capacity, dtype=bool)
+        self.paused = np.zeros(capacity, dtype=bool)
+        self.clear()
 
-    def update(self):
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        """
+        Removes every particle.
+        """
+        self.count = 0
+
+    def type_id(self, p_type):
         """
-        Updates the particle's state. This includes moving the particle
-        according to its velocity and updating its
-        animation. If the animation is completed, it might mark the particle
-        for removal.
+        Gets the type id of a particle type, registering its animation the
+        first time the type is used.
+
+        Parameters:
+            p_type (str): The particle type, such as "leaf".
 
         Returns:
-            bool: True if the particle is to be removed (e.g., because its
-            animation has finished), False otherwise.
+            int: The type id.
         """
-        kill = False
-        if self.animation.done:
-            kill = True
+        tid = self.type_ids.get(p_type)
+        if tid is None:
+            animation = self.game.assets["particle/" + p_type]
+            tid = self.type_ids[p_type] = len(self.type_first)
+            self.type_first = np.append(self.type_first, len(self.images))
+            self.images.extend(animation.pngs)
+            self.image_half = np.concatenate(
+                (
+                    self.image_half,
+                    [
+                        (img.get_width() // 2, img.get_height() // 2)
+                        for img in animation.pngs
+                    ],
+                )
+            )
+            self.type_duration = np.append(
+                self.type_duration, animation.img_duration
+            )
+            self.type_length = np.append(
+                self.type_length, animation.img_duration * len(animation.pngs)
+            )
+            self.type_loop = np.append(self.type_loop, animation.loop)
+        return tid
 
-        self.pos[0] += self.velocity[0]
-        self.pos[1] += self.velocity[1]
+    def lifetime(self, p_type):
+        """
+        Gets the longest time a particle of a type can live.
+
+        Parameters:
+            p_type (str): The particle type, such as "leaf".
 
-        self.animation.update()
+        Returns:
+            int: The lifetime in frames.
+        """
+        tid = self.type_id(p_type)
+        if self.type_loop[tid]:
+            return self.max_age
+        return int(self.type_length[tid])
 
-        return kill
+    def add(self, p_type, pos, velocity=(0, 0), frame=0, age=0, source=0):
+        """
+        Spawns a particle. Nothing happens if the pool is full.
+
+        A particle spawned with an age is fast-forwarded to where it would be
+        had it been spawned that many frames ago, including its sway.
+        Nothing is spawned if it would already have been removed by then.
+
+        Parameters:
+            p_type (str): The type of the particle.
+            pos (tuple): The starting position in pixels.
+            velocity (tuple, optional): The velocity in pixels per frame.
+            Defaults to (0, 0).
+            frame (int, optional): The starting animation frame. Defaults to
+            0.
+            age (int, optional): Number of frames the particle has already
+            lived. Defaults to 0.
+            source (int, optional): Id of the emitter spawning the
+            particle. Defaults to 0, no emitter.
+        """
+        if self.count == self.capacity:
+            return
+        tid = self.type_id(p_type)
+        x, y = pos
+        if age:
+            length = int(self.type_length[tid])
+            frames = np.arange(frame + 1, frame + age + 1)
+            if self.type_loop[tid]:
+                if age > self.max_age:
+                    return
+                frames %= length
+            elif frame + age >= length:
+                # Animace by už skončila
+                return
+            x += velocity[0] * age + float(np.sin(frames * 0.1).sum()) * 0.3
+            y += velocity[1] * age
+            frame = int(frames[-1])
+        slot = self.count
+        self.count += 1
+        self.pos[slot] = x, y
+        self.velocity[slot] = velocity
+        self.kind[slot] = tid
+        self.frame[slot] = frame
+        self.age[slot] = age
+        self.done[slot] = False
+        self.source[slot] = source
 
-    def render(self, surf, offset=(0, 0)):
+    def update(self, awake=None):
         """
-        Renders the particle on the given surface.
+        Moves the particles and advances their animations. Particles whose
+        animation had already finished are marked as dying; they are still
+        drawn this frame and removed by sweep.
 
-        The particle's current animation frame is drawn at the particle's
-        position. This position is adjusted by
-        the given offset, which allows for camera movement or scrolling
-        backgrounds.
         Parameters:
-            surf (pygame.Surface): The Pygame surface to draw the particle on.
-            offset (tuple, optional): A tuple (x, y) representing the offset
-            to apply to the particle's position.
-                                      This is useful for rendering the particle
-                                      relative to a moving camera.
-                                      Defaults to (0, 0).
-        """
-        img = self.animation.img()
-        surf.blit(
-            img,
-            (
-                self.pos[0] - offset[0] - img.get_width() // 2,
-                self.pos[1] - offset[1] - img.get_height() // 2,
-            ),
+            awake (numpy.ndarray, optional): Whether each emitter id is
+            active; particles of inactive emitters are skipped. Defaults to
+            None, which updates every particle.
+        """
+        count = self.count
+        if awake is None:
+            self.paused[:count] = False
+            live = slice(0, count)
+        else:
+            self.paused[:count] = ~awake[self.source[:count]]
+            live = np.flatnonzero(~self.paused[:count])
+        kind = self.kind[live]
+        length = self.type_length[kind]
+        loop = self.type_loop[kind]
+        self.dying[:count] = False
+        self.dying[live] = self.done[live] | (
+            loop & (self.age[live] >= self.max_age)
+        )
+
+        self.pos[live] += self.velocity[live]
+        frame = self.frame[live] + 1
+        frame = np.where(loop, frame % length, np.minimum(frame, length - 1))
+        self.frame[live] = frame
+        self.done[live] |= ~loop & (frame >= length - 1)
+        self.age[live] += 1
+
+    def discard(self, source):
+        """
+        Removes every particle spawned by an emitter at once.
+
+        Parameters:
+            source (int): The emitter id.
+        """
+        self.compact(np.flatnonzero(self.source[: self.count] != source))
+
+    def sweep(self):
+        """
+        Applies the sideways sway to every particle updated in the last
+        frame and removes the dying ones, keeping the others in order.
+        """
+        count = self.count
+        sway = np.sin(self.frame[:count] * 0.1) * 0.3
+        self.pos[:count, 0] += np.where(self.paused[:count], 0, sway)
+        self.compact(np.flatnonzero(~self.dying[:count]))
+
+    def compact(self, keep):
+        """
+        Keeps only the given particles, in order.
+
+        Parameters:
+            keep (numpy.ndarray): The increasing slots of the particles to
+            keep.
+        """
+        if len(keep) == self.count:
+            return
+        for array in (
+            self.pos,
+            self.velocity,
+            self.kind,
+            self.frame,
+            self.age,
+            self.done,
+            self.source,
+            self.paused,
+        ):
+            array[: len(keep)] = array[keep]
+        self.count = len(keep)
+
+    def render(self, surf, offset=(0, 0), alpha=1):
+        """
+        Draws every particle centered on its position with a single blits
+        call.
+
+        Parameters:
+            surf (pygame.Surface): The surface to draw on.
+            offset (tuple, optional): The camera offset. Defaults to (0, 0).
+            alpha (float, optional): Where to draw the particles between
+            their previous position (0) and the current one (1), ignoring
+            the sway. Defaults to 1.
+        """
+        count = self.count
+        if not count:
+            return
+        kind = self.kind[:count]
+        image = self.type_first[kind] + (
+            self.frame[:count] // self.type_duration[kind]
+        )
+        dest = self.pos[:count] - offset - self.image_half[image]
+        if alpha < 1:
+            dest -= self.velocity[:count] * (1 - alpha)
+        surf.blits(
+            zip(map(self.images.__getitem__, image.tolist()), dest.tolist()),
+            doreturn=False,
         )
@@ -0,0 +1,262 @@
+"""
+This module presents the game's low resolution display surface in the
+window. Every presenter scales the display straight into a reused
+subsurface of the window, instead of allocating a new full-screen surface
+and copying it each frame, and letterboxes it with black bars when the
+window does not have the display's aspect ratio.
+
+The backends are:
+
+- "integer": the largest whole-number nearest-neighbour scale that fits,
+  so every game pixel is the same size.
+- "stretch": the largest scale that fits, not necessarily a whole number.
+- "sdl": the window is opened at the display's size with pygame.SCALED,
+  so the display is only copied and SDL upscales and letterboxes it to the
+  real window, on the GPU where available.
+
+Screens laid out for the 1920x1080 window, such as the in-game menu, are
+drawn on the presenter's screen and shown with flip. When the game ends,
+close gives the main menu back its 1920x1080 window. The HUD is drawn on
+the overlay, over the scaled display, in coordinates scaled by
+overlay_scale.
+"""
+
+import pygame
+
+# The size of the screen the menus and the HUD are laid out for.
+WINDOW_SIZE = (1920, 1080)
+
+BLACK = (0, 0, 0)
+
+
+class Presenter:
+    """
+    Scales the display into the screen, centered and letterboxed.
+
+    Attributes:
+        flags (int): Flags the window is opened with.
+        screen (pygame.Surface): The surface screens laid out for
+        WINDOW_SIZE are drawn on; here the window surface.
+        overlay (pygame.Surface): The surface the HUD is drawn on over the
+        presented display; here the window surface.
+        overlay_scale (float): Size of the overlay relative to
+        WINDOW_SIZE.
+        size (tuple): The size of the display surface.
+        window (tuple): The screen size the layout was computed for.
+        area (pygame.Rect): Where the scaled display lands on the screen.
+        target (pygame.Surface): The subsurface of the screen at area.
+        bars (list[pygame.Rect]): The letterbox bars around area.
+    """
+
+    flags = 0
+
+    def __init__(self, screen, size):
+        """
+        Initializes a new Presenter.
+
+        Parameters:
+            screen (pygame.Surface): The window surface.
+            size (tuple): The size of the display surface.
+        """
+        self.screen = screen
+        self.overlay = screen
+        self.overlay_scale = 1
+        self.size = size
+        self.window = None
+        self.area = None
+        self.target = None
+        self.bars = []
+
+    def fit(self, window):
+        """
+        Gets the size of the scaled display.
+
+        Parameters:
+            window (tuple): The size of the screen.
+
+        Returns:
+            tuple: The scaled width and height.
+        """
+        scale = min(window[0] / self.size[0], window[1] / self.size[1])
+        return int(self.size[0] * scale), int(self.size[1] * scale)
+
+    def layout(self):
+        """
+        Places the scaled display on the screen. It is recomputed only when
+        the screen size changes.
+        """
+        window = self.screen.get_size()
+        if window == self.window:
+            return
+        self.window = window
+        self.area = pygame.Rect((0, 0), self.fit(window))
+        self.area.center = (window[0] // 2, window[1] // 2)
+        self.target = self.screen.subsurface(self.area)
+        screen = self.screen.get_rect()
+        self.bars = [
+            bar
+            for bar in (
+                pygame.Rect(0, 0, screen.width, self.area.top),
+                pygame.Rect(
+                    0,
+                    self.area.bottom,
+                    screen.width,
+                    screen.bottom - self.area.bottom,
+                ),
+                pygame.Rect(0, self.area.top, self.area.left, self.area.h),
+                pygame.Rect(
+                    self.area.right,
+                    self.area.top,
+                    screen.right - self.area.right,
+                    self.area.h,
+                ),
+            )
+            if bar.width > 0 and bar.height > 0
+        ]
+
+    def present(self, display):
+        """
+        Scales the display onto the screen. The caller still draws any
+        overlay and updates the window.
+
+        Parameters:
+            display (pygame.Surface): The display surface.
+        """
+        self.layout()
+        # Pruhy se mažou každý snímek, HUD do nich může kreslit
+        for bar in self.bars:
+            self.screen.fill(BLACK, bar)
+        pygame.transform.scale(display, self.area.size, self.target)
+
+    def flip(self):
+        """
+        Shows what was drawn on the screen, for screens that do not present
+        the display, such as the in-game menu.
+        """
+        pygame.display.flip()
+
+    def mouse_pos(self):
+        """
+        Gets the mouse position in screen coordinates.
+
+        Returns:
+            tuple: The mouse position.
+        """
+        return pygame.mouse.get_pos()
+
+    def close(self):
+        """
+        Gives the window back the mode screens laid out for WINDOW_SIZE,
+        such as the main menu, draw on, if the presenter changed it.
+        """
+
+
+class StretchPresenter(Presenter):
+    """
+    Scales the display as large as fits, keeping its aspect ratio.
+    """
+
+
+class IntegerPresenter(Presenter):
+    """
+    Scales the display by the largest whole number that fits, with
+    nearest-neighbour sampling.
+    """
+
+    def fit(self, window):
+        scale = min(window[0] // self.size[0], window[1] // self.size[1])
+        if scale < 1:
+            # Okno je menší než displej, zmenší se plynule
+            return super().fit(window)
+        return self.size[0] * scale, self.size[1] * scale
+
+
+class ScaledPresenter(Presenter):
+    """
+    Presents the display in a pygame.SCALED window of the display's size.
+    The display is copied as it is and SDL scales it to the real window,
+    so nothing is scaled on the CPU while playing.
+
+    Screens laid out for WINDOW_SIZE are drawn on an off-screen surface
+    that flip scales down to the window, and the HUD is drawn straight on
+    the window surface at overlay_scale.
+
+    Attributes:
+        surface (pygame.Surface): The window surface.
+    """
+
+    flags = pygame.SCALED
+
+    def __init__(self, screen, size):
+        """
+        Initializes a new ScaledPresenter.
+
+        Parameters:
+            screen (pygame.Surface): The window surface, of the display's
+            size.
+            size (tuple): The size of the display surface.
+        """
+        super().__init__(pygame.Surface(WINDOW_SIZE), size)
+        self.surface = screen
+        self.overlay = screen
+        self.overlay_scale = size[0] / WINDOW_SIZE[0]
+
+    def present(self, display):
+        self.surface.blit(display, (0, 0))
+
+    def flip(self):
+        # Obrazovky menu se kreslí ve velkém rozlišení a zmenší se
+        pygame.transform.smoothscale(
+            self.screen, self.surface.get_size(), self.surface
+        )
+        pygame.display.flip()
+
+    def mouse_pos(self):
+        # Myš je v souřadnicích okna velikosti displeje
+        x, y = pygame.mouse.get_pos()
+        return (
+            x * WINDOW_SIZE[0] // self.size[0],
+            y * WINDOW_SIZE[1] // self.size[1],
+        )
+
+    def close(self):
+        # Po ukončení hry (pygame.quit) už okno neexistuje
+        if pygame.display.get_init():
+            pygame.display.set_mode(WINDOW_SIZE)
+
+
+PRESENTERS = {
+    "integer": IntegerPresenter,
+    "stretch": StretchPresenter,
+    "sdl": ScaledPresenter,
+}
+
+
+def create_presenter(name, size, window_size=WINDOW_SIZE):
+    """
+    Opens the window for a presenter backend and creates the presenter.
+    The "sdl" window is opened at the display's size and scaled by SDL.
+    When SDL cannot create a renderer for a pygame.SCALED window, a plain
+    window with an IntegerPresenter is used instead.
+
+    Parameters:
+        name (str): The backend: "integer", "stretch" or "sdl".
+        size (tuple): The size of the display surface.
+        window_size (tuple, optional): The screen size. Defaults to
+        WINDOW_SIZE.
+
+    Returns:
+        Presenter: The presenter.
+    """
+    presenter = PRESENTERS[name]
+    try:
+        if presenter.flags & pygame.SCALED:
+            screen = pygame.display.set_mode(size, presenter.flags)
+        else:
+            screen = pygame.display.set_mode(window_size)
+    except pygame.error:
+        if not presenter.flags:
+            raise
+        presenter = IntegerPresenter
+        screen = pygame.display.set_mode(window_size)
+    return presenter(screen, size)
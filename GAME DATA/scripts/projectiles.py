@@ -0,0 +1,162 @@
+"""
+This module manages projectiles such as the enemies' fireballs. They are
+kept in a fixed-capacity pool of NumPy arrays instead of a list of lists:
+moving and ageing them is a single array operation, their tile collisions
+are checked in one batched query, and removing one swaps the last
+projectile into its slot.
+"""
+
+import numpy as np
+
+# Maximum number of projectiles alive at once.
+PROJECTILE_CAPACITY = 512
+
+# Projectiles older than this many frames disappear.
+PROJECTILE_LIFETIME = 360
+
+
+class ProjectileSystem:
+    """
+    A pool of projectiles flying horizontally, stored as a structure of
+    arrays. Projectiles 0 to count - 1 are alive.
+
+    Attributes:
+        capacity (int): Maximum number of projectiles alive at once.
+        lifetime (int): Age in frames after which projectiles disappear.
+        count (int): Number of projectiles alive.
+        pos (numpy.ndarray): Positions of the projectiles, shape
+        (capacity, 2).
+        speed (numpy.ndarray): Horizontal speeds of the projectiles.
+        age (numpy.ndarray): Ages of the projectiles in frames.
+        dead (numpy.ndarray): Marks projectiles that hit a tile or got too
+        old in the last update. They are still drawn once and removed by
+        sweep.
+    """
+
+    def __init__(
+        self, capacity=PROJECTILE_CAPACITY, lifetime=PROJECTILE_LIFETIME
+    ):
+        """
+        Initializes an empty ProjectileSystem.
+
+        Parameters:
+            capacity (int, optional): Maximum number of projectiles alive at
+            once. Defaults to PROJECTILE_CAPACITY.
+            lifetime (int, optional): Age in frames after which projectiles
+            disappear. Defaults to PROJECTILE_LIFETIME.
+        """
+        self.capacity = capacity
+        self.lifetime = lifetime
+        self.pos = np.zeros((capacity, 2))
+        self.speed = np.zeros(capacity)
+        self.age = np.zeros(capacity, dtype=np.int64)
+        self.dead = np.zeros(capacity, dtype=bool)
+        self.clear()
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        """
+        Removes every projectile.
+        """
+        self.count = 0
+
+    def spawn(self, pos, speed):
+        """
+        Fires a new projectile. Nothing happens if the pool is full.
+
+        Parameters:
+            pos (tuple): The starting position in pixels.
+            speed (float): The horizontal speed in pixels per frame.
+
+        Returns:
+            int or None: The slot of the new projectile, or None if the pool
+            is full.
+        """
+        if self.count == self.capacity:
+            return None
+        slot = self.count
+        self.count += 1
+        self.pos[slot] = pos
+        self.speed[slot] = speed
+        self.age[slot] = 0
+        self.dead[slot] = False
+        return slot
+
+    def remove(self, slot):
+        """
+        Removes a projectile by moving the last one into its slot.
+
+        Parameters:
+            slot (int): The slot of the projectile to remove.
+        """
+        last = self.count - 1
+        if slot != last:
+            self.pos[slot] = self.pos[last]
+            self.speed[slot] = self.speed[last]
+            self.age[slot] = self.age[last]
+            self.dead[slot] = self.dead[last]
+        self.count = last
+
+    def update(self, tilemap):
+        """
+        Moves and ages every projectile and marks the ones that flew into a
+        solid tile or got too old as dead.
+
+        Parameters:
+            tilemap (Tilemap): The tilemap the projectiles collide with.
+        """
+        count = self.count
+        if not count:
+            return
+        pos = self.pos[:count]
+        pos[:, 0] += self.speed[:count]
+        self.age[:count] += 1
+        # Kolize všech projektilů se zkontrolují najednou v mřížce pole
+        self.dead[:count] = tilemap.solid_check_many(pos) | (
+            self.age[:count] > self.lifetime
+        )
+
+    def positions(self):
+        """
+        Gets the positions of the projectiles alive as plain floats, for
+        registering them in a broadphase.
+
+        Returns:
+            list: An [x, y] list per slot.
+        """
+        return self.pos[: self.count].tolist()
+
+    def sweep(self):
+        """
+        Removes every projectile marked as dead.
+        """
+        # Odebírá se od konce, takže na uvolněné místo přijde živý projektil
+        for slot in np.flatnonzero(self.dead[: self.count])[::-1]:
+            self.remove(int(slot))
+
+    def render(self, surf, img, offset=(0, 0), alpha=1):
+        """
+        Draws every projectile centered on its position with a single blits
+        call.
+
+        Parameters:
+            surf (pygame.Surface): The surface to draw on.
+            img (pygame.Surface): The projectile image.
+            offset (tuple, optional): The camera offset. Defaults to (0, 0).
+            alpha (float, optional): Where to draw the projectiles between
+            their previous position (0) and the current one (1). Defaults
+            to 1.
+        """
+        if not self.count:
+            return
+        corner = (
+            self.pos[: self.count]
+            - (img.get_width() / 2, img.get_height() / 2)
+            - offset
+        )
+        if alpha < 1:
+            # Projektily letí rovně, předchozí poloha se dopočítá z rychlosti
+            corner[:, 0] -= self.speed[: self.count] * (1 - alpha)
+        surf.blits([(img, pos) for pos in corner.tolist()], doreturn=False)
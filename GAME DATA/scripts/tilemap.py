@@ -6,11 +6,19 @@ for loading and saving tilemaps from files, accessing and modifying the tiles
 tilemap to the screen. It also includes utilities for tile-based collision
 detection and automatic tile variant
 selection based on neighboring tiles to create more visually cohesive maps.
+
+Grid tiles are stored in fixed-size chunks of compact integer arrays (one
+for the interned tile type id and one for the variant), so looking a tile up
+never has to build or hash an "x;y" string.
 """
 
 import json
-import pygame
+import math
+from array import array
+from collections import OrderedDict
 
+import numpy as np
+import pygame
 
 # Offsets for determining tile neighbors.
 NEIGHBOR_OFFSETS = [
@@ -28,6 +36,243 @@ NEIGHBOR_OFFSETS = [
 # Set of tile types that are considered solid for collision purposes.
 tiles_set = {"grass", "stone", "sky"}
 
+# (type, variant) pairs of tiles that kill the player on contact.
+hazard_set = {
+    ("large_decor", 2),
+    ("large_decor", 3),
+    ("large_decor", 4),
+    ("large_decor", 5),
+    ("large_decor", 6),
+    ("large_decor", 7),
+    ("large_decor", 21),
+    ("large_decor", 22),
+    ("large_decor", 23),
+    ("large_decor", 24),
+}
+
+# Chunks are CHUNK_SIZE x CHUNK_SIZE tiles. The size has to be a power of two
+# so that chunk and local coordinates can be split with shifts and masks.
+CHUNK_SHIFT = 4
+CHUNK_SIZE = 1 << CHUNK_SHIFT
+CHUNK_MASK = CHUNK_SIZE - 1
+
+# Default memory cap for baked chunk surfaces, in bytes.
+RENDER_CACHE_BYTES = 16 * 1024 * 1024
+
+
+class TileChunk:
+    """
+    A square block of grid tiles stored as two flat arrays of unsigned
+    16-bit integers, indexed by local_y * CHUNK_SIZE + local_x.
+
+    Attributes:
+        types (array or memoryview): Interned tile type id per cell, 0 for
+        an empty cell.
+        variants (array or memoryview): Tile variant per cell.
+        solid (bytearray): 1 for each cell holding a solid tile, else 0.
+        count (int): Number of non-empty cells in the chunk.
+    """
+
+    __slots__ = ("types", "variants", "solid", "count")
+
+    def __init__(self, types=None, variants=None, count=0, solid=None):
+        """
+        Initializes a chunk, empty unless existing cell data is given.
+
+        Parameters:
+            types (array or memoryview, optional): Writable "H" buffer of
+            CHUNK_SIZE * CHUNK_SIZE type ids to use as is, for example a view
+            into a memory-mapped map file.
+            variants (array or memoryview, optional): Matching buffer of
+            variants.
+            count (int, optional): Number of non-empty cells in the given
+            data. Defaults to 0.
+            solid (bytearray, optional): Solid occupancy of the given data.
+            Defaults to an empty bitmap.
+        """
+        if types is None:
+            types = array("H", bytes(2 * CHUNK_SIZE * CHUNK_SIZE))
+            variants = array("H", bytes(2 * CHUNK_SIZE * CHUNK_SIZE))
+        if solid is None:
+            solid = bytearray(CHUNK_SIZE * CHUNK_SIZE)
+        self.types = types
+        self.variants = variants
+        self.solid = solid
+        self.count = count
+
+
+class ChunkSurfaceCache:
+    """
+    Bakes the grid tiles and offgrid decor of each chunk into a single
+    surface, so rendering the visible area only takes a handful of blits.
+
+    Baked surfaces are kept in least recently used order and evicted once
+    their total size exceeds max_bytes. Tile images may spill over their
+    cell to the right and down, but never by more than one chunk.
+
+    Attributes:
+        tilemap (Tilemap): The tilemap whose chunks are baked.
+        max_bytes (int): Memory cap for the cached surfaces, in bytes.
+        surfaces (OrderedDict): Baked surfaces keyed by chunk coordinates,
+        oldest first. Chunks with nothing to draw map to None.
+        used_bytes (int): Memory currently used by the cached surfaces.
+    """
+
+    def __init__(self, tilemap, max_bytes=RENDER_CACHE_BYTES):
+        """
+        Initializes an empty cache.
+
+        Parameters:
+            tilemap (Tilemap): The tilemap whose chunks are baked.
+            max_bytes (int, optional): Memory cap for the cached surfaces.
+            Defaults to RENDER_CACHE_BYTES.
+        """
+        self.tilemap = tilemap
+        self.max_bytes = max_bytes
+        self.surfaces = OrderedDict()
+        self.used_bytes = 0
+
+    def clear(self):
+        """
+        Drops every baked surface.
+        """
+        self.surfaces.clear()
+        self.used_bytes = 0
+
+    def invalidate(self, key):
+        """
+        Drops the baked surface of one chunk.
+
+        Parameters:
+            key (tuple): The (chunk_x, chunk_y) coordinates of the chunk.
+        """
+        img = self.surfaces.pop(key, None)
+        if img is not None:
+            self.used_bytes -= self.surface_bytes(img)
+
+    def invalidate_at(self, pos):
+        """
+        Drops the baked surfaces a tile drawn at a pixel position can appear
+        on: the chunk containing the position and its right, lower and
+        lower right neighbours.
+
+        Parameters:
+            pos (tuple): The top left corner of the tile, in pixels.
+        """
+        chunk_px = CHUNK_SIZE * self.tilemap.tile_size
+        cx = int(pos[0] // chunk_px)
+        cy = int(pos[1] // chunk_px)
+        for key in ((cx, cy), (cx + 1, cy), (cx, cy + 1), (cx + 1, cy + 1)):
+            self.invalidate(key)
+
+    @staticmethod
+    def surface_bytes(img):
+        """
+        Estimates the memory used by a surface.
+
+        Parameters:
+            img (pygame.Surface): The surface.
+
+        Returns:
+            int: The size of the pixel data in bytes.
+        """
+        return img.get_width() * img.get_height() * img.get_bytesize()
+
+    def get(self, key):
+        """
+        Gets the baked surface of a chunk, baking it on a cache miss.
+
+        Parameters:
+            key (tuple): The (chunk_x, chunk_y) coordinates of the chunk.
+
+        Returns:
+            pygame.Surface or None: The baked chunk, or None if there is
+            nothing to draw in it.
+        """
+        if key in self.surfaces:
+            self.surfaces.move_to_end(key)
+            return self.surfaces[key]
+
+        img = self.bake(key)
+        self.surfaces[key] = img
+        if img is not None:
+            self.used_bytes += self.surface_bytes(img)
+            while self.used_bytes > self.max_bytes and len(self.surfaces) > 1:
+                old = self.surfaces.popitem(last=False)[1]
+                if old is not None:
+                    self.used_bytes -= self.surface_bytes(old)
+        return img
+
+    def bake(self, key):
+        """
+        Draws the offgrid decor and then the grid tiles overlapping a chunk
+        onto a new surface, in the same order Tilemap.render used to draw
+        them tile by tile.
+
+        Parameters:
+            key (tuple): The (chunk_x, chunk_y) coordinates of the chunk.
+
+        Returns:
+            pygame.Surface or None: The baked chunk, or None if there is
+            nothing to draw in it.
+        """
+        tilemap = self.tilemap
+        assets = tilemap.game.assets
+        tile_size = tilemap.tile_size
+        chunk_px = CHUNK_SIZE * tile_size
+        area = pygame.Rect(
+            key[0] * chunk_px, key[1] * chunk_px, chunk_px, chunk_px
+        )
+
+        blits = []
+        for handle in tilemap.offgrid_handles_near(area):
+            tile = tilemap.offgrid[handle]
+            img = assets[tile["type"]][tile["variant"]]
+            pos = (
+                math.floor(tile["pos"][0]) - area.x,
+                math.floor(tile["pos"][1]) - area.y,
+            )
+            if (
+                pos[0] < chunk_px
+                and pos[1] < chunk_px
+                and pos[0] + img.get_width() > 0
+                and pos[1] + img.get_height() > 0
+            ):
+                blits.append((img, pos))
+
+        # Dlaždice z levého a horního bloku mohou přesahovat do tohoto
+        grid = []
+        for ncx in (key[0] - 1, key[0]):
+            for ncy in (key[1] - 1, key[1]):
+                chunk = tilemap.chunks.get((ncx, ncy))
+                if chunk is None:
+                    continue
+                for i in range(CHUNK_SIZE * CHUNK_SIZE):
+                    tid = chunk.types[i]
+                    if not tid:
+                        continue
+                    x = (ncx << CHUNK_SHIFT) | (i & CHUNK_MASK)
+                    y = (ncy << CHUNK_SHIFT) | (i >> CHUNK_SHIFT)
+                    img = assets[tilemap.type_names[tid]][chunk.variants[i]]
+                    pos = (x * tile_size - area.x, y * tile_size - area.y)
+                    if (
+                        pos[0] + img.get_width() > 0
+                        and pos[1] + img.get_height() > 0
+                    ):
+                        grid.append((x, y, img, pos))
+        grid.sort(key=lambda entry: (entry[0], entry[1]))
+        blits.extend((img, pos) for _, _, img, pos in grid)
+
+        if not blits:
+            return None
+        baked = pygame.Surface((chunk_px, chunk_px))
+        if pygame.display.get_surface() is not None:
+            baked = baked.convert()
+        baked.fill((0, 0, 0))
+        baked.blits(blits, doreturn=False)
+        baked.set_colorkey((0, 0, 0), pygame.RLEACCEL)
+        return baked
+
 
 class Tilemap:
     """
@@ -38,13 +283,49 @@ class Tilemap:
         game (Game): The main game object, providing access to global
         resources and settings.
         tile_size (int): The size of each tile in pixels.
-        tilemap (dict): A dictionary representing the grid of tiles, with
-        keys as string coordinates "x;y".
-        offgrid_tiles (list): A list of tiles that do not align to the grid,
-        used for decorative elements.
+        chunks (dict): Grid tile storage, mapping (chunk_x, chunk_y) to a
+        TileChunk.
+        type_names (list): Interned tile type names indexed by type id. Id 0
+        is reserved for empty cells.
+        type_ids (dict): Reverse lookup from tile type name to type id.
+        solid_ids (bytearray): 1 for each type id whose type is in
+        tiles_set, else 0.
+        solid_rects (dict): The solid cells of each chunk merged into as
+        few (x, y, width, height) pixel tuples as possible, keyed by chunk
+        coordinates.
+        Filled in lazily and dropped whenever the chunk's solid cells
+        change.
+        solid_version (int): Increases every time solid cells change or the
+        map is cleared, so copies of the solid geometry can tell when they
+        are stale.
+        solid_cells (numpy.ndarray): Dense bool copy of the solid cells of
+        every chunk, indexed [row, column], kept up to date by solid_grid.
+        solid_origin (tuple): Tile coordinates of solid_cells[0, 0].
+        solid_dirty (set): Chunks whose solid cells changed since
+        solid_cells was last updated.
+        offgrid (dict): Tiles that do not align to the grid, used for
+        decorative elements, keyed by an increasing integer handle so that
+        iteration keeps map order.
+        offgrid_buckets (dict): Offgrid handles bucketed by the chunk-sized
+        pixel region containing the tile position.
+        tile_index (dict): Maps each (type, variant) pair to the grid
+        coordinates and offgrid handles of the tiles using it. Grid
+        coordinates map to the order the tile was placed in, so extract
+        can return tiles in map order. Kept up to date by every method that
+        adds or removes tiles.
+        next_grid_order (int): Placement order given to the next new grid
+        tile.
+        hazard_index (dict): Hazard rectangles bucketed by the grid cells
+        they overlap, filled in by build_hazard_index.
+        render_cache (ChunkSurfaceCache): Baked chunk surfaces used by
+        render.
+        stream (MapStream or None): The stream loading chunks of a compiled
+        map on demand, or None when the whole map is in memory.
     """
 
-    def __init__(self, game, tile_size=16):
+    def __init__(
+        self, game, tile_size=16, render_cache_bytes=RENDER_CACHE_BYTES
+    ):
         """
         Initializes a new Tilemap instance.
 
@@ -52,16 +333,390 @@ class Tilemap:
             game (Game): The main game object.
             tile_size (int, optional): The size of each tile in pixels.
             Defaults to 16.
+            render_cache_bytes (int, optional): Memory cap for baked chunk
+            surfaces. Defaults to RENDER_CACHE_BYTES.
         """
         self.game = game
         self.tile_size = tile_size
-        self.tilemap = {}
-        self.offgrid_tiles = []
+        self.render_cache = ChunkSurfaceCache(self, render_cache_bytes)
+        self.solid_version = 0
+        self.clear()
+
+    def clear(self):
+        """
+        Removes every tile from the map and resets the indexes.
+        """
+        self.chunks = {}
+        self.type_names = [None]
+        self.type_ids = {}
+        self.solid_ids = bytearray(1)
+        self.solid_rects = {}
+        self.solid_version += 1
+        self.solid_cells = np.zeros((0, 0), dtype=bool)
+        self.solid_origin = (0, 0)
+        self.solid_dirty = set()
+        self.offgrid = {}
+        self.offgrid_buckets = {}
+        self.next_offgrid_handle = 0
+        self.next_grid_order = 0
+        self.tile_index = {}
+        self.hazard_index = {}
+        self.stream = None
+        self.render_cache.clear()
+
+    @property
+    def offgrid_tiles(self):
+        """
+        The offgrid tiles in map order.
+
+        Returns:
+            list: The offgrid tile dictionaries.
+        """
+        return list(self.offgrid.values())
+
+    @offgrid_tiles.setter
+    def offgrid_tiles(self, tiles):
+        for handle in list(self.offgrid):
+            self.remove_offgrid_tile(handle)
+        for tile in tiles:
+            self.add_offgrid_tile(tile)
+
+    def index_entry(self, tile_type, variant):
+        """
+        Gets the tile_index entry of a (type, variant) pair, creating it if
+        needed.
+
+        Parameters:
+            tile_type (str): The tile type name.
+            variant (int): The tile variant.
+
+        Returns:
+            tuple: A (grid, offgrid) pair of dictionaries, mapping grid
+            coordinates to their placement order and used as an ordered set
+            of offgrid handles.
+        """
+        entry = self.tile_index.get((tile_type, variant))
+        if entry is None:
+            entry = self.tile_index[(tile_type, variant)] = ({}, {})
+        return entry
+
+    def offgrid_bucket(self, pos):
+        """
+        Gets the offgrid_buckets key of a pixel position.
+
+        Parameters:
+            pos (tuple): The position, in pixels.
+
+        Returns:
+            tuple: The (bucket_x, bucket_y) coordinates of the position.
+        """
+        chunk_px = CHUNK_SIZE * self.tile_size
+        return (int(pos[0] // chunk_px), int(pos[1] // chunk_px))
+
+    def offgrid_handles_near(self, rect):
+        """
+        Gets the handles of the offgrid tiles that can overlap a rectangle,
+        assuming no tile image is larger than a chunk. Only the buckets
+        covering the rectangle and the ones above and to the left of it are
+        visited.
+
+        Parameters:
+            rect (pygame.Rect): The area to look at, in pixels.
+
+        Returns:
+            list: The candidate handles in map order.
+        """
+        left, top = self.offgrid_bucket(rect.topleft)
+        right, bottom = self.offgrid_bucket((rect.right - 1, rect.bottom - 1))
+        handles = []
+        for bx in range(left - 1, right + 1):
+            for by in range(top - 1, bottom + 1):
+                bucket = self.offgrid_buckets.get((bx, by))
+                if bucket:
+                    handles.extend(bucket)
+        handles.sort()
+        return handles
+
+    def add_offgrid_tile(self, tile, handle=None):
+        """
+        Adds a tile that is not aligned to the grid.
+
+        Parameters:
+            tile (dict): The tile, with "type", "variant" and "pos" keys.
+            The position is in pixels.
+            handle (int, optional): An unused handle to store the tile
+            under, for loaders that restore the map order of tiles added out
+            of order. Defaults to the next free handle.
+
+        Returns:
+            int: The handle of the new tile.
+        """
+        key = self.offgrid_bucket(tile["pos"])
+        if self.stream is not None:
+            self.stream.touch(key)
+        if handle is None:
+            handle = self.next_offgrid_handle
+        self.next_offgrid_handle = max(self.next_offgrid_handle, handle + 1)
+        self.offgrid[handle] = tile
+        self.offgrid_buckets.setdefault(key, {})[handle] = None
+        self.index_entry(tile["type"], tile["variant"])[1][handle] = None
+        self.render_cache.invalidate_at(tile["pos"])
+        return handle
+
+    def remove_offgrid_tile(self, handle):
+        """
+        Removes an offgrid tile.
+
+        Parameters:
+            handle (int): The handle returned by add_offgrid_tile.
+
+        Returns:
+            dict: The removed tile.
+        """
+        tile = self.offgrid.pop(handle)
+        key = self.offgrid_bucket(tile["pos"])
+        if self.stream is not None:
+            self.stream.touch(key)
+        del self.offgrid_buckets[key][handle]
+        if not self.offgrid_buckets[key]:
+            del self.offgrid_buckets[key]
+        del self.tile_index[(tile["type"], tile["variant"])][1][handle]
+        self.render_cache.invalidate_at(tile["pos"])
+        return tile
+
+    @property
+    def tilemap(self):
+        """
+        A snapshot of the grid tiles in the legacy "x;y" keyed format.
+
+        Modifying the returned dictionary does not change the map; use
+        set_tile and remove_tile instead.
+
+        Returns:
+            dict: Tile dictionaries keyed by their "x;y" grid coordinates,
+            in the order the tiles were placed in.
+        """
+
+        def order(tile):
+            grid = self.tile_index[(tile["type"], tile["variant"])][0]
+            return grid[tuple(tile["pos"])]
+
+        tiles = sorted(self.grid_tiles(), key=order)
+        return {
+            str(tile["pos"][0]) + ";" + str(tile["pos"][1]): tile
+            for tile in tiles
+        }
+
+    def type_id(self, tile_type):
+        """
+        Returns the interned id of a tile type, registering it if needed.
+
+        Parameters:
+            tile_type (str): The tile type name.
+
+        Returns:
+            int: The id used for the type in chunk arrays.
+        """
+        tid = self.type_ids.get(tile_type)
+        if tid is None:
+            tid = len(self.type_names)
+            self.type_names.append(tile_type)
+            self.type_ids[tile_type] = tid
+            self.solid_ids.append(tile_type in tiles_set)
+        return tid
+
+    def solid_changed(self, key):
+        """
+        Records that the solid cells of a chunk changed.
+
+        Parameters:
+            key (tuple): The (chunk_x, chunk_y) coordinates of the chunk.
+        """
+        self.solid_rects.pop(key, None)
+        self.solid_version += 1
+        self.solid_dirty.add(key)
+
+    def install_chunk(self, key, types, variants, count, orders):
+        """
+        Adds a whole chunk of existing cell data to the map, for example one
+        read from a compiled map, and registers its tiles in tile_index.
+        The type ids must already match type_names.
+
+        Parameters:
+            key (tuple): The (chunk_x, chunk_y) coordinates of the chunk.
+            types (array or memoryview): "H" buffer of type ids.
+            variants (array or memoryview): "H" buffer of variants.
+            count (int): Number of non-empty cells.
+            orders (array or memoryview): "I" buffer of the placement order
+            of each cell's tile.
+        """
+        solid_ids = self.solid_ids
+        self.chunks[key] = TileChunk(
+            types,
+            variants,
+            count,
+            bytearray([solid_ids[tid] for tid in types]),
+        )
+        for i, tid in enumerate(types):
+            if tid:
+                loc = (
+                    (key[0] << CHUNK_SHIFT) | (i & CHUNK_MASK),
+                    (key[1] << CHUNK_SHIFT) | (i >> CHUNK_SHIFT),
+                )
+                self.index_entry(self.type_names[tid], variants[i])[0][loc] = (
+                    orders[i]
+                )
+        self.solid_changed(key)
+
+    def drop_chunk(self, key):
+        """
+        Removes a whole chunk from the map and from tile_index, without
+        touching the offgrid tiles around it.
+
+        Parameters:
+            key (tuple): The (chunk_x, chunk_y) coordinates of the chunk.
+        """
+        chunk = self.chunks.pop(key, None)
+        if chunk is None:
+            return
+        self.solid_changed(key)
+        for i, tid in enumerate(chunk.types):
+            if tid:
+                loc = (
+                    (key[0] << CHUNK_SHIFT) | (i & CHUNK_MASK),
+                    (key[1] << CHUNK_SHIFT) | (i >> CHUNK_SHIFT),
+                )
+                pair = (self.type_names[tid], chunk.variants[i])
+                del self.tile_index[pair][0][loc]
+
+    def get_tile(self, x, y):
+        """
+        Gets the grid tile at the given grid coordinates.
+
+        Parameters:
+            x (int): The tile column.
+            y (int): The tile row.
+
+        Returns:
+            dict or None: The tile as a dictionary with "type", "variant" and
+            "pos" keys, or None if the cell is empty.
+        """
+        chunk = self.chunks.get((x >> CHUNK_SHIFT, y >> CHUNK_SHIFT))
+        if chunk is None:
+            return None
+        i = ((y & CHUNK_MASK) << CHUNK_SHIFT) | (x & CHUNK_MASK)
+        tid = chunk.types[i]
+        if not tid:
+            return None
+        return {
+            "type": self.type_names[tid],
+            "variant": chunk.variants[i],
+            "pos": [x, y],
+        }
+
+    def set_tile(self, x, y, tile_type, variant):
+        """
+        Places a tile on the grid, replacing any tile already in the cell.
+
+        Parameters:
+            x (int): The tile column.
+            y (int): The tile row.
+            tile_type (str): The tile type name.
+            variant (int): The tile variant.
+        """
+        key = (x >> CHUNK_SHIFT, y >> CHUNK_SHIFT)
+        if self.stream is not None:
+            self.stream.touch(key)
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            chunk = self.chunks[key] = TileChunk()
+        i = ((y & CHUNK_MASK) << CHUNK_SHIFT) | (x & CHUNK_MASK)
+        old = chunk.types[i]
+        if old:
+            # Nahrazená dlaždice si ponechá své pořadí v mapě
+            old_pair = (self.type_names[old], chunk.variants[i])
+            order = self.tile_index[old_pair][0].pop((x, y))
+        else:
+            chunk.count += 1
+            order = self.next_grid_order
+            self.next_grid_order += 1
+        chunk.types[i] = self.type_id(tile_type)
+        chunk.variants[i] = variant
+        solid = self.solid_ids[chunk.types[i]]
+        if chunk.solid[i] != solid:
+            chunk.solid[i] = solid
+            self.solid_changed(key)
+        self.index_entry(tile_type, variant)[0][(x, y)] = order
+        self.render_cache.invalidate_at(
+            (x * self.tile_size, y * self.tile_size)
+        )
+
+    def remove_tile(self, x, y):
+        """
+        Removes the grid tile at the given grid coordinates.
+
+        Parameters:
+            x (int): The tile column.
+            y (int): The tile row.
+
+        Returns:
+            dict or None: The removed tile, or None if the cell was empty.
+        """
+        key = (x >> CHUNK_SHIFT, y >> CHUNK_SHIFT)
+        if self.stream is not None:
+            self.stream.touch(key)
+        tile = self.get_tile(x, y)
+        if tile is not None:
+            del self.tile_index[(tile["type"], tile["variant"])][0][(x, y)]
+            chunk = self.chunks[key]
+            i = ((y & CHUNK_MASK) << CHUNK_SHIFT) | (x & CHUNK_MASK)
+            chunk.types[i] = 0
+            chunk.variants[i] = 0
+            if chunk.solid[i]:
+                chunk.solid[i] = 0
+                self.solid_changed(key)
+            chunk.count -= 1
+            if not chunk.count:
+                del self.chunks[key]
+            self.render_cache.invalidate_at(
+                (x * self.tile_size, y * self.tile_size)
+            )
+        return tile
+
+    def grid_tiles(self):
+        """
+        Iterates over every grid tile in the map.
+
+        Yields:
+            dict: Each tile as a dictionary with "type", "variant" and "pos"
+            keys.
+        """
+        type_names = self.type_names
+        for (cx, cy), chunk in list(self.chunks.items()):
+            types = chunk.types
+            variants = chunk.variants
+            for i in range(CHUNK_SIZE * CHUNK_SIZE):
+                if types[i]:
+                    yield {
+                        "type": type_names[types[i]],
+                        "variant": variants[i],
+                        "pos": [
+                            (cx << CHUNK_SHIFT) | (i & CHUNK_MASK),
+                            (cy << CHUNK_SHIFT) | (i >> CHUNK_SHIFT),
+                        ],
+                    }
 
     def extract(self, id_pairs, keep=False):
         """
         Extracts tiles from the map matching specific id and variant pairs.
 
+        Matches are looked up in tile_index, so the cost depends on the
+        number of matching tiles rather than on the size of the map. When the
+        map is streamed, chunks that are not resident are searched through
+        the index stored in the compiled map. Like the plain list of tiles
+        did, the offgrid matches come first and both parts keep the order
+        the tiles were placed in.
+
         Parameters:
             id_pairs (list of tuple): A list of tuples (type, variant)
             to match tiles against.
@@ -72,27 +727,162 @@ class Tilemap:
             list: A list of matched tiles with their properties.
         """
         matches = []  # Inicializace prázdného seznamu pro shody
+        streamed = ([], [])
+        if self.stream is not None:
+            streamed = self.stream.extract(id_pairs, keep=keep)
+        entries = [
+            self.tile_index[pair]
+            for pair in dict.fromkeys(id_pairs)
+            if pair in self.tile_index
+        ]
 
-        # Iterace přes dlaždice mimo mřížku
-        for tile in self.offgrid_tiles.copy():
-            if (tile["type"], tile["variant"]) in id_pairs:
-                matches.append(tile.copy())
-                if not keep:
-                    self.offgrid_tiles.remove(tile)
+        # Dlaždice mimo mřížku, seřazené podle pořadí v mapě
+        offgrid = list(streamed[0])
+        for handle in [h for entry in entries for h in entry[1]]:
+            if keep:
+                offgrid.append((handle, self.offgrid[handle].copy()))
+            else:
+                offgrid.append(
+                    (handle, self.remove_offgrid_tile(handle).copy())
+                )
+        offgrid.sort(key=lambda match: match[0])
+        matches.extend(tile for _, tile in offgrid)
 
-        # Iterace přes dlaždice v mřížce
-        for loc in list(self.tilemap.keys()):
-            tile = self.tilemap[loc]
-            if (tile["type"], tile["variant"]) in id_pairs:
-                matches.append(tile.copy())
-                matches[-1]["pos"] = matches[-1]["pos"].copy()
-                matches[-1]["pos"][0] *= self.tile_size
-                matches[-1]["pos"][1] *= self.tile_size
-                if not keep:
-                    del self.tilemap[loc]
+        # Dlaždice v mřížce
+        grid = list(streamed[1])
+        cells = [cell for entry in entries for cell in entry[0].items()]
+        for loc, order in cells:
+            if keep:
+                tile = self.get_tile(loc[0], loc[1])
+            else:
+                tile = self.remove_tile(loc[0], loc[1])
+            tile["pos"][0] *= self.tile_size
+            tile["pos"][1] *= self.tile_size
+            grid.append((order, tile))
+        grid.sort(key=lambda match: match[0])
+        matches.extend(tile for _, tile in grid)
 
         return matches  # Vrátí nalezené shody
 
+    def update_stream(self, *points):
+        """
+        Loads the chunks around the given points when the map is streamed,
+        and evicts chunks far from all of them. Does nothing otherwise.
+
+        Parameters:
+            *points (tuple): Focus positions in pixels.
+        """
+        if self.stream is not None:
+            self.stream.update(*points)
+
+    def is_resident(self, pos):
+        """
+        Checks whether the chunk at a pixel position is in memory. Always
+        True unless the map is streamed.
+
+        Parameters:
+            pos (tuple): The position, in pixels.
+
+        Returns:
+            bool: True if the tiles around the position are loaded.
+        """
+        if self.stream is None:
+            return True
+        return self.offgrid_bucket(pos) in self.stream.resident
+
+    def tiles_in_rect(self, rect):
+        """
+        Gets the tiles overlapping a rectangle. Like in extract, every tile
+        is treated as a tile_size square at its position, and the returned
+        positions are in pixels.
+
+        Parameters:
+            rect (pygame.Rect): The area to check, in pixels.
+
+        Returns:
+            list: Copies of the offgrid tiles in the area, followed by the
+            grid tiles in the area.
+        """
+        matches = []
+        for handle in self.offgrid_handles_near(rect):
+            tile = self.offgrid[handle]
+            if rect.colliderect(
+                pygame.Rect(
+                    tile["pos"][0],
+                    tile["pos"][1],
+                    self.tile_size,
+                    self.tile_size,
+                )
+            ):
+                matches.append(tile.copy())
+
+        for x in range(
+            rect.left // self.tile_size,
+            (rect.right - 1) // self.tile_size + 1,
+        ):
+            for y in range(
+                rect.top // self.tile_size,
+                (rect.bottom - 1) // self.tile_size + 1,
+            ):
+                tile = self.get_tile(x, y)
+                if tile is not None:
+                    tile["pos"][0] *= self.tile_size
+                    tile["pos"][1] *= self.tile_size
+                    matches.append(tile)
+        return matches
+
+    def build_hazard_index(self, id_pairs=hazard_set):
+        """
+        Indexes the hazard tiles of the current map by the grid cells they
+        cover. Hazards are static, so this only has to run once per loaded
+        level.
+
+        Parameters:
+            id_pairs (set of tuple, optional): The (type, variant) pairs that
+            count as hazards. Defaults to hazard_set.
+        """
+        self.hazard_index = {}
+        for tile in self.extract(id_pairs, keep=True):
+            rect = pygame.Rect(
+                tile["pos"][0], tile["pos"][1], self.tile_size, self.tile_size
+            )
+            for x in range(
+                rect.left // self.tile_size,
+                (rect.right - 1) // self.tile_size + 1,
+            ):
+                for y in range(
+                    rect.top // self.tile_size,
+                    (rect.bottom - 1) // self.tile_size + 1,
+                ):
+                    self.hazard_index.setdefault((x, y), []).append(rect)
+
+    def hazards_in_rect(self, rect):
+        """
+        Gets the hazards overlapping a rectangle, looking only at the grid
+        cells the rectangle covers.
+
+        Parameters:
+            rect (pygame.Rect): The area to check, in pixels.
+
+        Returns:
+            list: The pygame.Rect of every hazard colliding with the area.
+        """
+        hits = []
+        seen = set()
+        for x in range(
+            rect.left // self.tile_size,
+            (rect.right - 1) // self.tile_size + 1,
+        ):
+            for y in range(
+                rect.top // self.tile_size,
+                (rect.bottom - 1) // self.tile_size + 1,
+            ):
+                for hazard in self.hazard_index.get((x, y), ()):
+                    if id(hazard) not in seen and rect.colliderect(hazard):
+                        seen.add(id(hazard))
+                        hits.append(hazard)
+        return hits
+
     def tiles_around(self, pos):
         """
         Gets a list of tiles surrounding a specific position.
@@ -111,13 +901,11 @@ class Tilemap:
         )  # Určení umístění dlaždice
         # Iterace přes posuny sousedních dlaždic
         for offset in NEIGHBOR_OFFSETS:
-            check_loc = (
-                str(tile_loc[0] + offset[0])
-                + ";"
-                + str(tile_loc[1] + offset[1])
+            tile = self.get_tile(
+                tile_loc[0] + offset[0], tile_loc[1] + offset[1]
             )
-            if check_loc in self.tilemap:
-                tiles.append(self.tilemap[check_loc])
+            if tile is not None:
+                tiles.append(tile)
         return tiles  # Vrátí seznam sousedních dlaždic
 
     def save(self, path):
@@ -128,10 +916,11 @@ class Tilemap:
             path (str): The file path to save the tilemap to.
         """
         # Uloží stav dlaždic do souboru ve formátu JSON
+        tilemap = self.tilemap
         with open(path, "w") as f:
             json.dump(
                 {
-                    "tilemap": self.tilemap,
+                    "tilemap": tilemap,
                     "tile_size": self.tile_size,
                     "offgrid": self.offgrid_tiles,
                 },
@@ -157,9 +946,14 @@ class Tilemap:
             map_data["entity_count"] = min(map_data["entity_count"], 2)
         # Add similar checks for other keys as needed
 
-        self.tilemap = map_data["tilemap"]
+        self.clear()
         self.tile_size = map_data["tile_size"]
-        self.offgrid_tiles = map_data["offgrid"]
+        for tile in map_data["tilemap"].values():
+            self.set_tile(
+                tile["pos"][0], tile["pos"][1], tile["type"], tile["variant"]
+            )
+        for tile in map_data["offgrid"]:
+            self.add_offgrid_tile(tile)
 
     def solid_check(self, pos):
         """
@@ -173,19 +967,123 @@ class Tilemap:
               otherwise.
         """
         # Zkontroluje, zda je na dané pozici pevná dlaždice
-        tile_loc = (
-            str(int(pos[0] // self.tile_size))
-            + ";"
-            + str(int(pos[1] // self.tile_size))
+        x = int(pos[0] // self.tile_size)
+        y = int(pos[1] // self.tile_size)
+        chunk = self.chunks.get((x >> CHUNK_SHIFT, y >> CHUNK_SHIFT))
+        if chunk is None:
+            return False
+        return (
+            chunk.solid[((y & CHUNK_MASK) << CHUNK_SHIFT) | (x & CHUNK_MASK)]
+            == 1
         )
-        if tile_loc in self.tilemap:
-            if self.tilemap[tile_loc]["type"] in tiles_set:
-                return self.tilemap[tile_loc]  # Vrátí dlaždici
+
+    def copy_solid_chunk(self, key):
+        """
+        Copies the solid cells of a chunk into solid_cells, which must
+        already cover it. A chunk that is not loaded is copied as empty.
+
+        Parameters:
+            key (tuple): The (chunk_x, chunk_y) coordinates of the chunk.
+        """
+        row = (key[1] << CHUNK_SHIFT) - self.solid_origin[1]
+        col = (key[0] << CHUNK_SHIFT) - self.solid_origin[0]
+        block = self.solid_cells[
+            row : row + CHUNK_SIZE, col : col + CHUNK_SIZE
+        ]
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            block[:] = False
+        else:
+            block[:] = np.frombuffer(chunk.solid, dtype=np.uint8).reshape(
+                CHUNK_SIZE, CHUNK_SIZE
+            )
+
+    def solid_grid(self):
+        """
+        Gets a dense copy of the solid cells for NumPy lookups. Only the
+        chunks that changed since the last call are copied again; the grid
+        is rebuilt when a chunk outside of it was added.
+
+        Returns:
+            tuple: The bool array solid_cells, indexed [row, column], and
+            the tile coordinates of its first cell.
+        """
+        dirty = self.solid_dirty
+        if not dirty:
+            return self.solid_cells, self.solid_origin
+        height, width = self.solid_cells.shape
+        origin_x, origin_y = self.solid_origin
+        if all(
+            0 <= (key[0] << CHUNK_SHIFT) - origin_x < width
+            and 0 <= (key[1] << CHUNK_SHIFT) - origin_y < height
+            for key in dirty
+        ):
+            for key in dirty:
+                self.copy_solid_chunk(key)
+        elif self.chunks:
+            # Nový blok leží mimo mřížku, sestaví se celá znovu
+            xs = [key[0] for key in self.chunks]
+            ys = [key[1] for key in self.chunks]
+            min_x, min_y = min(xs), min(ys)
+            self.solid_cells = np.zeros(
+                (
+                    (max(ys) - min_y + 1) * CHUNK_SIZE,
+                    (max(xs) - min_x + 1) * CHUNK_SIZE,
+                ),
+                dtype=bool,
+            )
+            self.solid_origin = (min_x << CHUNK_SHIFT, min_y << CHUNK_SHIFT)
+            for key in self.chunks:
+                self.copy_solid_chunk(key)
+        else:
+            self.solid_cells = np.zeros((0, 0), dtype=bool)
+            self.solid_origin = (0, 0)
+        dirty.clear()
+        return self.solid_cells, self.solid_origin
+
+    def solid_check_many(self, positions):
+        """
+        Checks many positions for solid tiles at once, with NumPy lookups
+        into the grid from solid_grid.
+
+        Parameters:
+            positions (numpy.ndarray or list): The positions to check, in
+            pixels, shape (count, 2).
+
+        Returns:
+            numpy.ndarray: A bool per position, True where it is inside a
+            solid tile.
+        """
+        cells = np.floor_divide(
+            np.asarray(positions, dtype=float).reshape(-1, 2), self.tile_size
+        ).astype(np.int64)
+        return self.solid_cells_at(cells)
+
+    def solid_cells_at(self, cells):
+        """
+        Looks grid cells up in the grid from solid_grid.
+
+        Parameters:
+            cells (numpy.ndarray): Integer grid coordinates, shape
+            (count, 2).
+
+        Returns:
+            numpy.ndarray: A bool per cell, True where it is solid.
+        """
+        grid, origin = self.solid_grid()
+        cols = cells[:, 0] - origin[0]
+        rows = cells[:, 1] - origin[1]
+        height, width = grid.shape
+        inside = (cols >= 0) & (cols < width) & (rows >= 0) & (rows < height)
+        solid = np.zeros(len(cells), dtype=bool)
+        solid[inside] = grid[rows[inside], cols[inside]]
+        return solid
 
     def physics_rects_around(self, pos):
         """
         Gets a list of pygame.Rect objects for solid tiles around a
-        specified position, for physics calculations.
+        specified position, for physics calculations. The rects are new
+        objects the caller may modify.
 
         Parameters:
             pos (tuple): The position to check around, in pixels.
@@ -195,53 +1093,193 @@ class Tilemap:
             the specified position.
         """
         # Vrací seznam obdélníků pro kolize kolem zadané pozice
+        tile_size = self.tile_size
+        chunks = self.chunks
+        tx = int(pos[0] // tile_size)
+        ty = int(pos[1] // tile_size)
         rects = []  # Inicializace seznamu obdélníků
-        for tile in self.tiles_around(pos):
-            if tile["type"] in tiles_set:
+        for offset in NEIGHBOR_OFFSETS:
+            x = tx + offset[0]
+            y = ty + offset[1]
+            chunk = chunks.get((x >> CHUNK_SHIFT, y >> CHUNK_SHIFT))
+            if (
+                chunk is not None
+                and chunk.solid[
+                    ((y & CHUNK_MASK) << CHUNK_SHIFT) | (x & CHUNK_MASK)
+                ]
+            ):
                 rects.append(
                     pygame.Rect(
-                        tile["pos"][0] * self.tile_size,
-                        tile["pos"][1] * self.tile_size,
-                        self.tile_size,
-                        self.tile_size,
+                        x * tile_size, y * tile_size, tile_size, tile_size
                     )
                 )
         return rects  # Vrátí seznam obdélníků
 
+    def physics_rects_around_many(self, positions):
+        """
+        Gets the solid tile rects around many positions at once. All the
+        neighbour cells are looked up in the grid from solid_grid with a
+        single NumPy operation, and rects are only built for the solid ones.
+
+        Parameters:
+            positions (numpy.ndarray or list): The positions to check
+            around, in pixels, shape (count, 2).
+
+        Returns:
+            list: For each position, the list physics_rects_around would
+            return for it.
+        """
+        tile_size = self.tile_size
+        cells = np.floor_divide(
+            np.asarray(positions, dtype=float).reshape(-1, 2), tile_size
+        ).astype(np.int64)
+        around = cells[:, None, :] + np.array(NEIGHBOR_OFFSETS)
+        solid = self.solid_cells_at(around.reshape(-1, 2)).reshape(
+            len(cells), len(NEIGHBOR_OFFSETS)
+        )
+        owners, slots = np.nonzero(solid)
+        corners = around[owners, slots] * tile_size
+        rects = [[] for _ in range(len(cells))]
+        for n, (x, y) in zip(owners.tolist(), corners.tolist()):
+            rects[n].append(pygame.Rect(x, y, tile_size, tile_size))
+        return rects
+
+    @staticmethod
+    def merge_solid(solid):
+        """
+        Greedily merges the solid cells of a chunk into rectangles. Each
+        rectangle grows along its row first and then downwards for as long
+        as the whole span below it is solid and unclaimed.
+
+        Parameters:
+            solid (bytearray): The solid bitmap of a chunk.
+
+        Returns:
+            list: (x, y, width, height) tuples in cells, relative to the
+            chunk.
+        """
+        free = bytearray(solid)
+        cells = []
+        for y in range(CHUNK_SIZE):
+            row = y << CHUNK_SHIFT
+            x = 0
+            while x < CHUNK_SIZE:
+                if not free[row | x]:
+                    x += 1
+                    continue
+                w = 1
+                while x + w < CHUNK_SIZE and free[row | (x + w)]:
+                    w += 1
+                h = 1
+                while y + h < CHUNK_SIZE:
+                    below = (y + h) << CHUNK_SHIFT
+                    if not all(free[below + x : below + x + w]):
+                        break
+                    h += 1
+                for dy in range(h):
+                    start = ((y + dy) << CHUNK_SHIFT) | x
+                    free[start : start + w] = bytes(w)
+                cells.append((x, y, w, h))
+                x += w
+        return cells
+
+    def chunk_solid_rects(self, key):
+        """
+        Gets the merged collision rectangles of a chunk, building them if
+        needed.
+
+        Parameters:
+            key (tuple): The (chunk_x, chunk_y) coordinates of the chunk.
+
+        Returns:
+            list: (x, y, width, height) tuples in pixels.
+        """
+        rects = self.solid_rects.get(key)
+        if rects is None:
+            chunk = self.chunks.get(key)
+            rects = []
+            if chunk is not None:
+                tile_size = self.tile_size
+                left = key[0] * CHUNK_SIZE * tile_size
+                top = key[1] * CHUNK_SIZE * tile_size
+                for x, y, w, h in self.merge_solid(chunk.solid):
+                    rects.append(
+                        (
+                            left + x * tile_size,
+                            top + y * tile_size,
+                            w * tile_size,
+                            h * tile_size,
+                        )
+                    )
+            self.solid_rects[key] = rects
+        return rects
+
+    def merge_solid_rects(self):
+        """
+        Builds the merged collision rectangles of every loaded chunk, so
+        the first physics queries of a level do not have to.
+        """
+        for key in self.chunks:
+            self.chunk_solid_rects(key)
+
+    def solid_rects_in(self, rect):
+        """
+        Gets the merged collision rectangles that overlap an area. Static
+        geometry such as long floors and walls comes back as a few large
+        rects instead of one rect per tile.
+
+        Parameters:
+            rect (pygame.Rect): The area to query, in pixels.
+
+        Returns:
+            list: New pygame.Rect objects overlapping the area, which the
+            caller may modify.
+        """
+        chunk_px = CHUNK_SIZE * self.tile_size
+        found = []
+        for cx in range(
+            rect.left // chunk_px, (rect.right - 1) // chunk_px + 1
+        ):
+            for cy in range(
+                rect.top // chunk_px, (rect.bottom - 1) // chunk_px + 1
+            ):
+                if (cx, cy) not in self.chunks:
+                    continue
+                rects = self.chunk_solid_rects((cx, cy))
+                for i in rect.collidelistall(rects):
+                    found.append(pygame.Rect(rects[i]))
+        return found
+
     def render(self, surf, offset=(0, 0)):
         """
-        Renders the tilemap onto a given surface.
+        Renders the tilemap onto a given surface, using the baked chunk
+        surfaces of render_cache.
 
         Parameters:
             surf (pygame.Surface): The surface to render the tilemap on.
             offset (tuple): An (x, y) offset to apply to the tile positions,
             used for camera movement.
         """
-        # Vykreslí dlaždice na zadaný povrch s dan
-        for tile in self.offgrid_tiles:
-            surf.blit(
-                self.game.assets[tile["type"]][tile["variant"]],
-                (tile["pos"][0] - offset[0], tile["pos"][1] - offset[1]),
-            )
-
-        # Procházení oblasti herní plochy, která je viditelná na obrazovce
-        for x in range(
-            offset[0] // self.tile_size,
-            (offset[0] + surf.get_width()) // self.tile_size + 1,
+        # Vykreslí předpřipravené bloky, které jsou vidět na obrazovce
+        chunk_px = CHUNK_SIZE * self.tile_size
+        blits = []
+        for cx in range(
+            int(offset[0] // chunk_px),
+            int((offset[0] + surf.get_width()) // chunk_px) + 1,
         ):
-            for y in range(
-                offset[1] // self.tile_size,
-                (offset[1] + surf.get_height()) // self.tile_size + 1,
+            for cy in range(
+                int(offset[1] // chunk_px),
+                int((offset[1] + surf.get_height()) // chunk_px) + 1,
             ):
-                # Určení lokace dlaždice na základě souřadnic x a y
-                loc = str(x) + ";" + str(y)
-                if loc in self.tilemap:
-                    # Načtení dlaždice z self.tilemap
-                    tile = self.tilemap[loc]
-                    surf.blit(
-                        self.game.assets[tile["type"]][tile["variant"]],
+                img = self.render_cache.get((cx, cy))
+                if img is not None:
+                    blits.append(
                         (
-                            tile["pos"][0] * self.tile_size - offset[0],
-                            tile["pos"][1] * self.tile_size - offset[1],
-                        ),
+                            img,
+                            (
+                                cx * chunk_px - offset[0],
+                                cy * chunk_px - offset[1],
+                            ),
+                        )
                     )
+        surf.blits(blits, doreturn=False)
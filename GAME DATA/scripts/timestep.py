@@ -0,0 +1,91 @@
+"""
+This module provides the fixed timestep the game is simulated with. All the
+game's constants, such as gravity, dash counters and fireball ages, are per
+step, so the real time elapsed between rendered frames is accumulated and
+the simulation always advances in whole steps of the same length.
+
+When rendering is slow, several steps run before the next frame is drawn,
+so the game skips frames instead of going into slow motion. When rendering
+is fast, frames are drawn between two steps and the renderer interpolates
+between the previous and the current state.
+"""
+
+# Simulation steps per second. The game was tuned for 60 frames per second.
+SIM_FPS = 60
+
+# Maximum number of steps run before a frame is drawn. If the machine cannot
+# keep up even then, the rest of the elapsed time is dropped and the game
+# slows down instead of never drawing again.
+MAX_STEPS = 5
+
+# Default cap of the rendered frames per second.
+RENDER_FPS = 144
+
+
+class FixedTimestep:
+    """
+    Turns the real time elapsed between frames into a number of simulation
+    steps.
+
+    Attributes:
+        step (float): The length of a step in milliseconds.
+        max_steps (int): Maximum number of steps per frame.
+        accumulator (float): Elapsed time not simulated yet, in
+        milliseconds.
+        steps (int): Number of steps run so far.
+        dropped (int): Number of steps dropped because of max_steps.
+    """
+
+    def __init__(self, rate=SIM_FPS, max_steps=MAX_STEPS):
+        """
+        Initializes a new FixedTimestep.
+
+        Parameters:
+            rate (int, optional): Steps per second. Defaults to SIM_FPS.
+            max_steps (int, optional): Maximum number of steps per frame.
+            Defaults to MAX_STEPS.
+        """
+        self.step = 1000 / rate
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+        self.steps = 0
+        self.dropped = 0
+
+    def reset(self):
+        """
+        Forgets the time not simulated yet, for example after a pause.
+        """
+        self.accumulator = 0.0
+
+    def advance(self, elapsed):
+        """
+        Adds the time elapsed since the last frame.
+
+        Parameters:
+            elapsed (float): The elapsed time in milliseconds, as returned
+            by pygame.time.Clock.tick.
+
+        Returns:
+            int: Number of steps to simulate before drawing the frame.
+        """
+        self.accumulator += elapsed
+        steps = int(self.accumulator // self.step)
+        if steps > self.max_steps:
+            # Hra nestíhá, zbylý čas se zahodí
+            self.dropped += steps - self.max_steps
+            steps = self.max_steps
+            self.accumulator %= self.step
+        else:
+            self.accumulator -= steps * self.step
+        self.steps += steps
+        return steps
+
+    @property
+    def alpha(self):
+        """
+        How far the frame lies between the previous and the current step.
+
+        Returns:
+            float: The interpolation factor, from 0 to 1.
+        """
+        return self.accumulator / self.step
@@ -0,0 +1,326 @@
+"""
+This module provides the small widget framework the menus are built with.
+A MenuScreen draws its background and widgets once, then sleeps until an
+event arrives instead of redrawing everything in a busy loop. Only widgets
+whose look changed, such as a button the mouse moved onto, are drawn again,
+and only their rects are pushed to the display.
+"""
+
+import sys
+
+import pygame
+
+# Maximum number of redraws per second while events keep coming, for
+# example while the mouse moves.
+MENU_FPS = 60
+
+WHITE = (255, 255, 255)
+
+
+class Widget:
+    """
+    The base of every widget.
+
+    Attributes:
+        rect (pygame.Rect): The area the widget draws in.
+        dirty (bool): Whether the widget needs to be drawn again.
+    """
+
+    def __init__(self, rect):
+        """
+        Initializes a new Widget.
+
+        Parameters:
+            rect (pygame.Rect): The area the widget draws in.
+        """
+        self.rect = pygame.Rect(rect)
+        self.dirty = True
+
+    def handle(self, event):
+        """
+        Reacts to an event.
+
+        Parameters:
+            event (pygame.event.Event): The event.
+
+        Returns:
+            The action the event triggered, or None.
+        """
+        return None
+
+    def draw(self, surf):
+        """
+        Draws the widget.
+
+        Parameters:
+            surf (pygame.Surface): The surface to draw on.
+        """
+
+
+class Label(Widget):
+    """
+    A static text centered on a point.
+
+    Attributes:
+        surface (pygame.Surface): The rendered text.
+    """
+
+    def __init__(self, text, font, center, color=WHITE):
+        """
+        Initializes a new Label.
+
+        Parameters:
+            text (str): The text.
+            font (pygame.font.Font): The font of the text.
+            center (tuple): The center of the text on the screen.
+            color (tuple, optional): The text color. Defaults to white.
+        """
+        self.surface = font.render(text, True, color)
+        super().__init__(self.surface.get_rect(center=center))
+
+    def draw(self, surf):
+        surf.blit(self.surface, self.rect)
+
+
+class Panel(Widget):
+    """
+    A filled rectangle with a border.
+
+    Attributes:
+        color (tuple): The fill color.
+        border_color (tuple): The border color.
+        border (int): The border width in pixels.
+    """
+
+    def __init__(self, rect, color, border_color, border=10):
+        """
+        Initializes a new Panel.
+
+        Parameters:
+            rect (pygame.Rect): The outer rect of the panel.
+            color (tuple): The fill color.
+            border_color (tuple): The border color.
+            border (int, optional): The border width. Defaults to 10.
+        """
+        super().__init__(rect)
+        self.color = color
+        self.border_color = border_color
+        self.border = border
+
+    def draw(self, surf):
+        pygame.draw.rect(surf, self.border_color, self.rect)
+        pygame.draw.rect(
+            surf,
+            self.color,
+            self.rect.inflate(-2 * self.border, -2 * self.border),
+        )
+
+
+class Button(Widget):
+    """
+    A rounded button with a centered text, highlighted under the mouse.
+
+    Attributes:
+        action: Returned by handle when the button is clicked.
+        color (tuple): The color of the button.
+        hover_color (tuple): The color of the button under the mouse.
+        text (pygame.Surface): The rendered text.
+        hovered (bool): Whether the mouse is over the button.
+    """
+
+    def __init__(self, text, rect, font, action, color, hover_color):
+        """
+        Initializes a new Button.
+
+        Parameters:
+            text (str): The text on the button.
+            rect (pygame.Rect): The area of the button.
+            font (pygame.font.Font): The font of the text.
+            action: Returned by handle when the button is clicked.
+            color (tuple): The color of the button.
+            hover_color (tuple): The color of the button under the mouse.
+        """
+        super().__init__(rect)
+        self.action = action
+        self.color = color
+        self.hover_color = hover_color
+        self.text = font.render(text, True, WHITE)
+        self.hovered = self.rect.collidepoint(pygame.mouse.get_pos())
+
+    def handle(self, event):
+        if event.type == pygame.MOUSEMOTION:
+            hovered = self.rect.collidepoint(event.pos)
+            if hovered != self.hovered:
+                # Překreslí se jen tlačítko, kterému se změnil stav
+                self.hovered = hovered
+                self.dirty = True
+        elif event.type == pygame.MOUSEBUTTONDOWN and self.rect.collidepoint(
+            event.pos
+        ):
+            return self.action
+        return None
+
+    def draw(self, surf):
+        pygame.draw.rect(
+            surf,
+            self.hover_color if self.hovered else self.color,
+            self.rect,
+            border_radius=20,
+        )
+        surf.blit(self.text, self.text.get_rect(center=self.rect.center))
+
+
+class Slider(Widget):
+    """
+    A horizontal slider dragged with the mouse.
+
+    Attributes:
+        track (pygame.Rect): The track of the slider.
+        value (float): The value, from 0 to 1.
+        on_change (callable): Called with the new value while dragging.
+        color (tuple): The color of the track.
+        dragging (bool): Whether the slider is being dragged.
+    """
+
+    def __init__(self, track, value, on_change, color):
+        """
+        Initializes a new Slider.
+
+        Parameters:
+            track (pygame.Rect): The track of the slider.
+            value (float): The starting value, from 0 to 1.
+            on_change (callable): Called with the new value while dragging.
+            color (tuple): The color of the track.
+        """
+        self.track = pygame.Rect(track)
+        # Jezdec přesahuje dráhu o 5 pixelů na každou stranu
+        super().__init__(self.track.inflate(10, 10))
+        self.value = value
+        self.on_change = on_change
+        self.color = color
+        self.dragging = False
+
+    def handle(self, event):
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            self.dragging = self.track.collidepoint(event.pos)
+        elif event.type == pygame.MOUSEBUTTONUP:
+            self.dragging = False
+        elif event.type == pygame.MOUSEMOTION and self.dragging:
+            value = max(
+                0, min(1, (event.pos[0] - self.track.x) / self.track.width)
+            )
+            if value != self.value:
+                self.value = value
+                self.dirty = True
+                self.on_change(value)
+        return None
+
+    def draw(self, surf):
+        pygame.draw.rect(surf, self.color, self.track)
+        pygame.draw.rect(
+            surf,
+            WHITE,
+            (
+                self.track.x + self.value * self.track.width - 5,
+                self.track.y - 5,
+                10,
+                self.track.height + 10,
+            ),
+        )
+
+
+class MenuScreen:
+    """
+    A menu screen: a background with widgets on top. It draws everything
+    once, then waits for events and redraws only the changed widgets.
+
+    Attributes:
+        surf (pygame.Surface): The display surface.
+        background (pygame.Surface): Drawn behind the widgets, and used to
+        clear a widget before it is drawn again.
+        widgets (list[Widget]): The widgets, in drawing order.
+        on_event (callable): Called with every event the widgets did not
+        turn into an action; may return an action itself.
+        clock (pygame.time.Clock): Caps the redraw rate.
+    """
+
+    def __init__(self, surf, background, widgets, on_event=None):
+        """
+        Initializes a new MenuScreen.
+
+        Parameters:
+            surf (pygame.Surface): The display surface.
+            background (pygame.Surface): Drawn behind the widgets.
+            widgets (list[Widget]): The widgets, in drawing order.
+            on_event (callable, optional): Called with every event the
+            widgets did not turn into an action. Defaults to None.
+        """
+        self.surf = surf
+        self.background = background
+        self.widgets = widgets
+        self.on_event = on_event
+        self.clock = pygame.time.Clock()
+
+    def draw(self):
+        """
+        Draws the whole screen and presents it.
+        """
+        self.surf.blit(self.background, (0, 0))
+        for widget in self.widgets:
+            widget.draw(self.surf)
+            widget.dirty = False
+        pygame.display.update()
+
+    def redraw(self):
+        """
+        Draws the widgets that changed and presents only their rects.
+        """
+        dirty = []
+        for widget in self.widgets:
+            if widget.dirty:
+                self.surf.blit(self.background, widget.rect, widget.rect)
+                widget.draw(self.surf)
+                widget.dirty = False
+                dirty.append(widget.rect)
+        if dirty:
+            pygame.display.update(dirty)
+
+    def handle(self, event):
+        """
+        Passes an event to the widgets and to on_event.
+
+        Parameters:
+            event (pygame.event.Event): The event.
+
+        Returns:
+            The triggered action, or None.
+        """
+        if event.type == pygame.QUIT:
+            pygame.quit()
+            sys.exit()
+        for widget in self.widgets:
+            action = widget.handle(event)
+            if action is not None:
+                return action
+        if self.on_event is not None:
+            return self.on_event(event)
+        return None
+
+    def run(self):
+        """
+        Shows the screen until an action is triggered. While nothing
+        happens the loop sleeps in pygame.event.wait.
+
+        Returns:
+            The triggered action.
+        """
+        self.draw()
+        while True:
+            # Bez událostí smyčka spí a nezatěžuje procesor
+            events = [pygame.event.wait()] + pygame.event.get()
+            for event in events:
+                action = self.handle(event)
+                if action is not None:
+                    return action
+            self.redraw()
+            self.clock.tick(MENU_FPS)
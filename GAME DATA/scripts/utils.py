@@ -11,6 +11,22 @@ import pygame
 
 BASE_IMG_PATH = "data/pngs/"
 
+# The texture atlas images are taken from, if one is in use.
+atlas = None
+
+
+def set_atlas(new_atlas):
+    """
+    Makes load_image and load_pngs take images from a texture atlas when it
+    contains them, instead of loading each PNG file.
+
+    Parameters:
+        new_atlas (Atlas or None): The atlas to use, or None to load every
+        image from its file.
+    """
+    global atlas
+    atlas = new_atlas
+
 
 def load_image(path):
     """
@@ -25,14 +41,32 @@ def load_image(path):
         pygame.Surface: The loaded image with a transparent background set to
         black (0, 0, 0).
     """
-    img = pygame.image.load(BASE_IMG_PATH + path).convert()
+    if atlas is not None and path in atlas:
+        return atlas.image(path)
+    return convert_image(pygame.image.load(BASE_IMG_PATH + path))
+
+
+def convert_image(img):
+    """
+    Convert a decoded image to the display format, setting a color key for
+    transparency like load_image does.
+
+    Parameters:
+        img (pygame.Surface): The decoded image.
+
+    Returns:
+        pygame.Surface: The converted image with a transparent background
+        set to black (0, 0, 0).
+    """
+    img = img.convert()
     img.set_colorkey((0, 0, 0))
     return img
 
 
 def load_pngs(path):
     """
-    Load all PNG images from a specified directory path, sorted by file name.
+    Load all PNG images from a specified directory path, sorted by file name,
+    or ordered by their variants when they come from the atlas.
 
     Parameters:
         path (str): The directory path relative to the base image directory
@@ -42,12 +76,27 @@ def load_pngs(path):
         list[pygame.Surface]: A list of loaded pygame.Surface objects for each
         PNG image in the directory.
     """
+    if atlas is not None and path in atlas:
+        return atlas.pngs(path)
     pngs = []
     for img_name in sorted(os.listdir(BASE_IMG_PATH + path)):
         pngs.append(load_image(path + "/" + img_name))
     return pngs
 
 
+def flip_image(img):
+    """
+    Mirror an image horizontally, keeping its color key.
+
+    Parameters:
+        img (pygame.Surface): The image to mirror.
+
+    Returns:
+        pygame.Surface: A new, left-facing copy of the image.
+    """
+    return pygame.transform.flip(img, True, False)
+
+
 class Animation:
     """
     A class for managing animations by cycling through a sequence of images.
@@ -55,6 +104,8 @@ class Animation:
     Attributes:
         pngs (list[pygame.Surface]): A list of images for each frame of the
         animation.
+        flipped (list[pygame.Surface]): The same images mirrored
+        horizontally, made once and shared by every copy of the animation.
         loop (bool): Whether the animation should loop.
         img_duration (int): How many updates each image in the sequence should
         be displayed for.
@@ -63,7 +114,7 @@ class Animation:
         frame (int): The current frame of the animation.
     """
 
-    def __init__(self, pngs, img_dur=5, loop=True):
+    def __init__(self, pngs, img_dur=5, loop=True, flipped=None):
         """
         Initializes a new Animation instance.
 
@@ -74,8 +125,13 @@ class Animation:
             each frame. Defaults to 5.
             loop (bool, optional): Whether the animation should loop
             indefinitely. Defaults to True.
+            flipped (list[pygame.Surface], optional): The images mirrored
+            horizontally. Defaults to mirroring pngs.
         """
         self.pngs = pngs
+        if flipped is None:
+            flipped = [flip_image(img) for img in pngs]
+        self.flipped = flipped
         self.loop = loop
         self.img_duration = img_dur
         self.done = False
@@ -89,33 +145,42 @@ class Animation:
             Animation: A new Animation instance with the same images, duration,
             and loop setting.
         """
-        return Animation(self.pngs, self.img_duration, self.loop)
+        return Animation(self.pngs, self.img_duration, self.loop, self.flipped)
 
-    def update(self):
+    def update(self, frames=1):
         """
         Updates the animation's current frame, progressing the animation.
 
         This method should be called every update cycle. It advances the frame
         count, and handles looping
         or marking the animation as done if it does not loop.
+
+        Parameters:
+            frames (int, optional): Number of update cycles to advance by.
+            Defaults to 1.
         """
         if self.loop:
-            self.frame = (self.frame + 1) % (
+            self.frame = (self.frame + frames) % (
                 self.img_duration * len(self.pngs)
             )
         else:
             self.frame = min(
-                self.frame + 1, self.img_duration * len(self.pngs) - 1
+                self.frame + frames, self.img_duration * len(self.pngs) - 1
             )
             if self.frame >= self.img_duration * len(self.pngs) - 1:
                 self.done = True
 
-    def img(self):
+    def img(self, flip=False):
         """
         Retrieves the current image of the animation based on the current
         frame.
 
+        Parameters:
+            flip (bool, optional): Whether to return the horizontally
+            mirrored image. Defaults to False.
+
         Returns:
             pygame.Surface: The current frame's image.
         """
-        return self.pngs[int(self.frame / self.img_duration)]
+        pngs = self.flipped if flip else self.pngs
+        return pngs[int(self.frame / self.img_duration)]
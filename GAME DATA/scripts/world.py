@@ -0,0 +1,540 @@
+"""
+This module keeps the physics state of many enemies in contiguous NumPy
+arrays (a structure of arrays) so that gravity, velocity clamping and tile
+collisions can be run for all of them at once. The Enemy objects used by
+the gameplay code stay, but become thin views reading and writing their own
+row of the arrays.
+
+The world is opt-in, see the batch_enemies argument of Game.
+"""
+
+import random
+
+import numpy as np
+import pygame
+
+from scripts.entities import Enemy
+
+# Order of the columns of EntityWorld.collisions.
+COLLISION_SIDES = ("up", "down", "right", "left")
+
+# Number of entities the arrays are allocated for before they first grow.
+WORLD_CAPACITY = 64
+
+# Sentinels for the first and last blocking tile lines of a sweep.
+LINE_MAX = np.iinfo(np.int64).max
+LINE_MIN = np.iinfo(np.int64).min
+
+
+class EntityWorld:
+    """
+    Stores the physics state of a group of entities in NumPy arrays and
+    steps it as batched operations.
+
+    Entities are kept in slots 0 to count - 1. Removing one moves the last
+    entity into its slot, so the arrays stay contiguous.
+
+    Attributes:
+        count (int): Number of entities in the world.
+        entities (list): The WorldEnemy in each slot.
+        pos (numpy.ndarray): Float positions, shape (capacity, 2).
+        velocity (numpy.ndarray): Float velocities, shape (capacity, 2).
+        size (numpy.ndarray): Integer sizes, shape (capacity, 2).
+        flip (numpy.ndarray): Whether each entity faces left.
+        walking (numpy.ndarray): Patrol counters of the entities.
+        collisions (numpy.ndarray): Collision flags of the last step, one
+        column per side in COLLISION_SIDES order.
+        frame (numpy.ndarray): Animation frame counters.
+        anim_length (numpy.ndarray): Number of frames in each current
+        animation (image duration times image count).
+        anim_loop (numpy.ndarray): Whether each current animation loops.
+        grid (numpy.ndarray): Dense copy of the tilemap's solid cells used by
+        step, with an empty border, indexed [row, column].
+        grid_origin (tuple): Tile coordinates of grid[0, 0].
+        grid_version (int or None): The Tilemap.solid_version grid was
+        copied at.
+    """
+
+    def __init__(self, capacity=WORLD_CAPACITY):
+        """
+        Initializes an empty EntityWorld.
+
+        Parameters:
+            capacity (int, optional): Number of entities to allocate the
+            arrays for. They grow as needed. Defaults to WORLD_CAPACITY.
+        """
+        self.count = 0
+        self.entities = []
+        self.pos = np.zeros((capacity, 2))
+        self.velocity = np.zeros((capacity, 2))
+        self.size = np.zeros((capacity, 2), dtype=np.int64)
+        self.flip = np.zeros(capacity, dtype=bool)
+        self.walking = np.zeros(capacity, dtype=np.int64)
+        self.collisions = np.zeros((capacity, 4), dtype=bool)
+        self.frame = np.zeros(capacity, dtype=np.int64)
+        self.anim_length = np.ones(capacity, dtype=np.int64)
+        self.anim_loop = np.ones(capacity, dtype=bool)
+        self.grid = np.zeros((2, 2), dtype=bool)
+        self.grid_origin = (0, 0)
+        self.grid_version = None
+
+    def grow(self):
+        """
+        Doubles the capacity of every array.
+        """
+        for name in (
+            "pos",
+            "velocity",
+            "size",
+            "flip",
+            "walking",
+            "collisions",
+            "frame",
+            "anim_length",
+            "anim_loop",
+        ):
+            old = getattr(self, name)
+            new = np.zeros((len(old) * 2,) + old.shape[1:], dtype=old.dtype)
+            new[: len(old)] = old
+            setattr(self, name, new)
+
+    def add(self, entity):
+        """
+        Gives an entity a slot in the world.
+
+        Parameters:
+            entity (WorldEnemy): The entity to add.
+
+        Returns:
+            int: The slot of the entity.
+        """
+        if self.count == len(self.pos):
+            self.grow()
+        slot = self.count
+        self.count += 1
+        self.entities.append(entity)
+        self.anim_length[slot] = 1
+        self.anim_loop[slot] = True
+        return slot
+
+    def remove(self, entity):
+        """
+        Removes an entity from the world, moving the last entity into its
+        slot. The removed entity keeps a private copy of its state.
+
+        Parameters:
+            entity (WorldEnemy): The entity to remove.
+        """
+        slot = entity.slot
+        last = self.count - 1
+        entity.detach()
+        if slot != last:
+            moved = self.entities[last]
+            for array in (
+                self.pos,
+                self.velocity,
+                self.size,
+                self.flip,
+                self.walking,
+                self.collisions,
+                self.frame,
+                self.anim_length,
+                self.anim_loop,
+            ):
+                array[slot] = array[last]
+            self.entities[slot] = moved
+            moved.slot = slot
+        self.entities.pop()
+        self.count = last
+
+    def positions(self):
+        """
+        Gets the positions of every entity as plain floats, for code that
+        looks at each of them in Python.
+
+        Returns:
+            list: An [x, y] list per slot.
+        """
+        return self.pos[: self.count].tolist()
+
+    def rects(self):
+        """
+        Gets the bounds of every entity, like PhysicsEntity.rect does, but
+        straight from the arrays.
+
+        Returns:
+            list: A pygame.Rect per slot.
+        """
+        count = self.count
+        return [
+            pygame.Rect(x, y, width, height)
+            for (x, y), (width, height) in zip(
+                self.pos[:count].tolist(), self.size[:count].tolist()
+            )
+        ]
+
+    def solid_grid(self, tilemap):
+        """
+        Copies the tilemap's dense solid cells (see Tilemap.solid_grid)
+        with an empty border around them, whenever the solid cells changed.
+
+        Parameters:
+            tilemap (Tilemap): The tilemap the entities collide with.
+        """
+        if self.grid_version != tilemap.solid_version:
+            grid, origin = tilemap.solid_grid()
+            self.grid = np.pad(grid, 1)
+            self.grid_origin = (origin[0] - 1, origin[1] - 1)
+            self.grid_version = tilemap.solid_version
+
+    def solid_at(self, cols, rows):
+        """
+        Looks up the solid grid for arrays of tile coordinates. Coordinates
+        outside of the grid are clamped onto its empty border.
+
+        Parameters:
+            cols (numpy.ndarray): Tile columns.
+            rows (numpy.ndarray): Tile rows, broadcast against cols.
+
+        Returns:
+            numpy.ndarray: True where the tile is solid.
+        """
+        height, width = self.grid.shape
+        rows = np.minimum(
+            np.maximum(rows - self.grid_origin[1], 0), height - 1
+        )
+        cols = np.minimum(np.maximum(cols - self.grid_origin[0], 0), width - 1)
+        return self.grid[rows, cols]
+
+    def sweep(self, idx, axis, amount, tile_size):
+        """
+        Moves the given entities along one axis and stops each one at the
+        first solid tile ahead of it under its swept area, like
+        PhysicsEntity.sweep.
+
+        Parameters:
+            idx (numpy.ndarray): The slots to move.
+            axis (int): 0 to move horizontally, 1 to move vertically.
+            amount (numpy.ndarray): The distance to move each entity.
+            tile_size (int): The tile size of the tilemap.
+        """
+        other = 1 - axis
+        pos = self.pos[idx]
+        size = self.size[idx]
+        length = size[:, axis]
+        # pygame.Rect ořezává souřadnice směrem k nule, stejně jako astype
+        start = pos[:, axis].astype(np.int64)
+        moved = pos[:, axis] + amount
+        end = moved.astype(np.int64)
+        across = pos[:, other].astype(np.int64)
+
+        first = np.minimum(start, end) // tile_size
+        last = (np.maximum(start, end) + length - 1) // tile_size
+        first_across = across // tile_size
+        last_across = (across + size[:, other] - 1) // tile_size
+
+        # Všechny buňky pod taženou plochou se vyhledají najednou
+        lines = first[:, None] + np.arange(int((last - first).max()) + 1)
+        lines_across = first_across[:, None] + np.arange(
+            int((last_across - first_across).max()) + 1
+        )
+        if axis == 0:
+            solid = self.solid_at(lines[:, :, None], lines_across[:, None, :])
+        else:
+            solid = self.solid_at(lines_across[:, None, :], lines[:, :, None])
+        solid &= (lines_across <= last_across[:, None])[:, None, :]
+        blocking = np.logical_or.reduce(solid, axis=2)
+        blocking &= lines <= last[:, None]
+
+        # Dlaždice, do kterých entita už zasahuje, ji nezastaví
+        forward = amount > 0
+        backward = amount < 0
+        ahead = -(-(start + length) // tile_size)
+        behind = start // tile_size
+        blocking &= np.where(
+            forward[:, None],
+            lines >= ahead[:, None],
+            np.where(backward[:, None], lines < behind[:, None], True),
+        )
+        low = np.minimum.reduce(np.where(blocking, lines, LINE_MAX), axis=1)
+        high = np.maximum.reduce(np.where(blocking, lines, LINE_MIN), axis=1)
+
+        hit = high >= low
+        forward &= hit
+        backward &= hit
+        moved = np.where(forward, low * tile_size - length, moved)
+        moved = np.where(backward, (high + 1) * tile_size, moved)
+        moved = np.where(hit & (amount == 0), end, moved)
+        self.pos[idx, axis] = moved
+        # Příznaky kolizí jsou na začátku kroku vynulované
+        if axis == 0:
+            self.collisions[idx, 2] = forward
+            self.collisions[idx, 3] = backward
+        else:
+            self.collisions[idx, 1] = forward
+            self.collisions[idx, 0] = backward
+
+    def step(self, tilemap, idx, movement, frames):
+        """
+        Runs the physics of the given entities: tile collisions on both
+        axes, facing, gravity and animation timers.
+
+        Parameters:
+            tilemap (Tilemap): The tilemap the entities collide with.
+            idx (numpy.ndarray): The slots to update.
+            movement (numpy.ndarray): Movement input of each of those slots,
+            shape (len(idx), 2).
+            frames (numpy.ndarray): Number of frames each of those slots
+            advances by, as PhysicsEntity.update does.
+        """
+        if not len(idx):
+            return
+        self.solid_grid(tilemap)
+        self.collisions[idx] = False
+        frame_movement = (movement + self.velocity[idx]) * frames[:, None]
+        self.sweep(idx, 0, frame_movement[:, 0], tilemap.tile_size)
+        self.sweep(idx, 1, frame_movement[:, 1], tilemap.tile_size)
+
+        self.flip[idx[movement[:, 0] > 0]] = False
+        self.flip[idx[movement[:, 0] < 0]] = True
+
+        fall = np.minimum(5, self.velocity[idx, 1] + 0.1 * frames)
+        landed = self.collisions[idx, 0] | self.collisions[idx, 1]
+        self.velocity[idx, 1] = np.where(landed, 0, fall)
+
+        frame = self.frame[idx] + frames
+        length = self.anim_length[idx]
+        self.frame[idx] = np.where(
+            self.anim_loop[idx], frame % length, np.minimum(frame, length - 1)
+        )
+
+    def think(self, tilemap, idx, frames):
+        """
+        Runs the patrol decisions of the given entities at once, like
+        Enemy.think does for one. The ground probes are a single
+        Tilemap.solid_check_many call; only the random starts of new patrols
+        and the shots of enemies that stop walking run per entity.
+
+        Parameters:
+            tilemap (Tilemap): The tilemap the entities walk on.
+            idx (numpy.ndarray): The slots to update.
+            frames (numpy.ndarray): Number of frames each of those slots
+            advances by.
+
+        Returns:
+            numpy.ndarray: The movement of each of those slots, shape
+            (len(idx), 2).
+        """
+        movement = np.zeros((len(idx), 2))
+        walking = self.walking[idx]
+        flip = self.flip[idx]
+        pos = self.pos[idx]
+        walkers = walking > 0
+
+        # Sonda pod špičkou nepřítele, jako v Enemy.think
+        probes = np.column_stack(
+            (
+                np.trunc(pos[:, 0])
+                + self.size[idx, 0] // 2
+                + np.where(flip, -7, 7),
+                pos[:, 1] + 23,
+            )
+        )
+        ground = tilemap.solid_check_many(probes)
+        blocked = self.collisions[idx, 2] | self.collisions[idx, 3]
+        movement[:, 0] = np.where(
+            walkers & ground & ~blocked, np.where(flip, -0.5, 0.5), 0
+        )
+        self.flip[idx] = flip ^ (walkers & ~(ground & ~blocked))
+
+        walking = np.where(walkers, np.maximum(0, walking - frames), walking)
+        entities = self.entities
+        for n in np.flatnonzero(~walkers).tolist():
+            # Náhodné začátky kroků, pokud nepřítel nestojí
+            count = int(frames[n])
+            if random.random() < (0.01 if count == 1 else 1 - 0.99**count):
+                walking[n] = random.randint(30, 120)
+        self.walking[idx] = walking
+        for slot in idx[walkers & (walking == 0)].tolist():
+            entities[slot].shoot()
+        return movement
+
+    def update(self, tilemap, frames, dashing=False):
+        """
+        Updates the entities for one frame. The patrol decisions, the
+        movement and the choice of animation are batched; Python only runs
+        for the few entities that start a patrol, shoot, change animation
+        or, while the player dashes, may be hit.
+
+        Parameters:
+            tilemap (Tilemap): The tilemap the entities collide with.
+            frames (list): For each slot, the number of frames to advance
+            it by, or 0 (or False) to skip it this frame.
+            dashing (bool, optional): Whether the player dashes fast enough
+            to kill enemies, see Enemy.react. Defaults to False.
+
+        Returns:
+            list: For each slot, True if the player killed the entity.
+        """
+        entities = list(self.entities)
+        frames = np.array(frames, dtype=np.int64)
+        idx = np.flatnonzero(frames)
+        frames = frames[idx]
+        movement = self.think(tilemap, idx, frames)
+        self.step(tilemap, idx, movement, frames)
+
+        kills = [False] * len(entities)
+        for slot, dx in zip(idx.tolist(), movement[:, 0].tolist()):
+            entity = entities[slot]
+            entity.last_movement = (dx, 0)
+            # Nastavení akce podle směru pohybu
+            action = "run" if dx else "idle"
+            if entity.action != action:
+                entity.set_action(action)
+            if dashing:
+                kills[slot] = bool(entity.dash_hit())
+        return kills
+
+
+def world_field(name, convert=None):
+    """
+    Builds a WorldEnemy property that reads and writes one EntityWorld
+    array, falling back to the instance dictionary once the enemy has left
+    its world.
+
+    Parameters:
+        name (str): The name of the array.
+        convert (callable, optional): Turns the array row into the value
+        gameplay code expects. Defaults to returning the row itself.
+
+    Returns:
+        property: The view property.
+    """
+
+    def getter(entity):
+        if entity.world is None:
+            return entity.__dict__[name]
+        value = getattr(entity.world, name)[entity.slot]
+        return value if convert is None else convert(value)
+
+    def setter(entity, value):
+        if entity.world is None:
+            entity.__dict__[name] = value
+        else:
+            getattr(entity.world, name)[entity.slot] = value
+
+    return property(getter, setter)
+
+
+class WorldEnemy(Enemy):
+    """
+    An Enemy whose physics state lives in a row of an EntityWorld. It can
+    be used anywhere an Enemy can; pos and velocity are NumPy views into
+    the world's arrays.
+
+    Attributes:
+        world (EntityWorld or None): The world holding the state, or None
+        once removed from it.
+        slot (int): The row of the world arrays used by this enemy.
+    """
+
+    def __init__(self, game, world, pos, size):
+        """
+        Initializes a new WorldEnemy in the given world.
+
+        Parameters:
+            game: The main game object.
+            world (EntityWorld): The world to store the enemy in.
+            pos (list): The initial position of the enemy.
+            size (tuple): The size of the enemy.
+        """
+        self.world = world
+        self.slot = world.add(self)
+        super().__init__(game, pos, size)
+
+    def update(self, tilemap, movement=(0, 0), frames=1):
+        """
+        Updates the enemy on its own, running its physics through the world
+        like EntityWorld.update does for every enemy at once.
+
+        Parameters:
+            tilemap: The tilemap object the enemy interacts with.
+            movement (tuple): The movement input for the enemy as (dx, dy).
+            frames (int, optional): Number of frames to advance at once.
+            Defaults to 1.
+
+        Returns:
+            bool or None: True if the player killed the enemy.
+        """
+        if self.world is None:
+            return super().update(tilemap, movement, frames)
+        movement = self.think(tilemap, movement, frames)
+        self.world.step(
+            tilemap,
+            np.array([self.slot]),
+            np.array([movement], dtype=float),
+            np.array([frames]),
+        )
+        self.last_movement = movement
+        return self.react(movement)
+
+    def detach(self):
+        """
+        Copies the state of the enemy out of its world, so it keeps working
+        as a plain Enemy after being removed.
+        """
+        state = {
+            "pos": list(map(float, self.pos)),
+            "velocity": list(map(float, self.velocity)),
+            "size": self.size,
+            "flip": self.flip,
+            "walking": self.walking,
+            "collisions": self.collisions,
+            "animation": self.animation,
+        }
+        self.world = None
+        self.__dict__.update(state)
+
+    pos = world_field("pos")
+    velocity = world_field("velocity")
+    size = world_field("size", lambda row: (int(row[0]), int(row[1])))
+    flip = world_field("flip", bool)
+    walking = world_field("walking", int)
+
+    @property
+    def collisions(self):
+        if self.world is None:
+            return self.__dict__["collisions"]
+        flags = self.world.collisions[self.slot]
+        return {side: bool(flag) for side, flag in zip(COLLISION_SIDES, flags)}
+
+    @collisions.setter
+    def collisions(self, value):
+        if self.world is None:
+            self.__dict__["collisions"] = value
+        else:
+            self.world.collisions[self.slot] = [
+                value[side] for side in COLLISION_SIDES
+            ]
+
+    @property
+    def animation(self):
+        animation = self.__dict__["animation"]
+        if self.world is not None:
+            animation.frame = int(self.world.frame[self.slot])
+            animation.done = (
+                not animation.loop
+                and animation.frame
+                >= animation.img_duration * len(animation.pngs) - 1
+            )
+        return animation
+
+    @animation.setter
+    def animation(self, value):
+        self.__dict__["animation"] = value
+        if self.world is not None:
+            self.world.frame[self.slot] = value.frame
+            self.world.anim_length[self.slot] = value.img_duration * len(
+                value.pngs
+            )
+            self.world.anim_loop[self.slot] = value.loop